@@ -1,11 +1,19 @@
-from flask import Flask, render_template, request, jsonify
+import memory_diagnostics  # first, so MEMDIAG=1 traces allocations made by the other imports
+from flask import Flask, Response, g, render_template, request, jsonify, stream_with_context
 import json
 import os
 from langgraph_workflow import run_agent
+import metrics
+import sampling_profiler
+import scheme_api
+import speech_backend
+import turn_dedup
+from langgraph_speculation import speculate
+from message_catalog import msg, negotiate, speech_lang
 
 app = Flask(__name__)
 
-SESSION_MEMORY_PATH = "session_memory.json"
+SESSION_MEMORY_PATH = os.getenv("SESSION_MEMORY_PATH", "session_memory.json")
 
 def load_session_state():
     if not os.path.exists(SESSION_MEMORY_PATH):
@@ -33,6 +41,26 @@ def save_session_state(state):
     with open(SESSION_MEMORY_PATH, "w", encoding="utf-8") as f:
         json.dump(serializable_state, f, ensure_ascii=False, indent=2)
 
+# Requests the sampling profiler may pick (PROFILE_SAMPLE_RATE or X-Profile header)
+PROFILED_PATHS = {"/agent", "/agent/partial"}
+
+@app.before_request
+def start_profile():
+    if request.path in PROFILED_PATHS and sampling_profiler.should_profile(request.headers.get("X-Profile")):
+        g.profile = sampling_profiler.begin(request.path)
+
+@app.after_request
+def profile_header(response):
+    if g.get("profile"):
+        response.headers["X-Profile-Id"] = g.profile[0].id
+    return response
+
+@app.teardown_request
+def end_profile(exc):
+    handle = g.pop("profile", None)
+    if handle:
+        sampling_profiler.end(handle)
+
 @app.route("/")
 def index():
     return render_template("index.html")
@@ -41,27 +69,109 @@ def index():
 def agent():
     user_text = request.json.get("text", "")
     fresh = bool(request.json.get("fresh", False))
-    
+    language = request.json.get("language")
+    accept_language = request.headers.get("Accept-Language")
+    turn_id = request.json.get("turn_id")
+
     if not user_text.strip():
-        return jsonify({"response": "దయచేసి ఏదైనా చెప్పండి."})
-    
-    current_state = None if fresh else load_session_state()
-    
-    result = run_agent(user_text, current_state)
-    
-    save_session_state(result)
-    
-    response_data = {
+        current = None if fresh else (load_session_state() or {}).get("language")
+        return jsonify({"response": msg(negotiate(language, current, "", accept_language), "ask.empty")})
+    if turn_id is not None and not turn_dedup.valid_turn_id(turn_id):
+        return jsonify({"error": f"turn_id must be a string of 1-{turn_dedup.MAX_TURN_ID_LENGTH} characters"}), 400
+
+    def run_turn():
+        current_state = None if fresh else load_session_state()
+        recent = (current_state or {}).get("recent_turns")
+        result = run_agent(user_text, current_state, language=language, accept_language=accept_language)
+        data = _response_data(result)
+        result["recent_turns"] = turn_dedup.record(recent, turn_id, user_text, data)
+        save_session_state(result)
+        return data
+
+    if turn_id is None:
+        return jsonify(run_turn())
+    try:
+        data, replayed = turn_dedup.run_once(turn_id, user_text, load_session_state, run_turn)
+    except turn_dedup.TurnConflict as e:
+        return jsonify({"error": e.args[0]}), 409
+    except turn_dedup.TurnStillRunning as e:
+        return jsonify({"error": e.args[0]}), 503, {"Retry-After": str(turn_dedup.TURN_RETRY_AFTER_SECONDS)}
+    response = jsonify(data)
+    if replayed:
+        response.headers["Idempotent-Replayed"] = "true"
+    return response
+
+def _response_data(result):
+    return {
         "response": result.get("response", ""),
         "intent": result.get("intent", ""),
         "slots": result.get("slots", {}),
         "missing_slots": result.get("missing_slots", []),
         "eligible_schemes": result.get("eligible_schemes", []),
         "needs_confirmation": result.get("needs_confirmation", False),
-        "pending_conflicts": result.get("pending_conflicts", {})
+        "pending_conflicts": result.get("pending_conflicts", {}),
+        "language": result.get("language"),
+        "speech_lang": speech_lang(result.get("language"))
     }
-    
-    return jsonify(response_data)
+
+@app.route("/agent/partial", methods=["POST"])
+def agent_partial():
+    """
+    Interim recognition text while the user is still speaking. Runs the deterministic
+    NLU tier and, once the text is stable, starts the LLM calls the final /agent turn will reuse.
+    """
+    text = request.json.get("text", "")
+    fresh = bool(request.json.get("fresh", False))
+    stable = bool(request.json.get("stable", False))
+    try:
+        return jsonify(speculate(None if fresh else load_session_state(), text, stable))
+    except Exception as e:
+        print(f"[SPECULATION] Failed: {e}")
+        return jsonify({"text": text, "error": str(e)})
+
+@app.route("/agent/audio", methods=["POST"])
+def agent_audio():
+    """
+    Spoken turn: the body is 16 kHz mono 16-bit PCM (raw or WAV), optionally chunked.
+    Streams NDJSON events back: partial, transcript, response, audio (base64 WAV per sentence), done.
+    """
+    fresh = request.args.get("fresh") == "1"
+    speak = request.args.get("tts", "1") != "0"
+    try:
+        speech_backend.get_asr_engine()
+    except speech_backend.SpeechUnavailableError as e:
+        return jsonify({"error": str(e)}), 503
+
+    session_state = None if fresh else load_session_state()
+    language = request.args.get("language")
+    accept_language = request.headers.get("Accept-Language")
+
+    def run_turn(text):
+        recent = (session_state or {}).get("recent_turns")
+        result = run_agent(text, session_state, language=language, accept_language=accept_language)
+        data = _response_data(result)
+        result["recent_turns"] = turn_dedup.record(recent, None, text, data)
+        save_session_state(result)
+        return data
+
+    def on_partial(text, stable):
+        try:
+            speculate(session_state, text, stable)
+        except Exception as e:
+            print(f"[SPECULATION] Failed: {e}")
+
+    # Recognise in the language the turn would answer in without text to go on
+    listen_lang = speech_lang(negotiate(language, (session_state or {}).get("language"), "", accept_language))
+    events = speech_backend.run_audio_turn(
+        speech_backend.pcm_chunks(request.stream), run_turn, speak=speak, on_partial=on_partial,
+        speech_lang=listen_lang,
+    )
+    body = (json.dumps(event, ensure_ascii=False) + "\n" for event in events)
+    return Response(stream_with_context(body), mimetype="application/x-ndjson")
+
+@app.route("/agent/audio/status")
+def agent_audio_status():
+    return jsonify(speech_backend.speech_status())
 
 @app.route("/get_profile")
 def get_profile():
@@ -76,9 +186,11 @@ def get_profile():
 
 @app.route("/reset")
 def reset():
+    current = (load_session_state() or {}).get("language")
     if os.path.exists(SESSION_MEMORY_PATH):
         os.remove(SESSION_MEMORY_PATH)
-    return jsonify({"status": "reset", "message": "సెషన్ రీసెట్ చేయబడింది"})
+    language = negotiate(request.args.get("language"), current, "", request.headers.get("Accept-Language"))
+    return jsonify({"status": "reset", "message": msg(language, "session.reset")})
 
 @app.route("/history")
 def history():
@@ -87,5 +199,119 @@ def history():
         return jsonify({"history": state.get("history", [])})
     return jsonify({"history": []})
 
+@app.route("/schemes")
+def schemes_list():
+    """Scheme catalog, optionally ?state= and ?category= (cacheable, see scheme_api)"""
+    try:
+        state, category = scheme_api.list_filters(request.args)
+    except scheme_api.ApiError as e:
+        return scheme_api.json_error(e)
+    language = scheme_api.request_language()
+    return scheme_api.cached_json(
+        lambda: scheme_api.list_version(state),
+        {"state": state, "category": category, "language": language},
+        lambda: scheme_api.list_schemes(state, category, language),
+    )
+
+@app.route("/schemes/<scheme_id>")
+def schemes_detail(scheme_id):
+    language = scheme_api.request_language()
+    return scheme_api.cached_json(
+        lambda: scheme_api.scheme_version(scheme_id),
+        {"language": language},
+        lambda: scheme_api.scheme_detail(scheme_id, language),
+    )
+
+@app.route("/eligibility", methods=["GET", "POST"])
+def eligibility():
+    """Eligible schemes for a profile: POST a JSON profile, or GET with the fields as query parameters"""
+    try:
+        if request.method == "POST":
+            data = request.get_json(silent=True)
+            language = negotiate((data or {}).get("language") if isinstance(data, dict) else None,
+                                 None, "", request.headers.get("Accept-Language"))
+            return scheme_api.uncached_json(scheme_api.eligibility(scheme_api.parse_profile(data), language))
+        profile = scheme_api.parse_profile(request.args.to_dict())
+    except scheme_api.ApiError as e:
+        return scheme_api.json_error(e)
+    language = scheme_api.request_language()
+    return scheme_api.cached_json(
+        lambda: scheme_api.eligibility_version(profile),
+        {"profile": profile, "language": language},
+        lambda: scheme_api.eligibility(profile, language),
+    )
+
+@app.route("/metrics")
+def metrics_snapshot():
+    return jsonify(metrics.snapshot())
+
+def _int_arg(name, default):
+    try:
+        return int(request.args.get(name, default))
+    except ValueError:
+        raise ValueError(f"{name} must be an integer")
+
+@app.route("/admin/memory", methods=["GET", "POST"])
+def admin_memory():
+    """
+    Memory diagnostics (MEMDIAG=1 and the X-Admin-Token header set to MEMDIAG_TOKEN).
+    GET ?view=summary|top|diff|objects|sessions, POST takes a snapshot (?label=).
+    """
+    if not memory_diagnostics.authorized(request.headers.get("X-Admin-Token")):
+        return jsonify({"error": "not found"}), 404
+    args = request.args
+    group_by = args.get("group_by", "lineno")
+    try:
+        limit = _int_arg("limit", 20)
+        if request.method == "POST":
+            label = memory_diagnostics.take_snapshot(args.get("label"))
+            return jsonify({"snapshot": label, "snapshots": memory_diagnostics.list_snapshots()})
+        view = args.get("view", "summary")
+        if view == "top":
+            return jsonify(memory_diagnostics.top_allocators(args.get("label"), group_by, limit))
+        if view == "diff":
+            return jsonify(memory_diagnostics.diff(args.get("before", ""), args.get("after"), group_by, limit))
+        if view == "objects":
+            return jsonify(memory_diagnostics.object_counts(limit))
+        if view == "sessions":
+            data = memory_diagnostics.session_estimates(limit)
+            # Between requests a session lives in the session file, not in memory
+            data["stored_session_bytes"] = os.path.getsize(SESSION_MEMORY_PATH) if os.path.exists(SESSION_MEMORY_PATH) else 0
+            return jsonify(data)
+        return jsonify({
+            "process": memory_diagnostics.process_memory(),
+            "snapshots": memory_diagnostics.list_snapshots(),
+            "caches": memory_diagnostics.cache_sizes(),
+        })
+    except (KeyError, ValueError, RuntimeError) as e:
+        return jsonify({"error": e.args[0] if e.args else str(e)}), 400
+
+@app.route("/admin/profile")
+def admin_profile():
+    """
+    Aggregated profiler samples (X-Admin-Token: PROFILE_TOKEN).
+    ?format=summary|collapsed|speedscope, ?request=<X-Profile-Id> for one request, ?reset=1 to clear.
+    """
+    if not sampling_profiler.authorized(request.headers.get("X-Admin-Token")):
+        return jsonify({"error": "not found"}), 404
+    fmt = request.args.get("format", "summary")
+    request_id = request.args.get("request")
+    try:
+        if fmt == "collapsed":
+            response = Response(sampling_profiler.collapsed(request_id), mimetype="text/plain")
+            response.headers["Content-Disposition"] = "attachment; filename=profile.collapsed.txt"
+        elif fmt == "speedscope":
+            response = jsonify(sampling_profiler.speedscope(request_id))
+            response.headers["Content-Disposition"] = "attachment; filename=profile.speedscope.json"
+        else:
+            response = jsonify(sampling_profiler.summary(_int_arg("limit", 10)))
+    except KeyError as e:
+        return jsonify({"error": e.args[0]}), 404
+    except ValueError as e:
+        return jsonify({"error": e.args[0]}), 400
+    if request.args.get("reset") == "1":
+        sampling_profiler.reset()
+    return response
+
 if __name__ == "__main__":
     app.run(debug=True, port=5000)
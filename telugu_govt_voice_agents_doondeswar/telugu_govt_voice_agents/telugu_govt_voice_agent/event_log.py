@@ -0,0 +1,330 @@
+import atexit
+import contextvars
+import json
+import os
+import queue
+import struct
+import threading
+import time
+import zlib
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence
+import metrics
+
+# Append-only, compressed, columnar log of conversation turns.
+#
+# Turns are queued by the request thread and written by one background thread in
+# blocks of up to EVENT_LOG_BLOCK_ROWS rows. Each column of a block is a separately
+# zlib-compressed JSON list, so a query only decompresses the columns it reads, and
+# the block header carries the ts range so time filters skip whole blocks.
+# Files rotate at EVENT_LOG_MAX_BYTES: data/events/turns-<time>-<pid>-<seq>.tlog
+#
+# Rows hold raw user text and profile values, so logging is opt-in (EVENT_LOG=1)
+# and old files are deleted once there are more than EVENT_LOG_MAX_FILES of them
+# or they are older than EVENT_LOG_MAX_AGE_DAYS (0 turns either limit off).
+EVENT_LOG = os.getenv("EVENT_LOG", "0") == "1"
+EVENT_LOG_DIR = os.getenv("EVENT_LOG_DIR", "data/events")
+EVENT_LOG_MAX_BYTES = int(os.getenv("EVENT_LOG_MAX_BYTES", str(64 * 1024 * 1024)))
+EVENT_LOG_MAX_FILES = int(os.getenv("EVENT_LOG_MAX_FILES", "16"))
+EVENT_LOG_MAX_AGE_DAYS = float(os.getenv("EVENT_LOG_MAX_AGE_DAYS", "30"))
+EVENT_LOG_BLOCK_ROWS = int(os.getenv("EVENT_LOG_BLOCK_ROWS", "512"))
+EVENT_LOG_FLUSH_SECONDS = float(os.getenv("EVENT_LOG_FLUSH_SECONDS", "5"))
+EVENT_LOG_QUEUE_MAX = 10000
+
+MAGIC = b"TURNLOG1\n"
+# rows, columns, ts_min, ts_max
+_BLOCK_HEADER = struct.Struct(">IHdd")
+# name length, compressed length
+_COLUMN_HEADER = struct.Struct(">HI")
+
+COLUMNS = [
+    "ts",            # unix time the turn finished
+    "session_id",
+    "turn",          # 1-based turn number within the session (iteration_count)
+    "intent",
+    "next_action",
+    "user_text",
+    "response",
+    "slots_diff",    # {slot: new value}, None for removed slots
+    "eligible",      # eligible scheme names after the turn
+    "node_path",     # graph nodes in execution order
+    "node_ms",       # latency per entry of node_path
+    "total_ms",
+    "llm_calls",     # [[task, backend, ms, ok], ...]
+]
+
+
+# ============================================================
+# Per-turn trace (node path, latencies, LLM calls)
+# ============================================================
+
+class TurnTrace:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.node_path: List[str] = []
+        self.node_ms: List[float] = []
+        self.llm_calls: List[list] = []
+        self._token = None
+
+
+_current: contextvars.ContextVar = contextvars.ContextVar("turn_trace", default=None)
+
+
+def start_turn() -> TurnTrace:
+    trace = TurnTrace()
+    trace._token = _current.set(trace)
+    return trace
+
+
+def end_turn(trace: TurnTrace) -> None:
+    if trace._token is not None:
+        _current.reset(trace._token)
+        trace._token = None
+
+
+def traced_node(name: str, fn: Callable) -> Callable:
+    """Wrap a graph node so its latency lands in the current turn's trace"""
+    def wrapper(state):
+        t0 = time.perf_counter()
+        try:
+            return fn(state)
+        finally:
+            trace = _current.get()
+            if trace is not None:
+                trace.node_path.append(name)
+                trace.node_ms.append(round((time.perf_counter() - t0) * 1000, 2))
+    wrapper.__name__ = getattr(fn, "__name__", name)
+    return wrapper
+
+
+def note_llm_call(task: str, backend: str, ms: float, ok: bool) -> None:
+    trace = _current.get()
+    if trace is not None:
+        trace.llm_calls.append([task, backend, round(ms, 2), ok])
+
+
+# ============================================================
+# Writer
+# ============================================================
+
+def _encode_block(rows: List[Dict[str, Any]]) -> bytes:
+    ts = [row.get("ts", 0.0) for row in rows]
+    parts = [_BLOCK_HEADER.pack(len(rows), len(COLUMNS), min(ts), max(ts))]
+    for name in COLUMNS:
+        data = zlib.compress(
+            json.dumps([row.get(name) for row in rows], ensure_ascii=False, separators=(",", ":")).encode("utf-8"),
+            6,
+        )
+        encoded = name.encode("utf-8")
+        parts.append(_COLUMN_HEADER.pack(len(encoded), len(data)))
+        parts.append(encoded)
+        parts.append(data)
+    return b"".join(parts)
+
+
+class EventLogWriter:
+    def __init__(self, directory: str = EVENT_LOG_DIR, max_bytes: int = EVENT_LOG_MAX_BYTES,
+                 block_rows: int = EVENT_LOG_BLOCK_ROWS, flush_seconds: float = EVENT_LOG_FLUSH_SECONDS,
+                 max_files: int = EVENT_LOG_MAX_FILES, max_age_days: float = EVENT_LOG_MAX_AGE_DAYS):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_files = max_files
+        self.max_age_days = max_age_days
+        self.block_rows = block_rows
+        self.flush_seconds = flush_seconds
+        self._queue: queue.Queue = queue.Queue(maxsize=EVENT_LOG_QUEUE_MAX)
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._file = None
+        self._path: Optional[str] = None
+        self._seq = 0
+
+    def submit(self, event: Dict[str, Any]) -> None:
+        """Never blocks the request path; drops (and counts) events if the writer falls behind"""
+        if self._thread is None:
+            with self._start_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="event-log-writer", daemon=True)
+                    self._thread.start()
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            metrics.incr("event_log.dropped")
+
+    def close(self, timeout: float = 5.0) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join(timeout)
+
+    def _open(self) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        self._seq += 1
+        name = f"turns-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{self._seq:04d}.tlog"
+        self._path = os.path.join(self.directory, name)
+        self._file = open(self._path, "ab")
+        if self._file.tell() == 0:
+            self._file.write(MAGIC)
+        print(f"[EVENT_LOG] Writing {self._path}")
+        self._prune()
+
+    def _prune(self) -> None:
+        """Delete the oldest files beyond max_files and any older than max_age_days (never the open one)"""
+        files = [f for f in log_files(self.directory) if f != self._path]
+        try:
+            files.sort(key=os.path.getmtime)
+            expired = []
+            if self.max_age_days > 0:
+                cutoff = time.time() - self.max_age_days * 86400
+                expired = [f for f in files if os.path.getmtime(f) < cutoff]
+            if self.max_files > 0:
+                # The open file counts towards the limit
+                keep = self.max_files - 1
+                expired += [f for f in files[:max(0, len(files) - keep)] if f not in expired]
+            for path in expired:
+                os.remove(path)
+                metrics.incr("event_log.files_pruned")
+            if expired:
+                print(f"[EVENT_LOG] Removed {len(expired)} old log file(s)")
+        except OSError as e:
+            print(f"[EVENT_LOG] Could not prune {self.directory}: {e}")
+
+    def _write_block(self, rows: List[Dict[str, Any]]) -> None:
+        try:
+            if self._file is None or self._file.tell() >= self.max_bytes:
+                if self._file is not None:
+                    self._file.close()
+                self._open()
+            t0 = time.perf_counter()
+            block = _encode_block(rows)
+            self._file.write(block)
+            self._file.flush()
+            metrics.incr("event_log.rows", len(rows))
+            metrics.incr("event_log.bytes", len(block))
+            metrics.observe("event_log.block_write_ms", (time.perf_counter() - t0) * 1000)
+        except Exception as e:
+            metrics.incr("event_log.write_errors")
+            print(f"[EVENT_LOG] Could not write {len(rows)} events: {e}")
+
+    def _run(self) -> None:
+        rows: List[Dict[str, Any]] = []
+        deadline = time.monotonic() + self.flush_seconds
+        stopping = False
+        while not stopping:
+            try:
+                event = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                if event is None:
+                    stopping = True
+                else:
+                    rows.append(event)
+            except queue.Empty:
+                pass
+            if rows and (stopping or len(rows) >= self.block_rows or time.monotonic() >= deadline):
+                self._write_block(rows)
+                rows = []
+            if time.monotonic() >= deadline:
+                deadline = time.monotonic() + self.flush_seconds
+        if self._file is not None:
+            self._file.close()
+
+
+_writer: Optional[EventLogWriter] = None
+
+
+def get_writer() -> EventLogWriter:
+    global _writer
+    if _writer is None:
+        _writer = EventLogWriter()
+        atexit.register(_writer.close)
+    return _writer
+
+
+def _slots_diff(before: Dict[str, Any], after: Dict[str, Any]) -> Dict[str, Any]:
+    diff = {k: v for k, v in after.items() if before.get(k) != v}
+    diff.update({k: None for k in before if k not in after})
+    return diff
+
+
+def record_turn(previous_slots: Dict[str, Any], result: Dict[str, Any], trace: TurnTrace) -> None:
+    """Queue one finished turn for the event log"""
+    if not EVENT_LOG:
+        return
+    try:
+        get_writer().submit({
+            "ts": time.time(),
+            "session_id": result.get("session_id", ""),
+            "turn": result.get("iteration_count", 0),
+            "intent": result.get("intent", ""),
+            "next_action": result.get("next_action", ""),
+            "user_text": result.get("user_text", ""),
+            "response": result.get("response", ""),
+            "slots_diff": _slots_diff(previous_slots or {}, result.get("slots") or {}),
+            "eligible": list(result.get("eligible_schemes") or []),
+            "node_path": trace.node_path,
+            "node_ms": trace.node_ms,
+            "total_ms": round((time.perf_counter() - trace.started) * 1000, 2),
+            "llm_calls": trace.llm_calls,
+        })
+    except Exception as e:
+        print(f"[EVENT_LOG] Could not record turn: {e}")
+
+
+# ============================================================
+# Reader (streaming, block at a time)
+# ============================================================
+
+def log_files(directory: str = EVENT_LOG_DIR) -> List[str]:
+    if not os.path.isdir(directory):
+        return []
+    return sorted(os.path.join(directory, f) for f in os.listdir(directory) if f.endswith(".tlog"))
+
+
+def iter_blocks(path: str, columns: Optional[Sequence[str]] = None, since: Optional[float] = None,
+                until: Optional[float] = None) -> Iterator[Dict[str, list]]:
+    """
+    Yield {column: values} per block, decompressing only the requested columns.
+    Blocks entirely outside [since, until) are skipped without decompressing.
+    A block cut short by a crash ends the file.
+    """
+    wanted = set(columns) if columns else None
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            print(f"[EVENT_LOG] {path}: not an event log, skipped")
+            return
+        while True:
+            header = f.read(_BLOCK_HEADER.size)
+            if len(header) < _BLOCK_HEADER.size:
+                return
+            n_rows, n_cols, ts_min, ts_max = _BLOCK_HEADER.unpack(header)
+            skip = (since is not None and ts_max < since) or (until is not None and ts_min >= until)
+            block: Dict[str, list] = {}
+            for _ in range(n_cols):
+                col_header = f.read(_COLUMN_HEADER.size)
+                if len(col_header) < _COLUMN_HEADER.size:
+                    return
+                name_len, data_len = _COLUMN_HEADER.unpack(col_header)
+                name = f.read(name_len).decode("utf-8")
+                if skip or (wanted is not None and name not in wanted):
+                    f.seek(data_len, os.SEEK_CUR)
+                    continue
+                data = f.read(data_len)
+                if len(data) < data_len:
+                    return
+                block[name] = json.loads(zlib.decompress(data).decode("utf-8"))
+            if not skip:
+                yield {"__rows__": n_rows, **block}
+
+
+def iter_events(directory: str = EVENT_LOG_DIR, columns: Optional[Sequence[str]] = None,
+                since: Optional[float] = None, until: Optional[float] = None) -> Iterator[Dict[str, Any]]:
+    """Yield one dict per turn (only the requested columns), oldest file first"""
+    if columns and "ts" not in columns:
+        columns = list(columns) + ["ts"]
+    for path in log_files(directory):
+        for block in iter_blocks(path, columns, since, until):
+            n_rows = block.pop("__rows__")
+            names = list(block)
+            for i in range(n_rows):
+                row = {name: block[name][i] for name in names}
+                ts = row.get("ts") or 0.0
+                if (since is not None and ts < since) or (until is not None and ts >= until):
+                    continue
+                yield row
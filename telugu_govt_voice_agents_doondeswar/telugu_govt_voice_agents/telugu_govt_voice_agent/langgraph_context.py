@@ -0,0 +1,143 @@
+import os
+from typing import Any, Dict, List, Optional
+from tools.scheme_content_store import get_catalog
+
+# Prompt context = rolling structured summary + the last RECENT_TURNS exchanges,
+# kept under CONTEXT_TOKEN_BUDGET no matter how long the session runs.
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "600"))
+RECENT_TURNS = int(os.getenv("CONTEXT_RECENT_TURNS", "3"))
+MAX_HISTORY_MESSAGES = 20
+MAX_MESSAGE_CHARS = 600
+MAX_PROMPT_MESSAGE_CHARS = 200
+MAX_SUMMARY_SCHEMES = 5
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Cheap deterministic token estimate (no tokenizer dependency).
+    Telugu costs roughly one token per 3 UTF-8 bytes, English about one per 4 characters.
+    """
+    if not text:
+        return 0
+    return max(1, len(text.encode("utf-8")) // 3)
+
+
+def _clip(text: str, limit: int) -> str:
+    text = " ".join((text or "").split())
+    return text if len(text) <= limit else text[: limit - 1] + "…"
+
+
+def new_summary() -> Dict[str, Any]:
+    return {"folded_turns": 0, "schemes_discussed": [], "last_intents": []}
+
+
+def _schemes_mentioned(text: str, user_state: Optional[str] = None) -> List[str]:
+    compact = "".join((text or "").split())
+    if not compact:
+        return []
+    found = []
+    for name in get_catalog(user_state).by_name:
+        if "".join(name.split()) in compact:
+            found.append(name)
+    return found
+
+
+def _remember_scheme(summary: Dict[str, Any], name: Optional[str]) -> None:
+    if not name:
+        return
+    discussed = [n for n in summary.get("schemes_discussed", []) if n != name]
+    discussed.append(name)
+    summary["schemes_discussed"] = discussed[-MAX_SUMMARY_SCHEMES:]
+
+
+def _fold_message(summary: Dict[str, Any], message: Dict[str, str], user_state: Optional[str] = None) -> None:
+    """Fold one dropped history message into the summary (no LLM involved)"""
+    if message.get("role") == "user":
+        summary["folded_turns"] = summary.get("folded_turns", 0) + 1
+        for name in _schemes_mentioned(message.get("content", ""), user_state):
+            _remember_scheme(summary, name)
+
+
+def update_context(state: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Called once per turn after the graph ran: records the assistant reply, folds
+    messages beyond MAX_HISTORY_MESSAGES into state["context_summary"] and refreshes
+    the structured part of the summary from the current state.
+    """
+    summary = dict(state.get("context_summary") or new_summary())
+    history = [
+        {"role": m.get("role", ""), "content": _clip(m.get("content", ""), MAX_MESSAGE_CHARS)}
+        for m in (state.get("history") or [])
+        if isinstance(m, dict)
+    ]
+    history.append({"role": "assistant", "content": _clip(state.get("response", ""), MAX_MESSAGE_CHARS)})
+
+    overflow = len(history) - MAX_HISTORY_MESSAGES
+    if overflow > 0:
+        for message in history[:overflow]:
+            _fold_message(summary, message, (state.get("slots") or {}).get("state"))
+        history = history[overflow:]
+
+    summary["slots"] = {k: v for k, v in (state.get("slots") or {}).items() if v not in [None, ""]}
+    summary["last_scheme"] = state.get("last_referenced_scheme_name")
+    _remember_scheme(summary, state.get("last_referenced_scheme_name"))
+    summary["open_followup"] = state.get("pending_followup")
+    intent = state.get("intent")
+    if intent:
+        summary["last_intents"] = (list(summary.get("last_intents", [])) + [intent])[-3:]
+
+    state["history"] = history
+    state["context_summary"] = summary
+    return state
+
+
+def render_summary(summary: Optional[Dict[str, Any]]) -> str:
+    if not summary:
+        return ""
+    parts = []
+    slots = summary.get("slots") or {}
+    profile = ", ".join(f"{k}={v}" for k, v in slots.items())
+    if profile:
+        parts.append(f"Profile: {profile}")
+    if summary.get("last_scheme"):
+        parts.append(f"Last scheme discussed: {summary['last_scheme']}")
+    others = [n for n in summary.get("schemes_discussed", []) if n != summary.get("last_scheme")]
+    if others:
+        parts.append(f"Earlier schemes: {', '.join(others)}")
+    if summary.get("open_followup"):
+        parts.append(f"Open follow-up: {summary['open_followup']}")
+    if summary.get("last_intents"):
+        parts.append(f"Recent intents: {', '.join(summary['last_intents'])}")
+    if summary.get("folded_turns"):
+        parts.append(f"Older turns summarized: {summary['folded_turns']}")
+    return "\n".join(parts)
+
+
+def build_prompt_context(state: Dict[str, Any], budget: Optional[int] = None) -> str:
+    """
+    Summary plus the last RECENT_TURNS exchanges, trimmed to the token budget
+    (oldest recent messages are dropped first). The current user message is
+    excluded because prompts carry it separately.
+    """
+    budget = CONTEXT_TOKEN_BUDGET if budget is None else budget
+    summary_text = render_summary(state.get("context_summary"))
+
+    history = list(state.get("history") or [])
+    if history and history[-1].get("role") == "user" and history[-1].get("content") == state.get("user_text"):
+        history = history[:-1]
+    recent = [
+        f"{'User' if m.get('role') == 'user' else 'Assistant'}: {_clip(m.get('content', ''), MAX_PROMPT_MESSAGE_CHARS)}"
+        for m in history[-RECENT_TURNS * 2:]
+    ]
+
+    used = estimate_tokens(summary_text)
+    kept: List[str] = []
+    for line in reversed(recent):
+        cost = estimate_tokens(line)
+        if used + cost > budget:
+            break
+        kept.insert(0, line)
+        used += cost
+
+    blocks = [b for b in [summary_text, "\n".join(kept)] if b]
+    return "\n".join(blocks)
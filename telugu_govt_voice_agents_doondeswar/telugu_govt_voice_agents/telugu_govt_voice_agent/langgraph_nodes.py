@@ -2,29 +2,34 @@ import json
 import os
 from datetime import datetime
 from typing import Dict, Any, Optional, List
-from groq import Groq
 from dotenv import load_dotenv
 from langgraph_state import AgentState
 from tools.eligibility_engine import check_eligibility
 import re
-from tools.scheme_details_tool import get_scheme_details
+from tools.scheme_details_tool import (
+    get_scheme_details_many,
+    render_scheme_detail,
+    precompute_scheme_details,
+)
+from tools.scheme_content_store import get_catalog, get_scheme_shard, get_state_shard
+from tools.state_registry import is_known_state, normalize_state, state_name
+from tools.scheme_search import get_search_index, search_schemes
+from langgraph_context import build_prompt_context
+from langgraph_prompts import get_prompt
+from message_catalog import DEFAULT_LANGUAGE, localized, msg
+from llm_backend import llm_complete
+import metrics
+from tools.intent_model import INTENT_MODEL_MIN_CONFIDENCE, predict_intent
+from tools.slot_extractor import extract_slots, extract_slots_with_coverage, parse_amount, sanitize_text, unmatched_text
 
 load_dotenv()
-client = Groq(api_key="*******")
 
+# Scheme catalogs are sharded by state and loaded on first use; SCHEME_PRELOAD_STATES
+# chooses which shards are loaded and rendered up front (see tools/scheme_content_store.py).
 try:
-    with open("data/schemes_master.json", encoding="utf-8") as _f:
-        _SCHEMES_MASTER = json.load(_f)
-except Exception:
-    _SCHEMES_MASTER = {"AP": [], "TS": []}
-
-_SCHEME_NAME_TO_ID: Dict[str, str] = {}
-for _state_key in ["AP", "TS"]:
-    for _s in _SCHEMES_MASTER.get(_state_key, []) or []:
-        name = (_s.get("scheme_name_te") or "").strip()
-        sid = (_s.get("scheme_id") or "").strip()
-        if name and sid and name not in _SCHEME_NAME_TO_ID:
-            _SCHEME_NAME_TO_ID[name] = sid
+    precompute_scheme_details()
+except Exception as _e:
+    print(f"[SCHEME_DETAILS] Precompute failed: {_e}")
 
 REQUIRED_SLOTS = ["age", "income", "occupation", "state"]
 FINAL_INTENTS = [
@@ -41,19 +46,32 @@ FINAL_INTENTS = [
 ]
 
 
-def _next_question_for_missing(missing_slots) -> str:
+def _next_question_for_missing(missing_slots, language: Optional[str] = None) -> str:
     if not missing_slots:
         return ""
     slot = missing_slots[0]
-    if slot == "age":
-        return "మీ వయసు ఎంత?"
-    if slot == "income":
-        return "మీ వార్షిక ఆదాయం సుమారు ఎంత?"
-    if slot == "occupation":
-        return "మీ వృత్తి ఏమిటి? ఉదాహరణకు రైతు / కూలీ / ఉద్యోగి / డ్రైవర్ / నేత కార్మికుడు."
-    if slot == "state":
-        return "మీరు ఏ రాష్ట్రానికి చెందినవారు? తెలంగాణా లేదా ఆంధ్రప్రదేశ్?"
-    return "దయచేసి మరికొన్ని వివరాలు చెప్పండి."
+    if slot in {"age", "income", "occupation", "state"}:
+        return msg(language, f"ask.{slot}")
+    return msg(language, "ask.more")
+
+
+def _scheme_detail_text(scheme_id: str, view: str, fallback_name: Optional[str] = None,
+                        language: Optional[str] = None) -> str:
+    text = render_scheme_detail(scheme_id, view, language or DEFAULT_LANGUAGE)
+    if text:
+        return text
+    return msg(language, "details.title", name=fallback_name or scheme_id)
+
+
+def _scheme_name(scheme_id: str, language: Optional[str], fallback: Optional[str] = None) -> Optional[str]:
+    """Display name of a scheme in the response language"""
+    shard = get_scheme_shard(scheme_id)
+    record = shard.by_id.get(scheme_id) if shard is not None else None
+    return (localized(record, "scheme_name", language) if record else None) or fallback
+
+
+def _numbered(names: List[str], language: Optional[str]) -> List[str]:
+    return [msg(language, "list.item", n=i, name=name) for i, name in enumerate(names, start=1)]
 
 
 def _parse_json_lenient(text: str) -> Dict[str, Any]:
@@ -101,26 +119,14 @@ def _normalize_value(key: str, value: Any) -> Any:
         return None
     
     if key == "state":
-        if isinstance(value, str):
-            v = value.strip().lower()
-            if v in {"ts", "telangana", "తెలంగాణ", "తెలంగాణా", "తెలగాణ"}:
-                return "TS"
-            if v in {"ap", "andhra", "andhra pradesh", "ఆంధ్ర", "ఆంధ్రప్రదేశ్", "ఆంధ్రప్రదేశ", "ఆంధ్రా", "ఆంధ్ర ప్రదేశ్"}:
-                return "AP"
-        return value
+        return normalize_state(value) or value
     
     if key in {"age", "income"}:
         if isinstance(value, (int, float)):
             return int(value)
         if isinstance(value, str):
-            v = value.strip().lower()
-            m = re.search(r"(\d+)", v)
-            if not m:
-                return value
-            n = int(m.group(1))
-            if "లక్ష" in v or "lakh" in v:
-                return n * 100000
-            return n
+            n = parse_amount(value)
+            return value if n is None else n
     return value
 
 
@@ -161,22 +167,27 @@ def _is_confirmation_response(text: str) -> bool:
     ])
 
 
-def _conflict_prompt_te(conflicts: Dict[str, Any]) -> str:
+def _conflict_prompt(conflicts: Dict[str, Any], language: Optional[str] = None) -> str:
     parts: List[str] = []
     for field, vals in (conflicts or {}).items():
         frm = vals.get("from")
         to = vals.get("to")
-        if field == "age":
-            parts.append(f"మీ వయసు విషయంలో గందరగోళం ఉంది. ముందు {frm} అన్నారు, ఇప్పుడు {to} చెప్పారు. {to} సరేనా? (అవును/కాదు)")
-        elif field == "income":
-            parts.append(f"మీ ఆదాయం విషయంలో మార్పు కనిపిస్తోంది. ముందు {frm}, ఇప్పుడు {to}. {to} సరేనా? (అవును/కాదు)")
-        elif field == "occupation":
-            parts.append(f"మీ వృత్తి విషయంలో మార్పు కనిపిస్తోంది. ముందు {frm}, ఇప్పుడు {to}. {to} సరేనా? (అవును/కాదు)")
-        elif field == "state":
-            parts.append(f"మీ రాష్ట్రం విషయంలో మార్పు కనిపిస్తోంది. ముందు {frm}, ఇప్పుడు {to}. మీ అసలు రాష్ట్రం {to}నా? (అవును/కాదు)")
+        if field in {"age", "income", "occupation", "state"}:
+            parts.append(msg(language, f"conflict.{field}", before=frm, after=to))
         else:
-            parts.append(f"{field} విషయంలో మార్పు కనిపిస్తోంది. ముందు {frm}, ఇప్పుడు {to}. {to} సరేనా? (అవును/కాదు)")
-    return " ".join([p for p in parts if p]) or "కొన్ని వివరాల్లో మార్పు కనిపిస్తోంది. దయచేసి నిర్ధారించండి."
+            parts.append(msg(language, "conflict.other", field=field, before=frm, after=to))
+    return " ".join([p for p in parts if p]) or msg(language, "conflict.generic")
+
+
+def _scheme_identification_llm_args(user_text: str, variant: Optional[str]) -> Dict[str, Any]:
+    """llm_complete arguments for scheme identification (shared with partial-transcript prefetch)"""
+    return {
+        "messages": get_prompt("scheme_identification").render(variant, user_text=user_text),
+        "text": user_text,
+        "user_state": variant,
+        "temperature": 0,
+        "max_tokens": 50,
+    }
 
 
 def _identify_scheme_from_text(user_text: str, user_state: Optional[str] = None) -> tuple[Optional[str], Optional[str]]:
@@ -184,47 +195,15 @@ def _identify_scheme_from_text(user_text: str, user_state: Optional[str] = None)
     if not user_text or len(user_text.strip()) < 3:
         return None, None
     
-    # Build scheme list for LLM context
-    scheme_list = []
-    states_to_check = [user_state] if user_state in ["AP", "TS"] else ["AP", "TS"]
-    
-    for state in states_to_check:
-        for scheme in _SCHEMES_MASTER.get(state, []):
-            scheme_id = scheme.get("scheme_id", "")
-            scheme_name = scheme.get("scheme_name_te", "")
-            if scheme_id and scheme_name:
-                scheme_list.append(f"{scheme_id}|{scheme_name}")
-    
-    if not scheme_list:
+    # Catalog listing is a cached static prefix (per data version and state)
+    shard = get_state_shard(user_state)
+    variant = user_state if shard else None
+    store = shard or get_catalog(None)
+    if not (store.by_state.get(variant) if variant else store.by_id):
         return None, None
-    
-    prompt = f"""User is asking about a government scheme in Telugu. Identify which scheme they are referring to.
-
-Available schemes (format: ID|Name):
-{chr(10).join(scheme_list[:120])}
-
-User text: "{user_text}"
 
-IMPORTANT:
-- User may have typos or ASR errors (e.g., "అమ్మఒడి" means "అమ్మ ఒడి")
-- Match based on phonetic similarity and meaning, not exact spelling
-- If user mentions a scheme name (even partially), return that scheme ID
-- If no scheme is mentioned, return "NONE"
-
-Return ONLY the scheme ID (e.g., AP_AMMA_VODI) or NONE."""
-    
     try:
-        response = client.chat.completions.create(
-            model="llama-3.1-8b-instant",
-            messages=[
-                {"role": "system", "content": "You identify scheme names from user queries. Return only the scheme ID or NONE."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0,
-            max_tokens=50
-        )
-        
-        raw_result = (response.choices[0].message.content or "").strip()
+        raw_result = llm_complete("scheme_identification", **_scheme_identification_llm_args(user_text, variant)).strip()
         result = raw_result.upper().replace(" ", "_")
 
         # If the model replies with an explanation (common failure mode), treat it as NONE.
@@ -239,7 +218,7 @@ Return ONLY the scheme ID (e.g., AP_AMMA_VODI) or NONE."""
             return None, None
         
         # Extract just the scheme ID if LLM added extra text
-        for sid in _SCHEME_NAME_TO_ID.values():
+        for sid in store.by_name.values():
             if sid in result:
                 result = sid
                 break
@@ -247,7 +226,7 @@ Return ONLY the scheme ID (e.g., AP_AMMA_VODI) or NONE."""
         print(f"[SCHEME_IDENTIFICATION] LLM raw: '{raw_result}' -> cleaned: '{result}'")
         
         # Find the scheme name for this ID
-        for nm, sid in _SCHEME_NAME_TO_ID.items():
+        for nm, sid in store.by_name.items():
             if sid == result:
                 print(f"[SCHEME_IDENTIFICATION] Matched by ID: {sid} / {nm}")
                 return sid, nm
@@ -255,7 +234,7 @@ Return ONLY the scheme ID (e.g., AP_AMMA_VODI) or NONE."""
         # If LLM returned a scheme NAME (common), map name -> id.
         # Also handle ASR space variants like "అమ్మఒడి" vs "అమ్మ ఒడి" by comparing compacted strings.
         raw_compact = "".join(raw_result.split())
-        for nm, sid in _SCHEME_NAME_TO_ID.items():
+        for nm, sid in store.by_name.items():
             if not nm:
                 continue
             nm_compact = "".join(nm.split())
@@ -278,7 +257,8 @@ def _match_scheme_from_text_deterministic(
 ) -> tuple[Optional[str], Optional[str]]:
     if not user_text:
         return None, None
-    if user_state not in ["AP", "TS"]:
+    shard = get_state_shard(user_state)
+    if shard is None:
         return None, None
 
     text = user_text.strip()
@@ -288,11 +268,8 @@ def _match_scheme_from_text_deterministic(
     compact = "".join(text.split())
     restrict_set = set(restrict_scheme_ids or []) if restrict_scheme_ids else None
 
-    for scheme in _SCHEMES_MASTER.get(user_state, []) or []:
-        sid = (scheme.get("scheme_id") or "").strip()
-        name_te = (scheme.get("scheme_name_te") or "").strip()
-        if not sid or not name_te:
-            continue
+    for sid in shard.by_state.get(user_state, []):
+        name_te = shard.by_id[sid]["scheme_name_te"]
         if restrict_set is not None and sid not in restrict_set:
             continue
 
@@ -304,113 +281,48 @@ def _match_scheme_from_text_deterministic(
 
 
 def _regex_fallback_extract(user_text: str) -> Dict[str, Any]:
-    """Enhanced regex extraction with better Telugu support"""
-    text_lower = user_text.lower()
-    slots: Dict[str, Any] = {}
-    
-    # CRITICAL: Age extraction with validation
-    age_patterns = [
-        r"వయసు\s*(\d+)",
-        r"age\s*(\d+)",
-        r"(\d+)\s*సంవత్సరాలు",
-        r"(\d+)\s*years",
-        r"(\d+)\s*ఏళ్ళు",
-        r"(\d+)\s*సంవత్సర",
-        r"(\d+)\s*ఏళ్ల"
-    ]
-    for pattern in age_patterns:
-        match = re.search(pattern, user_text)
-        if match:
-            age_val = int(match.group(1))
-            # FIXED: Validate age range (5 years is clearly wrong for pension!)
-            if 10 <= age_val <= 120:  # Reasonable age range
-                slots["age"] = age_val
-                break
-    
-    # Enhanced income extraction
-    income_patterns = [
-        (r"(\d+)\s*లక్ష", lambda x: int(x) * 100000),
-        (r"(\d+)\s*lakh", lambda x: int(x) * 100000),
-        (r"ఆదాయం\s*(\d+)", lambda x: int(x)),
-        (r"income\s*(\d+)", lambda x: int(x)),
-        (r"(\d+)\s*రూపాయలు", lambda x: int(x)),
-    ]
-    for pattern, converter in income_patterns:
-        match = re.search(pattern, user_text)
-        if match:
-            slots["income"] = converter(match.group(1))
-            break
-    
-    # Enhanced state extraction with space variants
-    if any(x in user_text for x in ["తెలంగాణ", "తెలంగాణా", "తెలగాణ"]) or "telangana" in text_lower:
-        slots["state"] = "TS"
-    elif any(x in user_text for x in ["ఆంధ్రప్రదేశ్", "ఆంధ్రప్రదేశ", "ఆంధ్ర", "ఆంధ్రా", "ఆంధ్ర ప్రదేశ్"]) or "andhra" in text_lower:
-        slots["state"] = "AP"
-    
-    # Enhanced occupation extraction
-    occupation_map = {
-        "రైతు": "farmer",
-        "farmer": "farmer",
-        "కూలీ": "laborer",
-        "laborer": "laborer",
-        "లేబరర్": "laborer",
-        "ఉద్యోగి": "employee",
-        "employee": "employee",
-        "వేవర్": "weaver",
-        "weaver": "weaver",
-        "నేత": "weaver",
-        "నేతకారుడు": "weaver",
-        "డ్రైవర్": "driver",
-        "driver": "driver",
-        "మత్స్యకారుడు": "fisherman",
-        "fisherman": "fisherman",
-        "ఇస్త్రీ": "iron_worker",
-        "ఇస్త్రీవాడు": "iron_worker",
-    }
-    for token, occ in occupation_map.items():
-        if token in user_text or token in text_lower:
-            slots["occupation"] = occ
-            break
-    
-    # Gender extraction
-    if any(word in user_text for word in ["స్త్రీ", "ఆడ", "మహిళ", "female"]):
-        slots["gender"] = "female"
-    elif any(word in user_text for word in ["పురుషుడు", "మగ", "పురుష", "male"]):
-        slots["gender"] = "male"
-    
-    return slots
+    """Deterministic single-pass slot extraction (see tools/slot_extractor.py)"""
+    return extract_slots(user_text)
 
 
-def intent_detection_node(state: AgentState) -> AgentState:
-    user_text = state["user_text"]
+_FOLLOWUP_SELECTION_STATES = {"choose_scheme_from_eligibility", "scheme_details"}
+_GREETINGS = ["నమస్కారం", "హలో", "హాయ్", "hello", "hi", "హాయ్!", "హలో!"]
 
-    pending_followup = state.get("pending_followup")
-    short_yes = _is_affirmative_followup(user_text)
-    is_number_choice = bool(re.search(r"\b(\d{1,2})\b", user_text or ""))
 
-    # Follow-up flows are interruptible: only force follow-up routing when the user
-    # gives a short follow-up/selection. Otherwise, treat it as a new query.
-    if pending_followup in {"choose_scheme_from_eligibility", "scheme_details"}:
-        if short_yes or is_number_choice:
-            state["intent"] = "eligibility_check"
-            return state
-        state["pending_followup"] = None
+def _is_followup_selection(user_text: str) -> bool:
+    return _is_affirmative_followup(user_text) or bool(re.search(r"\b(\d{1,2})\b", user_text or ""))
+
+
+def _search_topic_terms(user_text: str, user_state: Optional[str]) -> List[str]:
+    """Search terms left in the text once profile words (slot values, filler) are removed"""
+    residue = unmatched_text(user_text)
+    if not residue:
+        return []
+    return get_search_index(user_state if is_known_state(user_state) else None).topic_terms(residue)
+
+
+def _turn_state(state: AgentState, user_text: str) -> Optional[str]:
+    """State of the profile, else one named in this utterance (None keeps the merged catalog)"""
+    return (state.get("slots") or {}).get("state") or extract_slots(user_text).get("state")
+
+
+def _deterministic_intent(state: AgentState, user_text: str) -> Optional[str]:
+    """Intent from follow-up state and keyword overrides, or None if the classifier/LLM must decide"""
+    pending_followup = state.get("pending_followup")
+    if pending_followup in _FOLLOWUP_SELECTION_STATES and _is_followup_selection(user_text):
+        return "eligibility_check"
 
     # Sticky follow-up: if we were collecting missing fields for eligibility, keep routing to eligibility
-    if state.get("pending_followup") == "eligibility_clarification":
-        state["intent"] = "eligibility_check"
-        return state
+    if pending_followup == "eligibility_clarification":
+        return "eligibility_check"
     
     # Deterministic greeting override
-    short = user_text.strip()
-    if short in ["నమస్కారం", "హలో", "హాయ్", "hello", "hi", "హాయ్!", "హలో!"]:
-        state["intent"] = "greeting"
-        return state
+    if user_text.strip() in _GREETINGS:
+        return "greeting"
     
     # Deterministic pension eligibility override
     if "పెన్షన్" in user_text and any(x in user_text for x in ["వస్తుందా", "వస్తుందా?", "అర్హ", "అర్హత", "eligible", "వస్తుందా రాదా", "నాకు పెన్షన్", "రాదా"]):
-        state["intent"] = "eligibility_check"
-        return state
+        return "eligibility_check"
     
     # Deterministic scheme eligibility override
     scheme_elig_words = [
@@ -427,60 +339,65 @@ def intent_detection_node(state: AgentState) -> AgentState:
         "ఎలిజిబిలిటీ",
     ]
     if any(w in user_text for w in scheme_elig_words):
-        for scheme_name in _SCHEME_NAME_TO_ID.keys():
+        catalog = get_catalog(_turn_state(state, user_text))
+        for scheme_name in catalog.by_name:
             if scheme_name and scheme_name in user_text:
-                state["intent"] = "eligibility_check"
-                return state
-    
-    prompt = f"""Classify the user's Telugu/English message into exactly one intent.
-
-Allowed intents:
-- greeting: short greeting only ("నమస్కారం")
-- time_query: asking current time ("టైమ్ ఎంత", "ఇప్పుడు సమయం ఎంత")
-- name_query: asking their saved profile name ("నా పేరు ఏమిటి")
-- scheme_list: asking list of govt schemes for a state ("ఆంధ్రప్రదేశ్ లో ఏమేమి పథకాలు ఉన్నాయి")
-- scheme_info: asking details about a specific scheme ("అమ్మ ఒడి గురించి చెప్పండి")
-- scheme_criteria: asking eligibility criteria/requirements of a scheme ("అమ్మ ఒడి రావాలి అంటే పిల్లలకు ఎంత వయసు")
-- scheme_search: wants schemes based on their profile but not explicitly asking eligible/not-eligible
-- eligibility_check: explicitly wants eligible/not eligible ("నాకు వస్తుందా", "నేను అర్హుడానా")
-- apply: wants to apply or asks application steps
-- unknown: unclear
-
-User text: {user_text}
-
-Return ONLY one of:
-greeting, time_query, name_query, scheme_list, scheme_info, scheme_criteria, scheme_search, eligibility_check, apply, unknown"""
+                return "eligibility_check"
+    return None
+
+
+def _intent_llm_args(state: AgentState, user_text: str) -> Dict[str, Any]:
+    """llm_complete arguments for intent classification (shared with partial-transcript prefetch)"""
+    messages = get_prompt("intent").render(
+        context=build_prompt_context(state) or "(new conversation)",
+        user_text=user_text,
+    )
+    return {"messages": messages, "text": user_text, "user_state": _turn_state(state, user_text), "temperature": 0}
+
+
+def intent_detection_node(state: AgentState) -> AgentState:
+    user_text = state["user_text"]
+
+    # Follow-up flows are interruptible: only force follow-up routing when the user
+    # gives a short follow-up/selection. Otherwise, treat it as a new query.
+    if state.get("pending_followup") in _FOLLOWUP_SELECTION_STATES and not _is_followup_selection(user_text):
+        state["pending_followup"] = None
+
+    intent = _deterministic_intent(state, user_text)
+    if intent:
+        state["intent"] = intent
+        state["intent_source"] = "override"
+        return state
     
+    # Trained classifier first; only low-confidence utterances go to the LLM.
+    model_intent, confidence = predict_intent(user_text)
+    if model_intent in FINAL_INTENTS and confidence >= INTENT_MODEL_MIN_CONFIDENCE:
+        metrics.incr("intent_model.accepted")
+        print(f"[INTENT] Classifier: {model_intent} ({confidence:.2f})")
+        state["intent"] = model_intent
+        state["intent_source"] = "classifier"
+        return state
+    if model_intent is not None:
+        metrics.incr("intent_model.llm_fallback")
+
+    source = "llm"
     try:
-        response = client.chat.completions.create(
-            model="llama-3.1-8b-instant",
-            messages=[
-                {"role": "system", "content": "You are an intent classifier. Return only the intent name."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0
-        )
-        intent = response.choices[0].message.content.strip().lower()
+        intent = llm_complete("intent", **_intent_llm_args(state, user_text)).strip().lower()
         
         if intent not in FINAL_INTENTS:
-            intent = "unknown"
+            intent, source = "unknown", "fallback"
             
     except Exception as e:
         print(f"Intent detection error: {e}")
-        intent = "unknown"
+        intent, source = "unknown", "fallback"
     
     state["intent"] = intent
+    state["intent_source"] = source
     return state
 
 
 def _sanitize_user_text(text: str) -> str:
-    if not text:
-        return ""
-    t = str(text)
-    t = re.sub(r"\([^)]*\d{1,3}%[^)]*\)", " ", t)
-    t = t.replace("🎤", " ").replace("🔊", " ").replace("⏹️", " ")
-    t = re.sub(r"\s+", " ", t).strip()
-    return t
+    return sanitize_text(text)
 
 
 def input_node(state: AgentState) -> AgentState:
@@ -493,51 +410,29 @@ def input_node(state: AgentState) -> AgentState:
     state["_extracted_slots"] = {}
     
     history.append({"role": "user", "content": user_text})
-    state["history"] = history[-20:]
+    state["history"] = history
     state["iteration_count"] = state.get("iteration_count", 0) + 1
     return state
 
 
-def slot_extraction_node(state: AgentState) -> AgentState:
-    user_text = _sanitize_user_text(state.get("user_text", ""))
-    state["user_text"] = user_text
-    current_slots = (state.get("slots") or {}).copy()
+def _slot_llm_args(user_text: str, current_slots: Dict[str, Any]) -> Dict[str, Any]:
+    """llm_complete arguments for slot extraction (shared with partial-transcript prefetch)"""
+    messages = get_prompt("slot_extraction").render(current_slots=current_slots, user_text=user_text)
+    return {"messages": messages, "text": user_text, "temperature": 0, "max_tokens": 256}
 
+
+def _llm_extract_slots(user_text: str, current_slots: Dict[str, Any]) -> Dict[str, Any]:
     llm_slots: Dict[str, Any] = {}
     try:
-        prompt = f"""Extract user profile information from Telugu/English text.
-
-Return ONLY a single JSON object (no markdown, no explanation).
-
-Fields you may extract if mentioned:
-state, age, gender, occupation, income, family_size, land_owner, disability, caste, religion, has_children, pregnant, location.
-
-Normalization rules:
-- state: తెలంగాణ/తెలంగాణా -> TS, ఆంధ్రప్రదేశ్/ఆంధ్ర/ఆంధ్రప్రదేశ/ఆంధ్ర ప్రదేశ్ -> AP
-- occupation: రైతు->farmer, కూలీ->laborer, ఉద్యోగి->employee, వేవర్/నేత->weaver, డ్రైవర్->driver, మత్స్యకారుడు->fisherman
-- age: integer only (must be between 10-120)
-- income: integer rupees ("లక్ష" => 100000)
-
-Current stored profile: {current_slots}
-User text: {user_text}
-"""
-
-        resp = client.chat.completions.create(
-            model="llama-3.1-8b-instant",
-            messages=[
-                {"role": "system", "content": "You extract structured data and output ONLY valid JSON. Follow normalization rules strictly."},
-                {"role": "user", "content": prompt},
-            ],
-            temperature=0,
-            max_tokens=256,
-        )
-        raw = resp.choices[0].message.content or ""
+        raw = llm_complete("slot_extraction", **_slot_llm_args(user_text, current_slots))
         llm_slots = _parse_json_lenient(raw)
     except Exception as e:
         print(f"Slot extraction LLM error: {e}")
+    return llm_slots
 
-    regex_slots = _regex_fallback_extract(user_text)
 
+def _merge_extracted_slots(llm_slots: Any, regex_slots: Dict[str, Any]) -> Dict[str, Any]:
+    """Combine LLM and deterministic slots (deterministic wins for critical fields) and normalize"""
     new_slots: Dict[str, Any] = {}
     if isinstance(llm_slots, dict):
         for k, v in llm_slots.items():
@@ -559,7 +454,23 @@ User text: {user_text}
         age_val = normalized.get("age")
         if isinstance(age_val, int) and not (10 <= age_val <= 120):
             normalized.pop("age", None)
+    return normalized
+
+
+def slot_extraction_node(state: AgentState) -> AgentState:
+    user_text = _sanitize_user_text(state.get("user_text", ""))
+    state["user_text"] = user_text
+    current_slots = (state.get("slots") or {}).copy()
+
+    regex_slots, fully_covered = extract_slots_with_coverage(user_text)
+    if fully_covered:
+        # Every word was a slot value or filler, so the LLM has nothing more to add.
+        print(f"[SLOT_EXTRACTION] Deterministic extraction covered the utterance: {regex_slots}")
+        llm_slots: Dict[str, Any] = {}
+    else:
+        llm_slots = _llm_extract_slots(user_text, current_slots)
 
+    normalized = _merge_extracted_slots(llm_slots, regex_slots)
     state["_extracted_slots"] = normalized
 
     critical_keys = ["state", "age", "income", "occupation", "gender"]
@@ -585,7 +496,7 @@ User text: {user_text}
         state["last_referenced_scheme_id"] = None
         state["last_referenced_scheme_name"] = None
 
-        state["response"] = _conflict_prompt_te(conflicts)
+        state["response"] = _conflict_prompt(conflicts, state.get("language"))
         state["next_action"] = "end"
 
         if "state" in conflicts:
@@ -628,8 +539,10 @@ def intent_slot_extraction_node(state: AgentState) -> AgentState:
         state["pending_updates"] = {}
         state["pending_conflicts"] = {}
         state["needs_confirmation"] = False
-        state["response"] = "సరే, మీ సమాచారాన్ని అప్డేట్ చేశాను."
+        state["response"] = msg(state.get("language"), "conflict.updated")
         state["next_action"] = "end"
+        # The intent is last turn's; nothing new to learn from this utterance
+        state["intent_source"] = None
         return state
 
     state = intent_detection_node(state)
@@ -652,7 +565,7 @@ def planner_node(state: AgentState) -> AgentState:
         return state
     
     if intent == "greeting":
-        state["response"] = "నమస్కారం! నేను ప్రభుత్వ పథకాల సహాయకుడిని. మీకు ఏ విధంగా సహాయం చేయాలి? (ఉదా: పథకాల వివరాలు / అర్హత చెక్)"
+        state["response"] = msg(state.get("language"), "greeting")
         state["next_action"] = "end"
         return state
     
@@ -681,6 +594,11 @@ def planner_node(state: AgentState) -> AgentState:
     if intent == "scheme_search" and not slots:
         state["next_action"] = "knowledge"
         return state
+
+    # A topic beyond the profile ("వికలాంగులకు ఏ పథకాలు ఉన్నాయి") is answered from the search index
+    if intent == "scheme_search" and _search_topic_terms(user_text, slots.get("state")):
+        state["next_action"] = "knowledge"
+        return state
     
     if intent in ["eligibility_check", "apply"] and not slots:
         state["next_action"] = "clarification"
@@ -700,14 +618,14 @@ def clarification_node(state: AgentState) -> AgentState:
     next_slot = missing[0] if missing else None
     state["last_question_slot"] = next_slot
     state["pending_followup"] = "eligibility_clarification"
-    q = _next_question_for_missing(missing) if missing else "మీ అర్హత చెక్ చేయడానికి మీ వయసు లేదా వృత్తి లేదా ఆదాయం వివరాలు చెప్పగలరా?"
+    language = state.get("language") or DEFAULT_LANGUAGE
+    q = _next_question_for_missing(missing, language) if missing else msg(language, "ask.profile")
     state["response"] = q
     return state
 
 
-def eligibility_check_node(state: AgentState) -> AgentState:
-    slots = state.get("slots", {})
-
+def _eligibility_profile(slots: Dict[str, Any]) -> Dict[str, Any]:
+    """check_eligibility profile from the session slots"""
     profile: Dict[str, Any] = {}
     if "age" in slots and slots["age"] is not None:
         try:
@@ -735,7 +653,11 @@ def eligibility_check_node(state: AgentState) -> AgentState:
     ]:
         if key in slots and slots[key] is not None:
             profile[key] = slots[key]
+    return profile
 
+
+def eligibility_check_node(state: AgentState) -> AgentState:
+    profile = _eligibility_profile(state.get("slots", {}))
     print(f"[ELIGIBILITY_CHECK] Profile: {profile}")
     eligible = check_eligibility(profile)
     state["eligible_schemes"] = eligible
@@ -764,7 +686,8 @@ def correction_handler_node(state: AgentState) -> AgentState:
         if last_slot in slots:
             slots[last_slot] = None
             state["slots"] = slots
-            state["response"] = "సరే, మీరు చెప్పినది సరిచేస్తాను. " + _next_question_for_missing([last_slot])
+            language = state.get("language") or DEFAULT_LANGUAGE
+            state["response"] = msg(language, "correction.retry", question=_next_question_for_missing([last_slot], language))
             state["next_action"] = "end"
             return state
     return state
@@ -773,78 +696,67 @@ def correction_handler_node(state: AgentState) -> AgentState:
 def knowledge_answer_node(state: AgentState) -> AgentState:
     slots = state.get("slots", {})
     user_text = state.get("user_text", "")
+    language = state.get("language") or DEFAULT_LANGUAGE
 
     if state.get("intent") == "scheme_list":
         user_state = slots.get("state")
-        if user_state not in ["AP", "TS"]:
+        if not is_known_state(user_state):
             state["last_question_slot"] = "state"
             state["pending_followup"] = "eligibility_clarification"
-            state["response"] = "మీరు ఏ రాష్ట్రానికి చెందినవారు? తెలంగాణా లేదా ఆంధ్రప్రదేశ్?"
+            state["response"] = msg(language, "ask.state")
             return state
 
-        schemes = _SCHEMES_MASTER.get(user_state, [])
-        scheme_names = [s.get("scheme_name_te") for s in schemes[:12]]
-        scheme_names = [n for n in scheme_names if n]
+        shard = get_state_shard(user_state)
+        scheme_names = [localized(shard.by_id[sid], "scheme_name", language) for sid in shard.by_state.get(user_state, [])[:12]]
 
-        response_lines = [f"{user_state} రాష్ట్రంలో అందుబాటులో ఉన్న కొన్ని ముఖ్యమైన పథకాలు:"]
-        for i, name in enumerate(scheme_names[:10], start=1):
-            response_lines.append(f"{i}. {name}")
-        response_lines.append("\nమీకు ఏ పథకం గురించి వివరంగా తెలుసుకోవాలి?")
+        response_lines = [msg(language, "list.state_schemes", state=state_name(user_state, language))]
+        response_lines += _numbered(scheme_names[:10], language)
+        response_lines.append("\n" + msg(language, "ask.which_scheme"))
         state["response"] = "\n".join(response_lines)
         return state
 
     pending_followup = state.get("pending_followup")
     last_scheme_id = state.get("last_referenced_scheme_id")
-    last_scheme_name = state.get("last_referenced_scheme_name")
     short_yes = _is_affirmative_followup(user_text)
 
     asked_scheme_id, asked_scheme_name = _match_scheme_from_text_deterministic(user_text, slots.get("state"))
+
+    # Free-text questions ("వికలాంగులకు ఏ పథకాలు ఉన్నాయి") are answered from the local search index.
+    if not asked_scheme_id and state.get("intent") in {"scheme_search", "unknown"} and not short_yes:
+        search_state = slots.get("state") if is_known_state(slots.get("state")) else None
+        ranked = search_schemes(user_text, state=search_state, top_k=8)
+        print(f"[KNOWLEDGE_NODE] Search results: {[(r['scheme_id'], r['score']) for r in ranked]}")
+        if len(ranked) == 1:
+            asked_scheme_id, asked_scheme_name = ranked[0]["scheme_id"], ranked[0]["scheme_name"]
+        elif ranked:
+            names = [_scheme_name(r["scheme_id"], language, r["scheme_name"]) for r in ranked]
+            response_lines = [msg(language, "list.search_results")]
+            for i, (r, name) in enumerate(zip(ranked, names), start=1):
+                if search_state:
+                    response_lines.append(msg(language, "list.item", n=i, name=name))
+                else:
+                    response_lines.append(msg(language, "list.item_with_state", n=i, name=name, state=r["state"]))
+            response_lines.append(msg(language, "ask.which_scheme"))
+            state["response"] = "\n".join(response_lines)
+            state["last_presented_eligible_scheme_ids"] = [r["scheme_id"] for r in ranked]
+            state["last_presented_eligible_scheme_names"] = names
+            state["pending_followup"] = "choose_scheme_from_eligibility"
+            return state
+
     if not asked_scheme_id:
         asked_scheme_id, asked_scheme_name = _identify_scheme_from_text(user_text, slots.get("state"))
     print(f"[KNOWLEDGE_NODE] Identified scheme: {asked_scheme_id} / {asked_scheme_name}")
 
     if asked_scheme_id:
         state["pending_followup"] = None
-        details = get_scheme_details(asked_scheme_id)
-        benefits = details.get("benefits", [])
-        eligibility_text = details.get("eligibility") or ""
-        docs = details.get("documents_required", [])
-        offline = details.get("application_process", {}).get("offline", [])
-        response_lines: List[str] = []
-        response_lines.append(f"'{details.get('scheme_name', asked_scheme_name)}' పథకం వివరాలు:")
-        if eligibility_text:
-            response_lines.append(f"అర్హత: {eligibility_text}")
-        if benefits:
-            response_lines.append("లాభాలు:")
-            for b in benefits[:5]:
-                response_lines.append(f"- {b}")
-        if docs:
-            response_lines.append("కావాల్సిన పత్రాలు:")
-            for d in docs[:6]:
-                response_lines.append(f"- {d}")
-        if offline:
-            response_lines.append("దరఖాస్తు విధానం (ఆఫ్‌లైన్):")
-            for step in offline[:5]:
-                response_lines.append(f"- {step}")
-        state["response"] = "\n".join(response_lines)
+        state["response"] = _scheme_detail_text(asked_scheme_id, "full", asked_scheme_name, language)
         state["last_referenced_scheme_id"] = asked_scheme_id
-        state["last_referenced_scheme_name"] = details.get("scheme_name", asked_scheme_name)
+        state["last_referenced_scheme_name"] = _scheme_name(asked_scheme_id, language, asked_scheme_name)
         state["pending_followup"] = "scheme_details"
         return state
 
     if pending_followup == "scheme_details" and short_yes and last_scheme_id:
-        details = get_scheme_details(last_scheme_id)
-        docs = details.get("documents_required", [])
-        offline = details.get("application_process", {}).get("offline", [])
-        response_lines = [f"'{last_scheme_name or details.get('scheme_name', '')}' కోసం కావాల్సిన పత్రాలు:"]
-        for d in docs[:8]:
-            response_lines.append(f"- {d}")
-        if offline:
-            response_lines.append("")
-            response_lines.append("దరఖాస్తు విధానం (ఆఫ్‌లైన్):")
-            for step in offline[:6]:
-                response_lines.append(f"- {step}")
-        state["response"] = "\n".join([x for x in response_lines if x is not None and x != ""]) or "దయచేసి మీ ప్రశ్నను మళ్లీ చెప్పండి."
+        state["response"] = render_scheme_detail(last_scheme_id, "documents", language) or msg(language, "ask.repeat")
         state["pending_followup"] = None
         return state
 
@@ -852,22 +764,20 @@ def knowledge_answer_node(state: AgentState) -> AgentState:
     if user_state in [None, ""]:
         state["last_question_slot"] = "state"
         state["pending_followup"] = "eligibility_clarification"
-        state["response"] = "మీరు ఏ రాష్ట్రానికి చెందినవారు? తెలంగాణా లేదా ఆంధ్రప్రదేశ్?"
+        state["response"] = msg(language, "ask.state")
         return state
 
     if any(k in user_text for k in ["పథకాలు", "schemes", "లిస్ట్", "జాబితా", "ఏవి"]):
-        if user_state in ["AP", "TS"]:
-            schemes = _SCHEMES_MASTER.get(user_state, [])
-            scheme_names = [s.get("scheme_name_te") for s in schemes[:10]]
-            scheme_names = [n for n in scheme_names if n]
-            response_lines = [f"{user_state} రాష్ట్రంలో అందుబాటులో ఉన్న కొన్ని ముఖ్యమైన పథకాలు:"]
-            for i, name in enumerate(scheme_names[:8], start=1):
-                response_lines.append(f"{i}. {name}")
-            response_lines.append("\nమీకు ఏ పథకం గురించి వివరంగా తెలుసుకోవాలి?")
+        shard = get_state_shard(user_state)
+        if shard is not None:
+            scheme_names = [localized(shard.by_id[sid], "scheme_name", language) for sid in shard.by_state.get(user_state, [])[:10]]
+            response_lines = [msg(language, "list.state_schemes", state=state_name(user_state, language))]
+            response_lines += _numbered(scheme_names[:8], language)
+            response_lines.append("\n" + msg(language, "ask.which_scheme"))
             state["response"] = "\n".join(response_lines)
             return state
 
-    state["response"] = "దయచేసి మీ ప్రశ్నను మరొక విధంగా చెప్పండి (ఉదా: పథకం పేరు/అర్హత చెక్/దరఖాస్తు విధానం)."
+    state["response"] = msg(language, "ask.rephrase")
     return state
 
 
@@ -876,25 +786,25 @@ def response_generation_node(state: AgentState) -> AgentState:
     slots = state.get("slots", {})
     eligible_schemes = state.get("eligible_schemes", [])
     user_text = state.get("user_text", "")
+    language = state.get("language") or DEFAULT_LANGUAGE
 
     pending_followup = state.get("pending_followup")
     last_scheme_id = state.get("last_referenced_scheme_id")
-    last_scheme_name = state.get("last_referenced_scheme_name")
     short_yes = _is_affirmative_followup(user_text)
 
     user_state = slots.get("state")
 
     if intent == "time_query":
         now = datetime.now().strftime("%H:%M")
-        state["response"] = f"ఇప్పుడు సమయం {now}."
+        state["response"] = msg(language, "time.now", time=now)
         return state
 
     if intent == "name_query":
         name_val = (slots.get("name") or "").strip() if isinstance(slots.get("name"), str) else None
         if not name_val:
-            state["response"] = "మీ పేరు నాకు ఇప్పటివరకు తెలియదు. దయచేసి మీ పేరు చెప్పండి."
+            state["response"] = msg(language, "profile.name_unknown")
             return state
-        state["response"] = f"మీ పేరు {name_val}."
+        state["response"] = msg(language, "profile.name", name=name_val)
         return state
 
     # Direct profile question: age (avoid hijacking children-age questions)
@@ -905,9 +815,9 @@ def response_generation_node(state: AgentState) -> AgentState:
         if age_val in [None, ""]:
             state["last_question_slot"] = "age"
             state["pending_followup"] = "eligibility_clarification"
-            state["response"] = "మీ వయసు ఎంత?"
+            state["response"] = msg(language, "ask.age")
             return state
-        state["response"] = f"మీ వయసు {age_val} సంవత్సరాలు."
+        state["response"] = msg(language, "profile.age", age=age_val)
         return state
 
     # Direct profile question: state
@@ -918,15 +828,9 @@ def response_generation_node(state: AgentState) -> AgentState:
         if st_val in [None, ""]:
             state["last_question_slot"] = "state"
             state["pending_followup"] = "eligibility_clarification"
-            state["response"] = "మీరు ఏ రాష్ట్రానికి చెందినవారు? తెలంగాణా లేదా ఆంధ్రప్రదేశ్?"
-            return state
-        if st_val == "TS":
-            state["response"] = "మీ రాష్ట్రం తెలంగాణ."
-            return state
-        if st_val == "AP":
-            state["response"] = "మీ రాష్ట్రం ఆంధ్రప్రదేశ్."
+            state["response"] = msg(language, "ask.state")
             return state
-        state["response"] = f"మీ రాష్ట్రం {st_val}."
+        state["response"] = msg(language, "profile.state", state=state_name(st_val, language))
         return state
 
     # If user asks scheme criteria (requirements) like child-age, answer from scheme details.
@@ -937,18 +841,15 @@ def response_generation_node(state: AgentState) -> AgentState:
         if not crit_scheme_id:
             crit_scheme_id, crit_scheme_name = _identify_scheme_from_text(user_text, user_state)
         if crit_scheme_id:
-            details = get_scheme_details(crit_scheme_id)
-            eligibility_text = (details.get("eligibility") or "").strip()
-            if eligibility_text:
-                state["response"] = f"'{details.get('scheme_name', crit_scheme_name)}' పథకం అర్హత: {eligibility_text}"
-            else:
-                state["response"] = f"'{details.get('scheme_name', crit_scheme_name)}' పథకం అర్హత వివరాలు ప్రస్తుతం అందుబాటులో లేవు."
+            state["response"] = render_scheme_detail(crit_scheme_id, "criteria", language) or msg(
+                language, "details.criteria_unavailable", name=crit_scheme_name
+            )
             state["last_referenced_scheme_id"] = crit_scheme_id
-            state["last_referenced_scheme_name"] = details.get("scheme_name", crit_scheme_name)
+            state["last_referenced_scheme_name"] = _scheme_name(crit_scheme_id, language, crit_scheme_name)
             state["pending_followup"] = "scheme_details"
             return state
 
-        state["response"] = "మీరు ఏ పథకం అర్హత గురించి అడుగుతున్నారు? (ఉదా: అమ్మ ఒడి / పెన్షన్ కానుక)"
+        state["response"] = msg(language, "ask.which_scheme_criteria")
         return state
 
     # If we just asked the user to choose one scheme from the eligible list, handle that here.
@@ -958,9 +859,7 @@ def response_generation_node(state: AgentState) -> AgentState:
         # If the user only says "తెలుసుకోవాలి/కావాలి" again, prompt them to pick a specific scheme.
         if short_yes:
             if presented_names:
-                lines = ["దయచేసి ఏ పథకం గురించి వివరాలు కావాలో చెప్పండి (పేరు లేదా నంబర్)."]
-                for i, nm in enumerate(presented_names[:8], start=1):
-                    lines.append(f"{i}. {nm}")
+                lines = [msg(language, "ask.choose_scheme")] + _numbered(presented_names[:8], language)
                 state["response"] = "\n".join(lines)
                 return state
             state["pending_followup"] = None
@@ -972,20 +871,9 @@ def response_generation_node(state: AgentState) -> AgentState:
             if 0 <= idx < len(presented_ids):
                 chosen_id = presented_ids[idx]
                 chosen_name = presented_names[idx] if idx < len(presented_names) else None
-                details = get_scheme_details(chosen_id)
-                response_lines: List[str] = []
-                response_lines.append(f"'{details.get('scheme_name', chosen_name)}' పథకం వివరాలు:")
-                eligibility_text = details.get("eligibility") or ""
-                if eligibility_text:
-                    response_lines.append(f"అర్హత: {eligibility_text}")
-                benefits = details.get("benefits", [])
-                if benefits:
-                    response_lines.append("లాభాలు:")
-                    for b in benefits[:5]:
-                        response_lines.append(f"- {b}")
-                state["response"] = "\n".join(response_lines)
+                state["response"] = _scheme_detail_text(chosen_id, "summary", chosen_name, language)
                 state["last_referenced_scheme_id"] = chosen_id
-                state["last_referenced_scheme_name"] = details.get("scheme_name", chosen_name)
+                state["last_referenced_scheme_name"] = _scheme_name(chosen_id, language, chosen_name)
                 state["pending_followup"] = "scheme_details"
                 return state
 
@@ -996,27 +884,15 @@ def response_generation_node(state: AgentState) -> AgentState:
             restrict_scheme_ids=presented_ids,
         )
         if chosen_id:
-            details = get_scheme_details(chosen_id)
-            response_lines = [f"'{details.get('scheme_name', chosen_name)}' పథకం వివరాలు:"]
-            eligibility_text = details.get("eligibility") or ""
-            if eligibility_text:
-                response_lines.append(f"అర్హత: {eligibility_text}")
-            benefits = details.get("benefits", [])
-            if benefits:
-                response_lines.append("లాభాలు:")
-                for b in benefits[:5]:
-                    response_lines.append(f"- {b}")
-            state["response"] = "\n".join(response_lines)
+            state["response"] = _scheme_detail_text(chosen_id, "summary", chosen_name, language)
             state["last_referenced_scheme_id"] = chosen_id
-            state["last_referenced_scheme_name"] = details.get("scheme_name", chosen_name)
+            state["last_referenced_scheme_name"] = _scheme_name(chosen_id, language, chosen_name)
             state["pending_followup"] = "scheme_details"
             return state
 
         # If we couldn't resolve the choice, ask again.
         if presented_names:
-            lines = ["దయచేసి ఏ పథకం గురించి వివరాలు కావాలో చెప్పండి (పేరు లేదా నంబర్)."]
-            for i, nm in enumerate(presented_names[:8], start=1):
-                lines.append(f"{i}. {nm}")
+            lines = [msg(language, "ask.choose_scheme")] + _numbered(presented_names[:8], language)
             state["response"] = "\n".join(lines)
             return state
 
@@ -1026,9 +902,9 @@ def response_generation_node(state: AgentState) -> AgentState:
         if inc_val in [None, ""]:
             state["last_question_slot"] = "income"
             state["pending_followup"] = "eligibility_clarification"
-            state["response"] = "మీ వార్షిక ఆదాయం సుమారు ఎంత?"
+            state["response"] = msg(language, "ask.income")
             return state
-        state["response"] = f"మీ వార్షిక ఆదాయం సుమారు {inc_val} రూపాయలు."
+        state["response"] = msg(language, "profile.income", income=inc_val)
         return state
 
     # ============================================================
@@ -1044,10 +920,11 @@ def response_generation_node(state: AgentState) -> AgentState:
     if asked_scheme_id:
         # User explicitly asking eligibility for THIS scheme
         if intent == "eligibility_check":
+            name = _scheme_name(asked_scheme_id, language, asked_scheme_name)
             if asked_scheme_id in eligible_schemes:
-                state["response"] = f"అవును 👍 మీరు '{asked_scheme_name}' పథకానికి అర్హులు."
+                state["response"] = msg(language, "eligible.yes", name=name)
             else:
-                state["response"] = f"క్షమించాలి ❌ మీరు '{asked_scheme_name}' పథకానికి అర్హులు కారు."
+                state["response"] = msg(language, "eligible.no", name=name)
 
             state["last_referenced_scheme_id"] = asked_scheme_id
             state["last_referenced_scheme_name"] = asked_scheme_name
@@ -1055,20 +932,9 @@ def response_generation_node(state: AgentState) -> AgentState:
             return state
 
         # Otherwise user wants scheme info
-        details = get_scheme_details(asked_scheme_id)
-        response_lines: List[str] = []
-        response_lines.append(f"'{details.get('scheme_name', asked_scheme_name)}' పథకం వివరాలు:")
-        eligibility_text = details.get("eligibility") or ""
-        if eligibility_text:
-            response_lines.append(f"అర్హత: {eligibility_text}")
-        benefits = details.get("benefits", [])
-        if benefits:
-            response_lines.append("లాభాలు:")
-            for b in benefits[:5]:
-                response_lines.append(f"- {b}")
-        state["response"] = "\n".join(response_lines)
+        state["response"] = _scheme_detail_text(asked_scheme_id, "summary", asked_scheme_name, language)
         state["last_referenced_scheme_id"] = asked_scheme_id
-        state["last_referenced_scheme_name"] = details.get("scheme_name", asked_scheme_name)
+        state["last_referenced_scheme_name"] = _scheme_name(asked_scheme_id, language, asked_scheme_name)
         state["pending_followup"] = "scheme_details"
         return state
 
@@ -1076,20 +942,7 @@ def response_generation_node(state: AgentState) -> AgentState:
     # 🔁 Follow-up like "తెలుసుకోవాలి / కావాలి"
     # ============================================================
     if pending_followup == "scheme_details" and short_yes and last_scheme_id:
-        details = get_scheme_details(last_scheme_id)
-        docs = details.get("documents_required", [])
-        offline = details.get("application_process", {}).get("offline", [])
-
-        response_lines = [f"'{last_scheme_name or details.get('scheme_name', '')}' కోసం కావాల్సిన పత్రాలు:"]
-        for d in docs[:8]:
-            response_lines.append(f"- {d}")
-
-        if offline:
-            response_lines.append("\nదరఖాస్తు విధానం (ఆఫ్‌లైన్):")
-            for step in offline[:6]:
-                response_lines.append(f"- {step}")
-
-        state["response"] = "\n".join([x for x in response_lines if x is not None and x != ""]) or "దయచేసి మీ ప్రశ్నను మళ్లీ చెప్పండి."
+        state["response"] = render_scheme_detail(last_scheme_id, "documents", language) or msg(language, "ask.repeat")
         state["pending_followup"] = None
         return state
 
@@ -1099,7 +952,7 @@ def response_generation_node(state: AgentState) -> AgentState:
     if user_state in [None, ""]:
         state["last_question_slot"] = "state"
         state["pending_followup"] = "eligibility_clarification"
-        state["response"] = "మీరు ఏ రాష్ట్రానికి చెందినవారు? తెలంగాణా లేదా ఆంధ్రప్రదేశ్?"
+        state["response"] = msg(language, "ask.state")
         return state
 
     if intent in ["eligibility_check", "scheme_search", "apply"]:
@@ -1107,58 +960,44 @@ def response_generation_node(state: AgentState) -> AgentState:
         if missing:
             state["last_question_slot"] = missing[0]
             state["pending_followup"] = "eligibility_clarification"
-            state["response"] = _next_question_for_missing(missing)
+            state["response"] = _next_question_for_missing(missing, language)
             return state
 
     # ============================================================
     # ✅ FINAL FALLBACK:
     # Show eligible schemes ONLY if no scheme was asked
     # ============================================================
-    scheme_names = []
-    with open("data/schemes_master.json", encoding="utf-8") as f:
-        schemes_data = json.load(f)
-
-    if user_state in ["AP", "TS"]:
-        for scheme in schemes_data.get(user_state, []):
-            if scheme.get("scheme_id") in eligible_schemes:
-                scheme_names.append(scheme.get("scheme_name_te"))
-
-    scheme_names = [n for n in scheme_names if n]
+    # Resolve the whole result page in one batch (catalog order). Rendering the
+    # follow-up answers for the page is left to langgraph_prefetch, off the request path.
+    page_ids: List[str] = []
+    shard = get_state_shard(user_state)
+    if shard is not None:
+        page_ids = [sid for sid in shard.by_state.get(user_state, []) if sid in eligible_schemes]
+    page_details = get_scheme_details_many(page_ids, language)
+    page_ids = [sid for sid in page_ids if page_details[sid].get("scheme_name")]
+    scheme_names = [page_details[sid]["scheme_name"] for sid in page_ids]
 
     # If we have exactly one eligible scheme and user says a short affirmative follow-up,
     # treat it as asking details for that single scheme.
-    if scheme_names and len(scheme_names) == 1 and short_yes and eligible_schemes:
-        only_id = eligible_schemes[0]
-        details = get_scheme_details(only_id)
-        response_lines: List[str] = []
-        response_lines.append(f"'{details.get('scheme_name', scheme_names[0])}' పథకం వివరాలు:")
-        eligibility_text = details.get("eligibility") or ""
-        if eligibility_text:
-            response_lines.append(f"అర్హత: {eligibility_text}")
-        benefits = details.get("benefits", [])
-        if benefits:
-            response_lines.append("లాభాలు:")
-            for b in benefits[:5]:
-                response_lines.append(f"- {b}")
-        state["response"] = "\n".join(response_lines)
+    if scheme_names and len(scheme_names) == 1 and short_yes:
+        only_id = page_ids[0]
+        state["response"] = _scheme_detail_text(only_id, "summary", scheme_names[0], language)
         state["last_referenced_scheme_id"] = only_id
-        state["last_referenced_scheme_name"] = details.get("scheme_name", scheme_names[0])
+        state["last_referenced_scheme_name"] = scheme_names[0]
         state["pending_followup"] = "scheme_details"
         return state
 
     if intent in ["eligibility_check", "scheme_search"] and scheme_names:
-        response_lines = ["మీకు ఈ పథకాలు అర్హత ఉన్నాయి:"]
-        for i, name in enumerate(scheme_names[:8], start=1):
-            response_lines.append(f"{i}. {name}")
-        response_lines.append("మీకు ఏ పథకం గురించి వివరంగా తెలుసుకోవాలి?")
+        response_lines = [msg(language, "list.eligible")] + _numbered(scheme_names[:8], language)
+        response_lines.append(msg(language, "ask.which_scheme"))
 
         # Store presented ordering so the user can answer with a number or name.
-        state["last_presented_eligible_scheme_ids"] = list(eligible_schemes or [])
-        state["last_presented_eligible_scheme_names"] = list(scheme_names or [])
+        state["last_presented_eligible_scheme_ids"] = list(page_ids)
+        state["last_presented_eligible_scheme_names"] = list(scheme_names)
 
         # If exactly one scheme is eligible, store it so the next "తెలుసుకోవాలి" can work.
-        if len(scheme_names) == 1 and eligible_schemes:
-            state["last_referenced_scheme_id"] = eligible_schemes[0]
+        if len(scheme_names) == 1:
+            state["last_referenced_scheme_id"] = page_ids[0]
             state["last_referenced_scheme_name"] = scheme_names[0]
             state["pending_followup"] = "scheme_details"
         else:
@@ -1166,5 +1005,5 @@ def response_generation_node(state: AgentState) -> AgentState:
         state["response"] = "\n".join(response_lines)
         return state
 
-    state["response"] = "మీకు ఏ విధంగా సహాయం చేయాలి? (ఉదా: పథక వివరాలు / అర్హత చెక్)"
+    state["response"] = msg(language, "help")
     return state
@@ -0,0 +1,135 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+import metrics
+from message_catalog import DEFAULT_LANGUAGE
+from langgraph_nodes import _eligibility_profile
+from tools.eligibility_engine import check_eligibility
+from tools.scheme_content_store import get_state_shard
+from tools.scheme_details_tool import DETAIL_VIEWS, get_scheme_details_many, render_scheme_detail, render_scheme_details_many
+from tools.scheme_search import get_search_index
+from tools.state_registry import is_known_state
+
+# Predictive prefetch after a turn changes the user's profile.
+# Once the state (or occupation, age, ...) is known, the next turns almost always ask
+# for that state's scheme list, the eligible schemes or one of them in detail. When a
+# turn changes one of PREFETCH_SLOTS, the work those answers need is started on a
+# background pool while the user reads or listens to the reply:
+#   - the state's catalog shard and search index (loaded lazily otherwise)
+#   - the eligibility result for the new profile (tools/eligibility_engine cache)
+#   - the eligible result page and every view of the PREFETCH_DETAIL_PAGES likeliest
+#     schemes, rendered in the session's language (scheme_details_tool render cache)
+# The next turn is then answered from those caches. Nothing here touches the session.
+PREFETCH = os.getenv("PREFETCH", "1") == "1"
+PREFETCH_WORKERS = int(os.getenv("PREFETCH_WORKERS", "2"))
+PREFETCH_DETAIL_PAGES = int(os.getenv("PREFETCH_DETAIL_PAGES", "4"))
+PREFETCH_SLOTS = ("state", "occupation", "age", "income", "gender")
+# Profiles already warmed (per language); repeats are skipped
+_RECENT_MAX = 1024
+
+_lock = threading.Lock()
+_recent: "OrderedDict[tuple, float]" = OrderedDict()
+_pool: Optional[ThreadPoolExecutor] = None
+
+
+def _get_pool() -> ThreadPoolExecutor:
+    global _pool
+    if _pool is None:
+        with _lock:
+            if _pool is None:
+                _pool = ThreadPoolExecutor(max_workers=PREFETCH_WORKERS, thread_name_prefix="prefetch")
+    return _pool
+
+
+def changed_slots(previous_slots: Dict[str, Any], slots: Dict[str, Any]) -> List[str]:
+    """PREFETCH_SLOTS that a turn set or changed"""
+    return [
+        k for k in PREFETCH_SLOTS
+        if slots.get(k) not in (None, "") and slots.get(k) != (previous_slots or {}).get(k)
+    ]
+
+
+def on_slots_changed(previous_slots: Dict[str, Any], state: Dict[str, Any]) -> Optional[Future]:
+    """Start warming for the profile in `state` if this turn changed it; returns the task, if any"""
+    if not PREFETCH:
+        return None
+    slots = dict(state.get("slots") or {})
+    changed = changed_slots(previous_slots, slots)
+    user_state = slots.get("state")
+    # Everything warmed here is per state; without one the next turn asks for it first.
+    if not changed or not is_known_state(user_state):
+        return None
+
+    language = state.get("language") or DEFAULT_LANGUAGE
+    profile = _eligibility_profile(slots)
+    try:
+        key = (language, frozenset(profile.items()))
+    except TypeError:
+        return None
+    with _lock:
+        if key in _recent:
+            _recent.move_to_end(key)
+            metrics.incr("prefetch.skipped_repeat")
+            return None
+        _recent[key] = time.time()
+        while len(_recent) > _RECENT_MAX:
+            _recent.popitem(last=False)
+
+    metrics.incr("prefetch.submitted")
+    print(f"[PREFETCH] {','.join(changed)} changed; warming {user_state} ({language})")
+    return _get_pool().submit(_warm, user_state, profile, language)
+
+
+def likely_scheme_ids(user_state: str, profile: Dict[str, Any], eligible: List[str]) -> List[str]:
+    """
+    Schemes the next turn is likeliest to ask about: eligible ones first (catalog order),
+    then schemes for the user's occupation and age group that still need other details
+    """
+    shard = get_state_shard(user_state)
+    if shard is None:
+        return []
+    ordered = shard.by_state.get(user_state, [])
+    picks = [sid for sid in ordered if sid in eligible]
+    age = profile.get("age")
+    for sid in ordered:
+        rules = shard.rules_by_id.get(sid) or {}
+        if profile.get("occupation") and rules.get("occupation") == profile["occupation"]:
+            picks.append(sid)
+        elif age is not None and "age_min" in rules and age >= rules["age_min"]:
+            picks.append(sid)
+        elif age is not None and "age_range" in rules and rules["age_range"][0] <= age <= rules["age_range"][1]:
+            picks.append(sid)
+    return list(dict.fromkeys(picks))
+
+
+def _warm(user_state: str, profile: Dict[str, Any], language: str) -> Dict[str, Any]:
+    t0 = time.perf_counter()
+    try:
+        shard = get_state_shard(user_state)
+        if shard is None:
+            return {}
+        get_search_index(user_state)
+        eligible = check_eligibility(profile)
+
+        # The eligible result page, as response_generation_node renders it
+        page = [sid for sid in shard.by_state.get(user_state, []) if sid in eligible]
+        get_scheme_details_many(page, language)
+        render_scheme_details_many(page[:8], "summary", language)
+
+        details = likely_scheme_ids(user_state, profile, eligible)[:PREFETCH_DETAIL_PAGES]
+        for sid in details:
+            for view in DETAIL_VIEWS:
+                render_scheme_detail(sid, view, language)
+
+        ms = (time.perf_counter() - t0) * 1000
+        metrics.incr("prefetch.completed")
+        metrics.observe("prefetch.ms", ms)
+        print(f"[PREFETCH] {user_state}/{language}: {len(eligible)} eligible, details {details} in {ms:.1f} ms")
+        return {"eligible": eligible, "details": details, "ms": ms}
+    except Exception as e:
+        metrics.incr("prefetch.failed")
+        print(f"[PREFETCH] Failed for {user_state}: {e}")
+        return {}
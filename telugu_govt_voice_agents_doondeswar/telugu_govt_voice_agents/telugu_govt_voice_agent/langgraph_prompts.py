@@ -0,0 +1,207 @@
+import os
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+import metrics
+from langgraph_context import estimate_tokens
+from tools.scheme_content_store import get_catalog, resident_version
+
+# Every prompt is laid out as <static prefix><dynamic suffix>. The static prefix is
+# built once per (template version, data version, variant) and is byte-identical
+# across calls, so provider-side prefix caching can reuse it.
+# Pick template versions per name for A/B runs, e.g. PROMPT_VERSIONS="intent=1,scheme_identification=1".
+PROMPT_VERSIONS = os.getenv("PROMPT_VERSIONS", "")
+MAX_CATALOG_ENTRIES = 120
+
+
+class PromptTemplate:
+    def __init__(
+        self,
+        name: str,
+        version: str,
+        system: str,
+        static_builder: Callable[[Optional[str]], str],
+        dynamic: str,
+    ):
+        self.name = name
+        self.version = version
+        self.system = system
+        self.static_builder = static_builder
+        self.dynamic = dynamic
+
+    @property
+    def tag(self) -> str:
+        return f"{self.name}@{self.version}"
+
+    def static_prefix(self, variant: Optional[str] = None) -> str:
+        key = (self.tag, resident_version(), variant)
+        prefix = _STATIC_CACHE.get(key)
+        if prefix is None:
+            with _lock:
+                prefix = _STATIC_CACHE.get(key)
+                if prefix is None:
+                    # Drop prefixes built for an older data version of this template.
+                    for old in [k for k in _STATIC_CACHE if k[0] == self.tag and k[1] != key[1]]:
+                        del _STATIC_CACHE[old]
+                    prefix = self.static_builder(variant)
+                    _STATIC_CACHE[key] = prefix
+                    metrics.set_value(f"prompt_static_tokens.{self.tag}", estimate_tokens(self.system + prefix))
+        return prefix
+
+    def render(self, variant: Optional[str] = None, **fields) -> List[Dict[str, str]]:
+        """Chat messages for this template: fixed system message, then static prefix + dynamic part"""
+        user = self.static_prefix(variant) + self.dynamic.format(**fields)
+        metrics.incr(f"prompt_renders.{self.tag}")
+        metrics.observe(f"prompt_tokens.{self.tag}", estimate_tokens(self.system + user))
+        return [
+            {"role": "system", "content": self.system},
+            {"role": "user", "content": user},
+        ]
+
+
+_lock = threading.Lock()
+_STATIC_CACHE: Dict[Tuple[str, str, Optional[str]], str] = {}
+_TEMPLATES: Dict[str, Dict[str, PromptTemplate]] = {}
+_DEFAULT_VERSIONS: Dict[str, str] = {}
+
+
+def register_prompt(template: PromptTemplate, default: bool = True) -> None:
+    _TEMPLATES.setdefault(template.name, {})[template.version] = template
+    if default or template.name not in _DEFAULT_VERSIONS:
+        _DEFAULT_VERSIONS[template.name] = template.version
+
+
+def _selected_versions() -> Dict[str, str]:
+    selected = {}
+    for item in PROMPT_VERSIONS.split(","):
+        if "=" in item:
+            name, version = item.split("=", 1)
+            selected[name.strip()] = version.strip()
+    return selected
+
+
+def get_prompt(name: str) -> PromptTemplate:
+    versions = _TEMPLATES[name]
+    wanted = _selected_versions().get(name)
+    if wanted in versions:
+        return versions[wanted]
+    return versions[_DEFAULT_VERSIONS[name]]
+
+
+# ============================================================
+# Templates
+# ============================================================
+
+_INTENT_STATIC = """Classify the user's Telugu/English message into exactly one intent.
+
+Allowed intents:
+- greeting: short greeting only ("నమస్కారం")
+- time_query: asking current time ("టైమ్ ఎంత", "ఇప్పుడు సమయం ఎంత")
+- name_query: asking their saved profile name ("నా పేరు ఏమిటి")
+- scheme_list: asking list of govt schemes for a state ("ఆంధ్రప్రదేశ్ లో ఏమేమి పథకాలు ఉన్నాయి")
+- scheme_info: asking details about a specific scheme ("అమ్మ ఒడి గురించి చెప్పండి")
+- scheme_criteria: asking eligibility criteria/requirements of a scheme ("అమ్మ ఒడి రావాలి అంటే పిల్లలకు ఎంత వయసు")
+- scheme_search: wants schemes based on their profile but not explicitly asking eligible/not-eligible
+- eligibility_check: explicitly wants eligible/not eligible ("నాకు వస్తుందా", "నేను అర్హుడానా")
+- apply: wants to apply or asks application steps
+- unknown: unclear
+
+Return ONLY one of:
+greeting, time_query, name_query, scheme_list, scheme_info, scheme_criteria, scheme_search, eligibility_check, apply, unknown
+
+"""
+
+register_prompt(PromptTemplate(
+    name="intent",
+    version="1",
+    system="You are an intent classifier. Return only the intent name.",
+    static_builder=lambda variant: _INTENT_STATIC,
+    dynamic="""Conversation so far (use it only to resolve short follow-ups):
+{context}
+
+User text: {user_text}""",
+))
+
+
+_SLOT_STATIC = """Extract user profile information from Telugu/English text.
+
+Return ONLY a single JSON object (no markdown, no explanation).
+
+Fields you may extract if mentioned:
+state, age, gender, occupation, income, family_size, land_owner, disability, caste, religion, has_children, pregnant, location.
+
+Normalization rules:
+- state: తెలంగాణ/తెలంగాణా -> TS, ఆంధ్రప్రదేశ్/ఆంధ్ర/ఆంధ్రప్రదేశ/ఆంధ్ర ప్రదేశ్ -> AP
+- occupation: రైతు->farmer, కూలీ->laborer, ఉద్యోగి->employee, వేవర్/నేత->weaver, డ్రైవర్->driver, మత్స్యకారుడు->fisherman
+- age: integer only (must be between 10-120)
+- income: integer rupees ("లక్ష" => 100000)
+
+"""
+
+register_prompt(PromptTemplate(
+    name="slot_extraction",
+    version="1",
+    system="You extract structured data and output ONLY valid JSON. Follow normalization rules strictly.",
+    static_builder=lambda variant: _SLOT_STATIC,
+    dynamic="""Current stored profile: {current_slots}
+User text: {user_text}
+""",
+))
+
+
+def _scheme_catalog_static(variant: Optional[str]) -> str:
+    """Catalog listing for one state (variant "AP"/"TS") or for all states (variant None)"""
+    store = get_catalog(variant)
+    states = [variant] if variant else list(store.by_state)
+    catalog = [
+        f"{sid}|{store.by_id[sid]['scheme_name_te']}"
+        for st in states
+        for sid in store.by_state.get(st, [])
+    ]
+    return f"""User is asking about a government scheme in Telugu. Identify which scheme they are referring to.
+
+Available schemes (format: ID|Name):
+{chr(10).join(catalog[:MAX_CATALOG_ENTRIES])}
+
+IMPORTANT:
+- User may have typos or ASR errors (e.g., "అమ్మఒడి" means "అమ్మ ఒడి")
+- Match based on phonetic similarity and meaning, not exact spelling
+- If user mentions a scheme name (even partially), return that scheme ID
+- If no scheme is mentioned, return "NONE"
+
+Return ONLY the scheme ID (e.g., AP_AMMA_VODI) or NONE.
+
+"""
+
+
+register_prompt(PromptTemplate(
+    name="scheme_identification",
+    version="1",
+    system="You identify scheme names from user queries. Return only the scheme ID or NONE.",
+    static_builder=_scheme_catalog_static,
+    dynamic='User text: "{user_text}"',
+))
+
+
+_BATCH_NLU_STATIC = """For EACH numbered utterance below, classify the intent and extract profile slots.
+
+Intents (use exactly one):
+greeting, time_query, name_query, scheme_list, scheme_info, scheme_criteria, scheme_search, eligibility_check, apply, unknown
+
+Slots (only if mentioned): state, age, gender, occupation, income, family_size, land_owner, disability, caste, religion, has_children, pregnant, location.
+- state: తెలంగాణ -> TS, ఆంధ్రప్రదేశ్/ఆంధ్ర -> AP
+- occupation: రైతు->farmer, కూలీ->laborer, ఉద్యోగి->employee, నేత->weaver, డ్రైవర్->driver, మత్స్యకారుడు->fisherman
+- age, income: integers (income in rupees, "లక్ష" => 100000)
+
+Return ONLY one JSON object, one result per input index "i":
+{"results": [{"i": 0, "intent": "scheme_search", "slots": {"state": "TS"}}, ...]}
+
+"""
+
+register_prompt(PromptTemplate(
+    name="batch_nlu",
+    version="1",
+    system="You label utterances in bulk and output ONLY valid JSON.",
+    static_builder=lambda variant: _BATCH_NLU_STATIC,
+    dynamic="""Utterances:
+{items}""",
+))
@@ -0,0 +1,117 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+import metrics
+from llm_backend import llm_prefetch
+from message_catalog import DEFAULT_LANGUAGE
+from langgraph_nodes import (
+    FINAL_INTENTS,
+    _deterministic_intent,
+    _intent_llm_args,
+    _match_scheme_from_text_deterministic,
+    _sanitize_user_text,
+    _scheme_identification_llm_args,
+    _slot_llm_args,
+)
+from tools.intent_model import INTENT_MODEL_MIN_CONFIDENCE, predict_intent
+from tools.state_registry import is_known_state
+from tools.scheme_details_tool import DETAIL_VIEWS, render_scheme_detail
+from tools.slot_extractor import extract_slots_with_coverage
+
+# Speculative NLU on interim ASR results (POST /agent/partial).
+# Every partial runs the deterministic tier (keyword intent overrides, classifier,
+# regex slots, scheme-name match) and pre-warms the detail cache for a matched scheme.
+# Once the text is stable (same partial twice in a row, or the client says so after
+# a pause) the LLM calls the final turn would make are started with the exact same
+# arguments; the final turn picks their results up via llm_backend's prefetch table,
+# and speculation for text the user never finished expires unused.
+SPECULATION_MIN_CHARS = int(os.getenv("SPECULATION_MIN_CHARS", "4"))
+SPECULATION_MAX_SESSIONS = 256
+# Intents whose knowledge answer may need LLM scheme identification
+_SCHEME_LOOKUP_INTENTS = {"scheme_info", "scheme_criteria", "apply"}
+
+_lock = threading.Lock()
+_last_partial: "OrderedDict[str, str]" = OrderedDict()
+_warm_pool: Optional[ThreadPoolExecutor] = None
+
+
+def _prewarm_scheme(scheme_id: str, language: str) -> None:
+    global _warm_pool
+    if _warm_pool is None:
+        with _lock:
+            if _warm_pool is None:
+                _warm_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="speculation")
+    _warm_pool.submit(lambda: [render_scheme_detail(scheme_id, view, language) for view in DETAIL_VIEWS])
+
+
+def _is_stable(session_id: str, text: str) -> bool:
+    with _lock:
+        stable = _last_partial.get(session_id) == text
+        _last_partial[session_id] = text
+        _last_partial.move_to_end(session_id)
+        while len(_last_partial) > SPECULATION_MAX_SESSIONS:
+            _last_partial.popitem(last=False)
+    return stable
+
+
+def speculate(state: Optional[Dict[str, Any]], partial_text: str, stable: bool = False) -> Dict[str, Any]:
+    """
+    Run the cheap NLU tier on a partial transcript for the session in `state`
+    (the state the final turn will start from; it is not modified).
+    Returns what was found and which LLM calls were started.
+    """
+    t0 = time.perf_counter()
+    state = state or {}
+    text = _sanitize_user_text(partial_text)
+    if len(text) < SPECULATION_MIN_CHARS:
+        return {"text": text, "skipped": True}
+    metrics.incr("speculation.partials")
+
+    session_id = state.get("session_id") or "default"
+    stable = _is_stable(session_id, text) or stable
+    # Shallow copy: prompts are built exactly as the final turn will build them
+    view = dict(state)
+    view["user_text"] = text
+
+    intent = _deterministic_intent(view, text)
+    intent_source = "override" if intent else None
+    if not intent:
+        model_intent, confidence = predict_intent(text)
+        if model_intent in FINAL_INTENTS and confidence >= INTENT_MODEL_MIN_CONFIDENCE:
+            intent, intent_source = model_intent, "classifier"
+
+    current_slots = dict(state.get("slots") or {})
+    regex_slots, covered = extract_slots_with_coverage(text)
+    user_state = regex_slots.get("state") or current_slots.get("state")
+
+    scheme_id, scheme_name = _match_scheme_from_text_deterministic(text, user_state)
+    if scheme_id:
+        _prewarm_scheme(scheme_id, state.get("language") or DEFAULT_LANGUAGE)
+
+    prefetched: List[str] = []
+    if stable:
+        if not intent and llm_prefetch("intent", **_intent_llm_args(view, text)):
+            prefetched.append("intent")
+        if not covered and llm_prefetch("slot_extraction", **_slot_llm_args(text, current_slots)):
+            prefetched.append("slot_extraction")
+        if intent in _SCHEME_LOOKUP_INTENTS and not scheme_id and len(text) >= 3:
+            variant = user_state if is_known_state(user_state) else None
+            if llm_prefetch("scheme_identification", **_scheme_identification_llm_args(text, variant)):
+                prefetched.append("scheme_identification")
+        if prefetched:
+            metrics.incr("speculation.llm_prefetch_rounds")
+
+    metrics.observe("speculation.ms", (time.perf_counter() - t0) * 1000)
+    return {
+        "text": text,
+        "stable": stable,
+        "intent": intent,
+        "intent_source": intent_source,
+        "slots": regex_slots,
+        "scheme_id": scheme_id,
+        "scheme_name": scheme_name,
+        "prefetched": prefetched,
+    }
@@ -1,13 +1,16 @@
 from typing import TypedDict, List, Dict, Optional
 
 class AgentState(TypedDict):
+    session_id: str
     user_text: str
     intent: str
+    intent_source: Optional[str]
     slots: Dict[str, Optional[str]]
     missing_slots: List[str]
     eligible_schemes: List[str]
     response: str
     history: List[Dict[str, str]]
+    context_summary: Dict[str, any]
     needs_confirmation: bool
     pending_conflicts: Dict[str, any]
     pending_updates: Dict[str, any]
@@ -17,3 +20,6 @@ class AgentState(TypedDict):
     last_referenced_scheme_id: Optional[str]
     last_referenced_scheme_name: Optional[str]
     pending_followup: Optional[str]
+    last_presented_eligible_scheme_ids: List[str]
+    last_presented_eligible_scheme_names: List[str]
+    language: str
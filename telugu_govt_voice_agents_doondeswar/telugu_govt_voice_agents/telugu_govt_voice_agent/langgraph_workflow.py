@@ -1,5 +1,14 @@
+import uuid
+from typing import Optional
 from langgraph.graph import StateGraph, END
 from langgraph_state import AgentState
+import event_log
+from event_log import traced_node
+import sampling_profiler
+from langgraph_context import new_summary, update_context
+from message_catalog import negotiate
+from langgraph_prefetch import on_slots_changed
+from tools.intent_model import log_intent_example
 from langgraph_nodes import (
     input_node,
     intent_slot_extraction_node,
@@ -24,19 +33,24 @@ def route_from_planner(state: AgentState) -> str:
     return "knowledge_answer"
 
 
+def _node(name, fn):
+    """Graph node with latency tracing and profiler tagging (sampling_profiler.py)"""
+    return traced_node(name, sampling_profiler.tagged(name, fn))
+
+
 def create_workflow() -> StateGraph:
     """Create the complete workflow graph"""
     workflow = StateGraph(AgentState)
     
     # Add all nodes
-    workflow.add_node("input", input_node)
-    workflow.add_node("intent_slot", intent_slot_extraction_node)
-    workflow.add_node("correction_handler", correction_handler_node)
-    workflow.add_node("planner", planner_node)
-    workflow.add_node("knowledge_answer", knowledge_answer_node)
-    workflow.add_node("clarification", clarification_node)
-    workflow.add_node("eligibility_check", eligibility_check_node)
-    workflow.add_node("response_generation", response_generation_node)
+    workflow.add_node("input", _node("input", input_node))
+    workflow.add_node("intent_slot", _node("intent_slot", intent_slot_extraction_node))
+    workflow.add_node("correction_handler", _node("correction_handler", correction_handler_node))
+    workflow.add_node("planner", _node("planner", planner_node))
+    workflow.add_node("knowledge_answer", _node("knowledge_answer", knowledge_answer_node))
+    workflow.add_node("clarification", _node("clarification", clarification_node))
+    workflow.add_node("eligibility_check", _node("eligibility_check", eligibility_check_node))
+    workflow.add_node("response_generation", _node("response_generation", response_generation_node))
     
     # Set entry point
     workflow.set_entry_point("input")
@@ -67,17 +81,25 @@ def create_workflow() -> StateGraph:
     return workflow.compile()
 
 
-def run_agent(user_text: str, current_state: dict = None) -> dict:
-    """Run the agent workflow with user input"""
+def run_agent(user_text: str, current_state: dict = None, language: Optional[str] = None,
+              accept_language: Optional[str] = None) -> dict:
+    """
+    Run the agent workflow with user input. The response language is negotiated per
+    turn from `language` (client request), the script of `user_text`, the session's
+    language and `accept_language` (see message_catalog.negotiate).
+    """
     if current_state is None:
         current_state = {
+            "session_id": uuid.uuid4().hex,
             "user_text": user_text,
             "intent": "",
+            "intent_source": None,
             "slots": {},
             "missing_slots": [],
             "eligible_schemes": [],
             "response": "",
             "history": [],
+            "context_summary": new_summary(),
             "needs_confirmation": False,
             "pending_conflicts": {},
             "pending_updates": {},
@@ -87,15 +109,20 @@ def run_agent(user_text: str, current_state: dict = None) -> dict:
             "last_referenced_scheme_id": None,
             "last_referenced_scheme_name": None,
             "pending_followup": None,
+            "language": None,
         }
     else:
         # Preserve state across turns
         preserved_slots = current_state.get("slots", {}).copy()
         preserved_history = current_state.get("history", []).copy()
         
+        current_state["session_id"] = current_state.get("session_id") or uuid.uuid4().hex
         current_state["user_text"] = user_text
+        # Set again by intent detection; stays None when this turn skips it
+        current_state["intent_source"] = None
         current_state["slots"] = preserved_slots
         current_state["history"] = preserved_history
+        current_state["context_summary"] = current_state.get("context_summary") or new_summary()
         current_state["iteration_count"] = current_state.get("iteration_count", 0) + 1
         current_state["needs_confirmation"] = current_state.get("needs_confirmation", False)
         current_state["pending_conflicts"] = current_state.get("pending_conflicts", {})
@@ -106,9 +133,16 @@ def run_agent(user_text: str, current_state: dict = None) -> dict:
         current_state["last_referenced_scheme_name"] = current_state.get("last_referenced_scheme_name", None)
         current_state["pending_followup"] = current_state.get("pending_followup", None)
     
+    current_state["language"] = negotiate(language, current_state.get("language"), user_text, accept_language)
+
     # Create and invoke workflow
     app = create_workflow()
-    result = app.invoke(current_state)
+    previous_slots = dict(current_state.get("slots") or {})
+    trace = event_log.start_turn()
+    try:
+        result = app.invoke(current_state)
+    finally:
+        event_log.end_turn(trace)
     
     # Debug logging
     try:
@@ -116,17 +150,10 @@ def run_agent(user_text: str, current_state: dict = None) -> dict:
     except Exception:
         pass
     
-    # Update history
-    if "history" not in result:
-        result["history"] = []
-    
-    result["history"].append({
-        "role": "assistant",
-        "content": result.get("response", "")
-    })
-    
-    # Keep history manageable
-    if len(result["history"]) > 20:
-        result["history"] = result["history"][-20:]
-    
-    return result
\ No newline at end of file
+    log_intent_example(result.get("user_text", ""), result.get("intent", ""), result.get("intent_source"))
+    event_log.record_turn(previous_slots, result, trace)
+    # Warm what the next turn will likely ask for once the profile changed
+    on_slots_changed(previous_slots, result)
+
+    # Update history; older turns are folded into context_summary
+    return update_context(result)
\ No newline at end of file
@@ -0,0 +1,358 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+import event_log
+import metrics
+from langgraph_context import estimate_tokens
+from llm_scheduler import TASK_PRIORITY, DEFAULT_PRIORITY, RateLimitError, get_scheduler
+
+# Backend per NLU task. Tasks: intent, slot_extraction, scheme_identification.
+#   LLM_BACKEND=groq|openai|local|fake            default for all tasks (groq)
+#   LLM_BACKEND_<TASK>=...                        per-task override, e.g. LLM_BACKEND_INTENT=local
+#   LLM_MODEL / LLM_MODEL_<TASK>                  model name for groq/openai backends
+#   LLM_OPENAI_BASE_URL / LLM_OPENAI_API_KEY      OpenAI-compatible server (llama.cpp, vLLM, Ollama, ...)
+DEFAULT_BACKEND = "groq"
+DEFAULT_MODEL = "llama-3.1-8b-instant"
+OPENAI_BASE_URL = "http://localhost:8000/v1"
+OPENAI_TIMEOUT_SECONDS = 30.0
+# Identical concurrent temperature=0 requests share one upstream call (single-flight).
+LLM_COALESCE = os.getenv("LLM_COALESCE", "1") != "0"
+# Remote calls go through the token-bucket scheduler (llm_scheduler.py).
+LLM_SCHEDULER = os.getenv("LLM_SCHEDULER", "1") != "0"
+# Prefetched (speculative) results wait this long for the identical real request.
+LLM_PREFETCH_TTL_SECONDS = float(os.getenv("LLM_PREFETCH_TTL_SECONDS", "30"))
+LLM_PREFETCH_WORKERS = int(os.getenv("LLM_PREFETCH_WORKERS", "4"))
+DEFAULT_COMPLETION_TOKENS = 64
+
+
+class LLMBackend:
+    """Chat-completion style backend; returns the reply text"""
+
+    name = "base"
+
+    def complete(self, task: str, messages: List[Dict[str, str]], text: Optional[str] = None,
+                 user_state: Optional[str] = None, **options) -> str:
+        raise NotImplementedError
+
+
+class GroqBackend(LLMBackend):
+    name = "groq"
+
+    def __init__(self, model: str):
+        self.model = model
+        self._client = None
+
+    def _get_client(self):
+        if self._client is None:
+            from groq import Groq
+            kwargs = {}
+            if LLM_SCHEDULER:
+                # LLMScheduler owns backoff, pausing and the retry budget
+                kwargs["max_retries"] = 0
+            self._client = Groq(api_key=os.getenv("GROQ_API_KEY"), **kwargs)
+        return self._client
+
+    def complete(self, task, messages, text=None, user_state=None, **options) -> str:
+        resp = self._get_client().chat.completions.create(model=self.model, messages=messages, **options)
+        return resp.choices[0].message.content or ""
+
+
+class OpenAICompatibleBackend(LLMBackend):
+    """Any server exposing POST {base_url}/chat/completions (e.g. a local llama.cpp/vLLM/Ollama)"""
+
+    name = "openai"
+
+    def __init__(self, model: str, base_url: str, api_key: Optional[str] = None, timeout: float = OPENAI_TIMEOUT_SECONDS):
+        import httpx
+        self.model = model
+        self.base_url = base_url.rstrip("/")
+        headers = {"Authorization": f"Bearer {api_key}"} if api_key else {}
+        self._http = httpx.Client(timeout=timeout, headers=headers)
+
+    def complete(self, task, messages, text=None, user_state=None, **options) -> str:
+        payload = {"model": self.model, "messages": messages}
+        payload.update(options)
+        resp = self._http.post(f"{self.base_url}/chat/completions", json=payload)
+        resp.raise_for_status()
+        return resp.json()["choices"][0]["message"].get("content") or ""
+
+
+class LocalBackend(LLMBackend):
+    """In-process CPU NLU (tools/local_nlu.py); works fully offline"""
+
+    name = "local"
+
+    def complete(self, task, messages, text=None, user_state=None, **options) -> str:
+        if text is None:
+            text = messages[-1]["content"] if messages else ""
+        if task == "intent":
+            from tools.intent_model import predict_intent
+            from tools.local_nlu import classify_intent
+            intent, _ = predict_intent(text)
+            return intent or classify_intent(text, user_state)
+        if task == "scheme_identification":
+            from tools.local_nlu import identify_scheme
+            return identify_scheme(text, user_state) or "NONE"
+        if task == "slot_extraction":
+            from tools.slot_extractor import extract_slots
+            return json.dumps(extract_slots(text), ensure_ascii=False)
+        if task == "batch_nlu":
+            # text is the JSON list of {"i", "text"} items that was packed into the prompt
+            from tools.intent_model import predict_intent
+            from tools.local_nlu import classify_intent
+            from tools.slot_extractor import extract_slots
+            results = []
+            for item in json.loads(text):
+                intent, _ = predict_intent(item["text"])
+                results.append({
+                    "i": item["i"],
+                    "intent": intent or classify_intent(item["text"]),
+                    "slots": extract_slots(item["text"]),
+                })
+            return json.dumps({"results": results}, ensure_ascii=False)
+        raise ValueError(f"Local backend does not support task '{task}'")
+
+
+class FakeRateLimitedBackend(LocalBackend):
+    """
+    Local stand-in for a rate-limited provider: answers like the local backend
+    after `latency` seconds, but raises RateLimitError (with retry_after) once
+    more than `rpm` requests or `tpm` tokens were used in the last `window` seconds.
+    """
+
+    name = "fake"
+
+    def __init__(self, rpm: float, tpm: float, latency: float = 0.05, window: float = 60.0):
+        self.rpm = rpm
+        self.tpm = tpm
+        self.latency = latency
+        self.window = window
+        self._window = deque()
+        self._lock = threading.Lock()
+        self.accepted = 0
+        self.rejected = 0
+
+    def complete(self, task, messages, text=None, user_state=None, **options) -> str:
+        cost = sum(estimate_tokens(m.get("content", "")) for m in messages) + options.get("max_tokens", DEFAULT_COMPLETION_TOKENS)
+        with self._lock:
+            now = time.monotonic()
+            while self._window and now - self._window[0][0] >= self.window:
+                self._window.popleft()
+            used = sum(c for _, c in self._window)
+            if len(self._window) + 1 > self.rpm or used + cost > self.tpm:
+                self.rejected += 1
+                retry_after = self.window - (now - self._window[0][0]) if self._window else 1.0
+                raise RateLimitError("429 Too Many Requests", retry_after=round(retry_after, 2))
+            self._window.append((now, cost))
+            self.accepted += 1
+        time.sleep(self.latency)
+        return super().complete(task, messages, text=text, user_state=user_state, **options)
+
+
+_lock = threading.Lock()
+_instances: Dict[tuple, LLMBackend] = {}
+_overrides: Dict[Optional[str], LLMBackend] = {}
+
+
+def _task_env(prefix: str, task: str, default: str) -> str:
+    return os.getenv(f"{prefix}_{task.upper()}") or os.getenv(prefix) or default
+
+
+def set_backend(backend: Optional[LLMBackend], task: Optional[str] = None) -> None:
+    """Override the backend for one task (or all tasks when task is None); None removes the override"""
+    if backend is None:
+        _overrides.pop(task, None)
+    else:
+        _overrides[task] = backend
+
+
+def get_backend(task: str) -> LLMBackend:
+    if task in _overrides:
+        return _overrides[task]
+    if None in _overrides:
+        return _overrides[None]
+
+    kind = _task_env("LLM_BACKEND", task, DEFAULT_BACKEND).lower()
+    model = _task_env("LLM_MODEL", task, DEFAULT_MODEL)
+    key = (kind, model)
+    backend = _instances.get(key)
+    if backend is None:
+        with _lock:
+            backend = _instances.get(key)
+            if backend is None:
+                if kind == "local":
+                    backend = LocalBackend()
+                elif kind == "openai":
+                    backend = OpenAICompatibleBackend(
+                        model,
+                        os.getenv("LLM_OPENAI_BASE_URL", OPENAI_BASE_URL),
+                        os.getenv("LLM_OPENAI_API_KEY"),
+                    )
+                elif kind == "groq":
+                    backend = GroqBackend(model)
+                elif kind == "fake":
+                    backend = FakeRateLimitedBackend(
+                        float(os.getenv("LLM_FAKE_RPM", "30")),
+                        float(os.getenv("LLM_FAKE_TPM", "6000")),
+                        float(os.getenv("LLM_FAKE_LATENCY_SECONDS", "0.05")),
+                    )
+                else:
+                    raise ValueError(f"Unknown LLM backend '{kind}' for task '{task}'")
+                _instances[key] = backend
+    return backend
+
+
+class _InFlight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Optional[str] = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+
+_inflight_lock = threading.Lock()
+_inflight: Dict[Any, _InFlight] = {}
+
+
+def _upstream(task: str, backend: LLMBackend, messages, text, user_state, options) -> str:
+    metrics.incr(f"llm.upstream_calls.{task}")
+    call = lambda: backend.complete(task, messages, text=text, user_state=user_state, **options)
+    if not LLM_SCHEDULER or backend.name == "local":
+        return call()
+    cost = sum(estimate_tokens(m.get("content", "")) for m in messages) + options.get("max_tokens", DEFAULT_COMPLETION_TOKENS)
+    scheduler = get_scheduler(f"{backend.name}:{getattr(backend, 'model', '')}")
+    return scheduler.run(call, priority=TASK_PRIORITY.get(task, DEFAULT_PRIORITY), cost=cost)
+
+
+def _coalesce_key(task: str, backend: LLMBackend, messages, text, user_state, options) -> Optional[tuple]:
+    if not LLM_COALESCE or backend.name == "local" or options.get("temperature", 1) != 0:
+        return None
+    try:
+        payload = json.dumps([messages, text, user_state, options], sort_keys=True, ensure_ascii=False)
+    except (TypeError, ValueError):
+        return None
+    return (task, id(backend), payload)
+
+
+_prefetched: Dict[Any, tuple] = {}  # key -> (expires_at, _InFlight)
+_prefetch_pool: Optional[ThreadPoolExecutor] = None
+
+
+def _expire_prefetched(now: float) -> None:
+    for key in [k for k, (expires, call) in _prefetched.items() if expires <= now]:
+        _prefetched.pop(key)
+        metrics.incr(f"llm.prefetch_wasted.{key[0]}")
+
+
+def llm_prefetch(task: str, messages: List[Dict[str, str]], text: Optional[str] = None,
+                 user_state: Optional[str] = None, **options) -> bool:
+    """
+    Start a call in the background whose result is handed to the next identical
+    llm_complete within LLM_PREFETCH_TTL_SECONDS (used for partial transcripts).
+    Returns False when the request cannot be shared (local backend, temperature != 0).
+    """
+    global _prefetch_pool
+    backend = get_backend(task)
+    key = _coalesce_key(task, backend, messages, text, user_state, options)
+    if key is None:
+        return False
+    with _inflight_lock:
+        now = time.monotonic()
+        _expire_prefetched(now)
+        if key in _prefetched:
+            return True
+        call = _InFlight()
+        _prefetched[key] = (now + LLM_PREFETCH_TTL_SECONDS, call)
+        if _prefetch_pool is None:
+            _prefetch_pool = ThreadPoolExecutor(max_workers=LLM_PREFETCH_WORKERS, thread_name_prefix="llm-prefetch")
+
+    def run():
+        try:
+            call.result = _coalesced(task, backend, key, messages, text, user_state, options)
+        except BaseException as e:
+            call.error = e
+        finally:
+            call.done.set()
+
+    metrics.incr(f"llm.prefetch.{task}")
+    _prefetch_pool.submit(run)
+    return True
+
+
+def _take_prefetched(key) -> Optional[_InFlight]:
+    with _inflight_lock:
+        _expire_prefetched(time.monotonic())
+        entry = _prefetched.pop(key, None)
+    return entry[1] if entry else None
+
+
+def llm_complete(task: str, messages: List[Dict[str, str]], text: Optional[str] = None,
+                 user_state: Optional[str] = None, **options) -> str:
+    """
+    Run one NLU task on its configured backend.
+
+    text/user_state are the raw inputs, used by the local backend instead of the prompt.
+    Concurrent identical deterministic (temperature=0) requests are coalesced: the
+    first caller makes the upstream call and the others wait for its result. A
+    matching llm_prefetch result (finished or still running) is used instead of a new call.
+    """
+    backend = get_backend(task)
+    metrics.incr(f"llm.requests.{task}")
+    t0 = time.perf_counter()
+    ok = False
+    try:
+        result = _complete(task, backend, messages, text, user_state, options)
+        ok = True
+        return result
+    finally:
+        event_log.note_llm_call(task, backend.name, (time.perf_counter() - t0) * 1000, ok)
+
+
+def _complete(task: str, backend: LLMBackend, messages, text, user_state, options) -> str:
+    key = _coalesce_key(task, backend, messages, text, user_state, options)
+    if key is None:
+        return _upstream(task, backend, messages, text, user_state, options)
+
+    prefetched = _take_prefetched(key) if _prefetched else None
+    if prefetched is not None:
+        metrics.incr(f"llm.prefetch_hits.{task}")
+        prefetched.done.wait()
+        if prefetched.error is None:
+            return prefetched.result
+        # The speculative call failed; make a real one.
+    return _coalesced(task, backend, key, messages, text, user_state, options)
+
+
+def _coalesced(task: str, backend: LLMBackend, key, messages, text, user_state, options) -> str:
+    with _inflight_lock:
+        call = _inflight.get(key)
+        leader = call is None
+        if leader:
+            call = _InFlight()
+            _inflight[key] = call
+        else:
+            call.waiters += 1
+
+    if not leader:
+        metrics.incr(f"llm.coalesced.{task}")
+        call.done.wait()
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    try:
+        call.result = _upstream(task, backend, messages, text, user_state, options)
+        return call.result
+    except BaseException as e:
+        call.error = e
+        raise
+    finally:
+        with _inflight_lock:
+            _inflight.pop(key, None)
+        call.done.set()
+        if call.waiters:
+            metrics.observe(f"llm.coalesce_fanout.{task}", call.waiters)
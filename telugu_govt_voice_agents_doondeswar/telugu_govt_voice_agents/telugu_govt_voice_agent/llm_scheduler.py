@@ -0,0 +1,184 @@
+import heapq
+import itertools
+import os
+import random
+import threading
+import time
+from typing import Callable, Optional
+import metrics
+
+# Client-side limits for an upstream LLM account. Calls wait for request and token
+# budget in priority order instead of bursting into provider 429s.
+LLM_RPM = float(os.getenv("LLM_RPM", "30"))
+LLM_TPM = float(os.getenv("LLM_TPM", "6000"))
+LLM_QUEUE_MAX = int(os.getenv("LLM_QUEUE_MAX", "64"))
+LLM_QUEUE_DEADLINE_SECONDS = float(os.getenv("LLM_QUEUE_DEADLINE_SECONDS", "10"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "3"))
+
+# Lower number = served first. Slot extraction feeds eligibility, so it wins over
+# scheme identification, which has deterministic fallbacks.
+TASK_PRIORITY = {
+    "slot_extraction": 0,
+    "intent": 1,
+    "scheme_identification": 2,
+    "batch_nlu": 5,
+}
+DEFAULT_PRIORITY = 3
+
+
+class RateLimitError(Exception):
+    """Upstream said 429; retry_after is in seconds when the provider sent one"""
+
+    def __init__(self, message: str = "rate limited", retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class QueueFullError(Exception):
+    pass
+
+
+class DeadlineExceededError(TimeoutError):
+    pass
+
+
+class TokenBucket:
+    """
+    Refills at per_minute/60 per second up to `burst`. A request larger than the
+    burst is admitted once the bucket is full and charged in full: the balance goes
+    negative and later callers wait until it is paid back, so the long-run rate
+    never exceeds per_minute.
+    """
+
+    def __init__(self, per_minute: float, burst: Optional[float] = None):
+        self.rate = per_minute / 60.0
+        self.capacity = burst if burst is not None else per_minute
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until `amount` is available (0 if it is available now)"""
+        self._refill(now)
+        # Oversized requests wait for a full bucket (never for more than it holds)
+        needed = min(amount, self.capacity)
+        if self.tokens >= needed:
+            return 0.0
+        return (needed - self.tokens) / self.rate if self.rate > 0 else float("inf")
+
+    def take(self, amount: float) -> None:
+        self.tokens -= amount
+
+
+def retry_after_seconds(exc: BaseException) -> Optional[float]:
+    """
+    Seconds to back off if exc is a rate-limit error, else None.
+    Understands RateLimitError, the Groq SDK's RateLimitError and httpx 429 responses.
+    """
+    if isinstance(exc, RateLimitError):
+        return exc.retry_after if exc.retry_after is not None else 0.0
+    response = getattr(exc, "response", None)
+    status = getattr(exc, "status_code", None) or getattr(response, "status_code", None)
+    if status != 429:
+        return None
+    try:
+        value = response.headers.get("retry-after")
+        return max(0.0, float(value)) if value is not None else 0.0
+    except Exception:
+        return 0.0
+
+
+class LLMScheduler:
+    """
+    Token-bucket scheduler (requests/min and tokens/min) with priority classes,
+    a bounded queue with per-request deadlines, and retry-after aware backoff.
+    The call itself runs on the caller's thread once it is admitted.
+    """
+
+    def __init__(self, rpm: float = LLM_RPM, tpm: float = LLM_TPM, max_queue: int = LLM_QUEUE_MAX,
+                 max_retries: int = LLM_MAX_RETRIES, name: str = "llm"):
+        self.name = name
+        # Small bursts (2 s worth) so a sliding 60 s provider window is never overrun.
+        self.requests = TokenBucket(rpm, burst=max(1.0, rpm / 30.0))
+        self.tokens = TokenBucket(tpm, burst=max(1.0, tpm / 30.0))
+        self.max_queue = max_queue
+        self.max_retries = max_retries
+        self._cond = threading.Condition()
+        self._queue: list = []
+        self._seq = itertools.count()
+        self._paused_until = 0.0
+
+    def _admit(self, priority: int, cost: float, deadline: float) -> None:
+        with self._cond:
+            if len(self._queue) >= self.max_queue:
+                metrics.incr(f"{self.name}.rejected_queue_full")
+                raise QueueFullError(f"{self.name} queue is full ({self.max_queue})")
+            entry = (priority, next(self._seq))
+            heapq.heappush(self._queue, entry)
+            metrics.observe(f"{self.name}.queue_depth", len(self._queue))
+            try:
+                while True:
+                    now = time.monotonic()
+                    if now >= deadline:
+                        metrics.incr(f"{self.name}.deadline_exceeded")
+                        raise DeadlineExceededError(f"{self.name} request waited past its deadline")
+                    wait = max(0.0, self._paused_until - now)
+                    if self._queue[0] == entry and wait == 0.0:
+                        wait = max(self.requests.wait_time(1, now), self.tokens.wait_time(cost, now))
+                        if wait == 0.0:
+                            self.requests.take(1)
+                            self.tokens.take(cost)
+                            return
+                    self._cond.wait(timeout=min(wait or 0.05, deadline - now))
+            finally:
+                self._queue.remove(entry)
+                heapq.heapify(self._queue)
+                self._cond.notify_all()
+
+    def pause(self, seconds: float) -> None:
+        """Stop admitting anything for `seconds` (provider asked us to back off)"""
+        with self._cond:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._cond.notify_all()
+
+    def run(self, fn: Callable[[], str], priority: int = DEFAULT_PRIORITY, cost: float = 1.0,
+            deadline_seconds: float = LLM_QUEUE_DEADLINE_SECONDS) -> str:
+        deadline = time.monotonic() + deadline_seconds
+        attempt = 0
+        while True:
+            t0 = time.monotonic()
+            self._admit(priority, cost, deadline)
+            metrics.observe(f"{self.name}.queue_wait_ms", (time.monotonic() - t0) * 1000)
+            try:
+                return fn()
+            except Exception as e:
+                backoff = retry_after_seconds(e)
+                if backoff is None or attempt >= self.max_retries:
+                    raise
+                metrics.incr(f"{self.name}.rate_limited")
+                attempt += 1
+                if backoff == 0.0:
+                    backoff = min(8.0, 0.5 * (2 ** (attempt - 1))) * (0.8 + 0.4 * random.random())
+                if time.monotonic() + backoff >= deadline:
+                    raise
+                print(f"[LLM_SCHEDULER] {self.name}: rate limited, backing off {backoff:.2f}s (attempt {attempt})")
+                self.pause(backoff)
+
+
+_schedulers = {}
+_lock = threading.Lock()
+
+
+def get_scheduler(key: str) -> LLMScheduler:
+    """One scheduler per upstream account/backend"""
+    scheduler = _schedulers.get(key)
+    if scheduler is None:
+        with _lock:
+            scheduler = _schedulers.get(key)
+            if scheduler is None:
+                scheduler = LLMScheduler(name=f"llm_scheduler.{key}")
+                _schedulers[key] = scheduler
+    return scheduler
@@ -0,0 +1,292 @@
+import gc
+import hmac
+import itertools
+import linecache
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+
+# Opt-in memory diagnostics (GET /admin/memory and scripts/memory_report.py).
+#   MEMDIAG=1              start tracemalloc at import with MEMDIAG_FRAMES frames per allocation
+#   MEMDIAG_TOKEN          required X-Admin-Token for the endpoint; without it the endpoint is off
+#   MEMDIAG_MAX_SNAPSHOTS  named snapshots kept for diffs (oldest dropped first)
+# With MEMDIAG unset nothing is traced and the endpoint answers 404, so the only cost
+# is importing this module. Object counts and session sizes walk the gc heap and are
+# computed only when asked for.
+MEMDIAG = os.getenv("MEMDIAG", "0") == "1"
+MEMDIAG_TOKEN = os.getenv("MEMDIAG_TOKEN", "")
+MEMDIAG_FRAMES = int(os.getenv("MEMDIAG_FRAMES", "4"))
+MEMDIAG_MAX_SNAPSHOTS = int(os.getenv("MEMDIAG_MAX_SNAPSHOTS", "8"))
+GROUP_BY = ("module", "filename", "lineno", "traceback")
+
+_lock = threading.Lock()
+_snapshots: "OrderedDict[str, tracemalloc.Snapshot]" = OrderedDict()
+_snapshot_times: Dict[str, float] = {}
+# Default labels keep counting past evictions, so a new snapshot never reuses a name
+_snapshot_numbers = itertools.count(1)
+# Frames of the profiler itself and of the import machinery are noise in every report
+_IGNORED = [
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, linecache.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+]
+
+
+def start(frames: int = MEMDIAG_FRAMES) -> None:
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(frames)
+        print(f"[MEMDIAG] tracemalloc started ({frames} frames)")
+
+
+def stop() -> None:
+    with _lock:
+        _snapshots.clear()
+        _snapshot_times.clear()
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+
+def authorized(token: Optional[str]) -> bool:
+    return bool(MEMDIAG and MEMDIAG_TOKEN and token) and hmac.compare_digest(token, MEMDIAG_TOKEN)
+
+
+# ============================================================
+# tracemalloc snapshots, top allocators and diffs
+# ============================================================
+
+def take_snapshot(label: Optional[str] = None) -> str:
+    """Store a filtered snapshot under label (default: snapshot-<n>); returns the label"""
+    if not tracemalloc.is_tracing():
+        raise RuntimeError("tracemalloc is not running (set MEMDIAG=1)")
+    snapshot = tracemalloc.take_snapshot().filter_traces(_IGNORED)
+    with _lock:
+        label = label or f"snapshot-{next(_snapshot_numbers)}"
+        _snapshots.pop(label, None)
+        _snapshots[label] = snapshot
+        _snapshot_times[label] = time.time()
+        while len(_snapshots) > MEMDIAG_MAX_SNAPSHOTS:
+            dropped, _ = _snapshots.popitem(last=False)
+            _snapshot_times.pop(dropped, None)
+    return label
+
+
+def list_snapshots() -> List[Dict[str, Any]]:
+    with _lock:
+        return [
+            {"label": label, "taken_at": _snapshot_times.get(label),
+             "traced_mb": round(sum(s.size for s in snap.statistics("filename")) / 1e6, 2)}
+            for label, snap in _snapshots.items()
+        ]
+
+
+def _get_snapshot(label: Optional[str]) -> tracemalloc.Snapshot:
+    with _lock:
+        if label is None:
+            if not _snapshots:
+                raise KeyError("no snapshots taken")
+            return next(reversed(_snapshots.values()))
+        if label not in _snapshots:
+            raise KeyError(f"unknown snapshot {label!r}")
+        return _snapshots[label]
+
+
+def _module_of(filename: str) -> str:
+    """Dotted module name for a source file (project-relative, else the site-packages/stdlib name)"""
+    path = os.path.abspath(filename)
+    for root in sorted({os.getcwd()} | {os.path.abspath(p) for p in sys.path if p}, key=len, reverse=True):
+        if path.startswith(root + os.sep):
+            rel = os.path.relpath(path, root)
+            return os.path.splitext(rel)[0].replace(os.sep, ".").replace(".__init__", "")
+    return filename
+
+
+def _key_type(group_by: str) -> str:
+    if group_by not in GROUP_BY:
+        raise ValueError(f"group_by must be one of {GROUP_BY}")
+    return "filename" if group_by == "module" else group_by
+
+
+def _frame_label(stat_traceback, group_by: str) -> str:
+    frame = stat_traceback[0]
+    if group_by == "module":
+        return _module_of(frame.filename)
+    if group_by == "filename":
+        return frame.filename
+    if group_by == "lineno":
+        return f"{frame.filename}:{frame.lineno}"
+    return " <- ".join(f"{f.filename}:{f.lineno}" for f in stat_traceback)
+
+
+def _merge_by_module(rows: List[Dict[str, Any]], size_key: str) -> List[Dict[str, Any]]:
+    merged: Dict[str, Dict[str, Any]] = {}
+    for row in rows:
+        entry = merged.setdefault(row["where"], {k: 0 for k in row if k != "where"})
+        for k, v in row.items():
+            if k != "where":
+                entry[k] += v
+    out = [{"where": where, **values} for where, values in merged.items()]
+    out.sort(key=lambda r: abs(r[size_key]), reverse=True)
+    return out
+
+
+def top_allocators(label: Optional[str] = None, group_by: str = "lineno", limit: int = 20) -> Dict[str, Any]:
+    """Largest live allocation sites in a snapshot (the latest one by default)"""
+    snapshot = _get_snapshot(label)
+    stats = snapshot.statistics(_key_type(group_by))
+    rows = [{"where": _frame_label(s.traceback, group_by), "size_kb": round(s.size / 1024, 1), "count": s.count}
+            for s in stats]
+    if group_by == "module":
+        rows = _merge_by_module(rows, "size_kb")
+    return {
+        "group_by": group_by,
+        "total_kb": round(sum(s.size for s in stats) / 1024, 1),
+        "top": rows[:limit],
+    }
+
+
+def diff(before: str, after: Optional[str] = None, group_by: str = "lineno", limit: int = 20) -> Dict[str, Any]:
+    """Growth between two snapshots, largest change first"""
+    old, new = _get_snapshot(before), _get_snapshot(after)
+    stats = new.compare_to(old, _key_type(group_by))
+    rows = [{"where": _frame_label(s.traceback, group_by),
+             "size_diff_kb": round(s.size_diff / 1024, 1), "size_kb": round(s.size / 1024, 1),
+             "count_diff": s.count_diff}
+            for s in stats if s.size_diff or s.count_diff]
+    if group_by == "module":
+        rows = _merge_by_module(rows, "size_diff_kb")
+    return {
+        "before": before,
+        "after": after or next(reversed(_snapshots)),
+        "group_by": group_by,
+        "growth_kb": round(sum(s.size_diff for s in stats) / 1024, 1),
+        "top": rows[:limit],
+    }
+
+
+# ============================================================
+# Object counts and size estimates (gc heap walk, on demand)
+# ============================================================
+
+def _is_agent_state(obj: dict) -> bool:
+    # isinstance check skips AgentState.__annotations__, which has the same keys
+    return "session_id" in obj and "slots" in obj and isinstance(obj.get("history"), list)
+
+
+def deep_sizeof(obj: Any, seen: Optional[set] = None) -> int:
+    """sys.getsizeof over obj and everything reachable through containers (shared objects counted once)"""
+    seen = set() if seen is None else seen
+    total = 0
+    stack = [obj]
+    while stack:
+        item = stack.pop()
+        if id(item) in seen:
+            continue
+        seen.add(id(item))
+        total += sys.getsizeof(item, 0)
+        if isinstance(item, dict):
+            stack.extend(item.keys())
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple, set, frozenset)):
+            stack.extend(item)
+        elif hasattr(item, "__dict__") and not isinstance(item, type):
+            stack.append(vars(item))
+    return total
+
+
+def object_counts(limit: int = 25) -> Dict[str, Any]:
+    """
+    Live gc-tracked objects by type, plus agent state dicts and the history message
+    dicts they hold (dicts of plain strings are not gc-tracked, so they are counted
+    through the states that reference them).
+    """
+    gc.collect()
+    by_type: Dict[str, int] = {}
+    states = messages = 0
+    for obj in gc.get_objects():
+        name = type(obj).__name__
+        by_type[name] = by_type.get(name, 0) + 1
+        if name == "dict" and _is_agent_state(obj):
+            states += 1
+            messages += len(obj.get("history") or [])
+    top = sorted(by_type.items(), key=lambda kv: kv[1], reverse=True)[:limit]
+    return {
+        "agent_state_dicts": states,
+        "message_dicts": messages,
+        "by_type": [{"type": name, "count": count} for name, count in top],
+    }
+
+
+def session_estimates(limit: int = 20) -> Dict[str, Any]:
+    """
+    Live agent states grouped by session_id with their deep size. One session normally
+    has one state alive between requests; more copies point at references kept past a turn.
+    """
+    gc.collect()
+    sessions: Dict[str, Dict[str, Any]] = {}
+    for obj in gc.get_objects():
+        if type(obj) is dict and _is_agent_state(obj):
+            entry = sessions.setdefault(str(obj.get("session_id")), {"copies": 0, "bytes": 0, "history": 0})
+            entry["copies"] += 1
+            entry["bytes"] += deep_sizeof(obj)
+            entry["history"] = max(entry["history"], len(obj.get("history") or []))
+    rows = [{"session_id": sid, **entry} for sid, entry in sessions.items()]
+    rows.sort(key=lambda r: r["bytes"], reverse=True)
+    return {"sessions": len(rows), "total_bytes": sum(r["bytes"] for r in rows), "top": rows[:limit]}
+
+
+def _module_caches() -> Dict[str, Callable[[], Any]]:
+    """Long-lived module-level structures worth watching, imported lazily"""
+    def attr(module: str, name: str) -> Callable[[], Any]:
+        return lambda: getattr(sys.modules[module], name)
+    return {
+        "scheme_shards": attr("tools.scheme_content_store", "_shards"),
+        "search_indexes": lambda: dict(sys.modules["tools.scheme_search"]._indexes),
+        "llm_backends": attr("llm_backend", "_instances"),
+        "llm_inflight": attr("llm_backend", "_inflight"),
+        "llm_prefetched": attr("llm_backend", "_prefetched"),
+        "speculation_partials": attr("langgraph_speculation", "_last_partial"),
+        "prefetch_profiles": attr("langgraph_prefetch", "_recent"),
+        "eligibility_results": attr("tools.eligibility_engine", "_results"),
+        "scheme_api_bodies": attr("scheme_api", "_bodies"),
+        "turns_inflight": attr("turn_dedup", "_inflight"),
+        "metrics_counters": attr("metrics", "_counters"),
+    }
+
+
+def cache_sizes() -> Dict[str, Any]:
+    sizes = {}
+    for name, getter in _module_caches().items():
+        try:
+            value = getter()
+        except (KeyError, AttributeError):
+            continue  # module not loaded in this process
+        sizes[name] = {"entries": len(value), "bytes": deep_sizeof(value)}
+    return sizes
+
+
+def process_memory() -> Dict[str, Any]:
+    info: Dict[str, Any] = {"tracing": tracemalloc.is_tracing()}
+    if tracemalloc.is_tracing():
+        current, peak = tracemalloc.get_traced_memory()
+        info["traced_mb"] = round(current / 1e6, 2)
+        info["traced_peak_mb"] = round(peak / 1e6, 2)
+        info["tracemalloc_overhead_mb"] = round(tracemalloc.get_tracemalloc_memory() / 1e6, 2)
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith(("VmRSS:", "VmHWM:")):
+                    key = "rss_mb" if line.startswith("VmRSS") else "rss_peak_mb"
+                    info[key] = round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return info
+
+
+if MEMDIAG:
+    start()
@@ -0,0 +1,213 @@
+import functools
+import hashlib
+import json
+import keyword
+import os
+import re
+import string
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+# Response message catalogs: data/messages/<language>.json
+#   {"language": "en", "name": "English", "speech_lang": "en-IN", "messages": {key: template}}
+# Templates use str.format fields ("మీ వయసు {age} సంవత్సరాలు."). Every catalog is
+# validated once, on first use, and each message bound to str.format, so a turn pays
+# a dict lookup and a call whatever the language. Keys missing from a catalog, or
+# whose fields differ from the default catalog's, fall back to the default language
+# at compile time.
+MESSAGES_DIR = os.getenv("MESSAGES_DIR", "data/messages")
+DEFAULT_LANGUAGE = os.getenv("DEFAULT_LANGUAGE", "te")
+# Share of letters in a script needed to take the language from the user's text
+SCRIPT_DETECT_MIN_SHARE = 0.6
+# Scripts that identify a supported language (Latin text is ambiguous and never does)
+_SCRIPTS = {
+    "te": re.compile(r"[ఀ-౿]"),
+    "hi": re.compile(r"[ऀ-ॿ]"),
+    "ur": re.compile(r"[؀-ۿݐ-ݿ]"),
+}
+_LETTER_RE = re.compile(r"[^\W\d_]")
+
+class Catalog:
+    """Compiled messages of one language"""
+
+    def __init__(self, language: str, name: str, speech_lang: str, messages: Dict[str, Callable[..., str]]):
+        self.language = language
+        self.name = name
+        self.speech_lang = speech_lang
+        self.messages = messages
+
+
+_lock = threading.Lock()
+_catalogs: Optional[Dict[str, Catalog]] = None
+_catalog_version = ""
+
+
+def _fields(template: str) -> List[str]:
+    return [field for _, field, _, _ in string.Formatter().parse(template) if field is not None]
+
+
+def compile_template(template: str) -> Callable[..., str]:
+    """
+    Validate a str.format template and bind it into a function of its fields, e.g.
+    "{n}. {name}" -> f(n=1, name="...", extra=...) == "1. ..." (extra fields are ignored).
+    Fields must be plain names (no attribute or index access) and format specs may not
+    nest fields, so a catalog can only substitute the values it is given.
+    """
+    for _, field, spec, conversion in string.Formatter().parse(template):
+        if field is None:
+            continue
+        if not field.isidentifier() or keyword.iskeyword(field):
+            raise ValueError(f"invalid field {field!r} in {template!r}")
+        if conversion not in (None, "r", "s", "a"):
+            raise ValueError(f"invalid conversion {conversion!r} in {template!r}")
+        # A nested field ("{x:{y.attr}}") would be formatted with attribute access
+        if spec and ("{" in spec or "}" in spec):
+            raise ValueError(f"invalid format spec {spec!r} in {template!r}")
+    return functools.partial(str.format, template)
+
+
+def _read_catalog(path: str) -> Dict[str, Any]:
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    messages = data.get("messages")
+    if not isinstance(messages, dict) or not all(isinstance(v, str) for v in messages.values()):
+        raise ValueError(f"{path}: 'messages' must map keys to template strings")
+    return data
+
+
+def _load_catalogs() -> Dict[str, Catalog]:
+    global _catalog_version
+    raw: Dict[str, Dict[str, Any]] = {}
+    for filename in sorted(os.listdir(MESSAGES_DIR)):
+        if filename.endswith(".json"):
+            data = _read_catalog(os.path.join(MESSAGES_DIR, filename))
+            raw[data.get("language") or filename[:-5]] = data
+    if DEFAULT_LANGUAGE not in raw:
+        raise ValueError(f"{MESSAGES_DIR}: no catalog for the default language {DEFAULT_LANGUAGE!r}")
+
+    base_templates = raw[DEFAULT_LANGUAGE]["messages"]
+    base = {key: compile_template(t) for key, t in base_templates.items()}
+    catalogs: Dict[str, Catalog] = {}
+    for language, data in raw.items():
+        messages = dict(base)
+        if language != DEFAULT_LANGUAGE:
+            for key, template in data["messages"].items():
+                if key not in base_templates:
+                    print(f"[MESSAGES] {language}: unknown key {key!r} ignored")
+                elif sorted(set(_fields(template))) != sorted(set(_fields(base_templates[key]))):
+                    print(f"[MESSAGES] {language}: fields of {key!r} differ from {DEFAULT_LANGUAGE}; using {DEFAULT_LANGUAGE}")
+                else:
+                    messages[key] = compile_template(template)
+            missing = sorted(set(base_templates) - set(data["messages"]))
+            if missing:
+                print(f"[MESSAGES] {language}: {len(missing)} keys fall back to {DEFAULT_LANGUAGE}: {missing[:5]}")
+        catalogs[language] = Catalog(language, data.get("name", language), data.get("speech_lang", language), messages)
+    _catalog_version = hashlib.sha1(json.dumps(raw, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()[:12]
+    print(f"[MESSAGES] Compiled catalogs: {', '.join(catalogs)} (version {_catalog_version})")
+    return catalogs
+
+
+def get_catalogs() -> Dict[str, Catalog]:
+    global _catalogs
+    if _catalogs is None:
+        with _lock:
+            if _catalogs is None:
+                _catalogs = _load_catalogs()
+    return _catalogs
+
+
+def catalog_version() -> str:
+    """Content hash of the loaded catalogs (part of cache keys for rendered text)"""
+    get_catalogs()
+    return _catalog_version
+
+
+def supported_languages() -> List[str]:
+    return list(get_catalogs())
+
+
+def speech_lang(language: Optional[str]) -> str:
+    """BCP 47 tag for browser speech recognition/synthesis, e.g. "te-IN" """
+    catalogs = get_catalogs()
+    return (catalogs.get(language) or catalogs[DEFAULT_LANGUAGE]).speech_lang
+
+
+def msg(language: Optional[str], key: str, **params: Any) -> str:
+    """The message `key` in `language` (default language when unsupported) with params filled in"""
+    catalogs = get_catalogs()
+    catalog = catalogs.get(language) or catalogs[DEFAULT_LANGUAGE]
+    return catalog.messages[key](**params)
+
+
+def has_message(key: str) -> bool:
+    return key in get_catalogs()[DEFAULT_LANGUAGE].messages
+
+
+def localized(record: Dict[str, Any], field: str, language: Optional[str]) -> Any:
+    """record["<field>_<language>"], falling back to the Telugu field the catalog data is written in"""
+    value = record.get(f"{field}_{language}") if language else None
+    return value if value else record.get(f"{field}_te")
+
+
+# ============================================================
+# Language negotiation
+# ============================================================
+
+def _supported(tag: Optional[str]) -> Optional[str]:
+    """Catalog language for a tag like "hi", "hi-IN" or "HI_in", else None"""
+    if not tag or not isinstance(tag, str):
+        return None
+    language = tag.strip().lower().replace("_", "-").split("-")[0]
+    return language if language in get_catalogs() else None
+
+
+def detect_script_language(text: str) -> Optional[str]:
+    """Language of the script most of the text's letters are written in (Telugu, Devanagari, Arabic)"""
+    letters = _LETTER_RE.findall(text or "")
+    if not letters:
+        return None
+    for language, pattern in _SCRIPTS.items():
+        if language in get_catalogs():
+            share = sum(1 for ch in letters if pattern.match(ch)) / len(letters)
+            if share >= SCRIPT_DETECT_MIN_SHARE:
+                return language
+    return None
+
+
+def parse_accept_language(header: Optional[str]) -> List[str]:
+    """Supported languages of an Accept-Language header, by descending q"""
+    ranked = []
+    for i, part in enumerate((header or "").split(",")):
+        tag, _, params = part.strip().partition(";")
+        q = 1.0
+        match = re.search(r"q=([0-9.]+)", params)
+        if match:
+            try:
+                q = float(match.group(1))
+            except ValueError:
+                q = 0.0
+        language = _supported(tag)
+        if language and q > 0:
+            ranked.append((-q, i, language))
+    seen: List[str] = []
+    for _, _, language in sorted(ranked):
+        if language not in seen:
+            seen.append(language)
+    return seen
+
+
+def negotiate(requested: Optional[str] = None, current: Optional[str] = None, text: str = "",
+              accept_language: Optional[str] = None) -> str:
+    """
+    Response language for a turn, first match wins:
+      1. the language the client asked for (request field "language")
+      2. the script the user wrote or spoke in (Telugu, Devanagari -> hi, Arabic -> ur)
+      3. the session's language from earlier turns
+      4. Accept-Language
+      5. DEFAULT_LANGUAGE
+    """
+    language = _supported(requested) or detect_script_language(text) or _supported(current)
+    if language:
+        return language
+    preferred = parse_accept_language(accept_language)
+    return preferred[0] if preferred else DEFAULT_LANGUAGE
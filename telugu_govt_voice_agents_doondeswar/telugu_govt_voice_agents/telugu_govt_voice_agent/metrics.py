@@ -0,0 +1,83 @@
+import math
+import threading
+from typing import Any, Dict
+
+# Minimal in-process metrics: counters and summary observations (count/sum/min/max/last),
+# exposed as JSON by GET /metrics.
+_lock = threading.Lock()
+_counters: Dict[str, float] = {}
+_observations: Dict[str, Dict[str, float]] = {}
+
+
+def incr(name: str, value: float = 1) -> None:
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + value
+
+
+def observe(name: str, value: float) -> None:
+    with _lock:
+        obs = _observations.get(name)
+        if obs is None:
+            _observations[name] = {"count": 1, "sum": value, "min": value, "max": value, "last": value}
+            return
+        obs["count"] += 1
+        obs["sum"] += value
+        obs["min"] = min(obs["min"], value)
+        obs["max"] = max(obs["max"], value)
+        obs["last"] = value
+
+
+def set_value(name: str, value: Any) -> None:
+    """Gauge-style metric that simply holds the latest value"""
+    with _lock:
+        _counters[name] = value
+
+
+def snapshot() -> Dict[str, Any]:
+    with _lock:
+        observations = {}
+        for name, obs in _observations.items():
+            entry = dict(obs)
+            entry["avg"] = obs["sum"] / obs["count"] if obs["count"] else 0.0
+            observations[name] = entry
+        return {"counters": dict(_counters), "observations": observations}
+
+
+def reset() -> None:
+    with _lock:
+        _counters.clear()
+        _observations.clear()
+
+
+class Histogram:
+    """
+    Fixed log-spaced buckets (about 5% relative error) for streaming percentiles
+    over any number of observations in constant memory.
+    """
+
+    def __init__(self, growth: float = 1.1, smallest: float = 0.01):
+        self.growth = growth
+        self.smallest = smallest
+        self.buckets: Dict[int, int] = {}
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, value: float) -> None:
+        index = 0 if value <= self.smallest else int(math.log(value / self.smallest, self.growth)) + 1
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def percentile(self, q: float) -> float:
+        if not self.count:
+            return 0.0
+        rank = q / 100.0 * self.count
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= rank:
+                # Upper edge of the bucket, capped at the largest value seen
+                return min(self.max, self.smallest * self.growth ** index)
+        return self.max
@@ -0,0 +1,274 @@
+import contextvars
+import hmac
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, deque
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# In-process statistical profiler for individual requests.
+#
+# A request is profiled when it is sampled (PROFILE_SAMPLE_RATE, e.g. 0.01) or sends
+# X-Profile: <PROFILE_TOKEN>. While at least one profiled request is running, one
+# background thread wakes every PROFILE_INTERVAL_MS, reads the stacks of the threads
+# serving those requests (sys._current_frames) and counts them as collapsed stacks
+# whose first frame is the graph node running at the time ("node:planner"), or
+# "request:/agent" outside the graph. Samples are wall-clock, so time spent waiting
+# on the LLM shows up under the frame that waits. Requests that are not profiled pay
+# one random() call; with none in flight the sampler thread sleeps.
+# Stacks are aggregated across requests and kept per request for the last
+# PROFILE_KEEP_REQUESTS; GET /admin/profile serves them as collapsed text or speedscope JSON.
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN", "")
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+PROFILE_KEEP_REQUESTS = int(os.getenv("PROFILE_KEEP_REQUESTS", "50"))
+PROFILE_MAX_STACKS = int(os.getenv("PROFILE_MAX_STACKS", "50000"))
+PROFILE_MAX_DEPTH = 128
+# Request stacks start below Flask's dispatch (at the view function)
+_DISPATCH_FRAME = "flask.app.Flask.dispatch_request"
+_TRUNCATED = "[truncated]"
+
+
+class Profile:
+    """Samples of one profiled request"""
+
+    def __init__(self, path: str):
+        self.id = uuid.uuid4().hex[:12]
+        self.path = path
+        self.started = time.time()
+        self.duration_ms = 0.0
+        self.samples: Counter = Counter()
+
+
+_active: contextvars.ContextVar = contextvars.ContextVar("profile", default=None)
+_lock = threading.Lock()
+# thread id -> stack of (profile, tag, base frame); the innermost entry tags the samples
+_threads: Dict[int, List[Tuple[Profile, str, Any]]] = {}
+_wakeup = threading.Event()
+_sampler: Optional[threading.Thread] = None
+_aggregate: Counter = Counter()
+_aggregate_requests = 0
+_recent: "deque[Profile]" = deque(maxlen=PROFILE_KEEP_REQUESTS)
+_frame_files: Dict[str, Tuple[str, int]] = {}
+
+
+def authorized(token: Optional[str]) -> bool:
+    return bool(PROFILE_TOKEN and token) and hmac.compare_digest(token, PROFILE_TOKEN)
+
+
+def should_profile(header_token: Optional[str] = None) -> bool:
+    if header_token is not None and authorized(header_token):
+        return True
+    return PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE
+
+
+# ============================================================
+# Request and node scopes
+# ============================================================
+
+def _push(profile: Profile, tag: str, base) -> None:
+    with _lock:
+        _threads.setdefault(threading.get_ident(), []).append((profile, tag, base))
+    _wakeup.set()
+
+
+def _pop() -> None:
+    with _lock:
+        tid = threading.get_ident()
+        stack = _threads.get(tid)
+        if stack:
+            stack.pop()
+            if not stack:
+                del _threads[tid]
+
+
+def begin(path: str):
+    """Start profiling the current request; returns (profile, token) for end()"""
+    _ensure_sampler()
+    profile = Profile(path)
+    _push(profile, f"request:{path}", None)
+    return profile, _active.set(profile)
+
+
+def end(handle) -> Profile:
+    global _aggregate_requests
+    profile, token = handle
+    _pop()
+    _active.reset(token)
+    profile.duration_ms = round((time.time() - profile.started) * 1000, 1)
+    with _lock:
+        for stack, count in profile.samples.items():
+            if stack in _aggregate or len(_aggregate) < PROFILE_MAX_STACKS:
+                _aggregate[stack] += count
+            else:
+                _aggregate[_TRUNCATED] += count
+        _aggregate_requests += 1
+        _recent.append(profile)
+    return profile
+
+
+def tagged(name: str, fn: Callable) -> Callable:
+    """Wrap a graph node so samples taken while it runs are tagged node:<name>"""
+    def wrapper(state):
+        profile = _active.get()
+        if profile is None:
+            return fn(state)
+        _push(profile, f"node:{name}", sys._getframe())
+        try:
+            return fn(state)
+        finally:
+            _pop()
+    wrapper.__name__ = getattr(fn, "__name__", name)
+    return wrapper
+
+
+# ============================================================
+# Sampler thread
+# ============================================================
+
+def _frame_name(frame) -> str:
+    code = frame.f_code
+    name = f"{frame.f_globals.get('__name__', '?')}.{getattr(code, 'co_qualname', code.co_name)}"
+    if name not in _frame_files:
+        _frame_files[name] = (code.co_filename, code.co_firstlineno)
+    return name
+
+
+def _collapse(frame, base) -> List[str]:
+    names = []
+    while frame is not None and frame is not base and len(names) < PROFILE_MAX_DEPTH:
+        name = _frame_name(frame)
+        if name == _DISPATCH_FRAME:
+            break
+        names.append(name)
+        frame = frame.f_back
+    names.reverse()
+    return names
+
+
+def _sample_once() -> None:
+    with _lock:
+        targets = {tid: stack[-1] for tid, stack in _threads.items() if stack}
+    if not targets:
+        return
+    frames = sys._current_frames()
+    counted = []
+    for tid, (profile, tag, base) in targets.items():
+        frame = frames.get(tid)
+        if frame is not None:
+            counted.append((profile, ";".join([tag] + _collapse(frame, base))))
+    del frames
+    with _lock:
+        # end() reads a request's samples under the same lock
+        for profile, stack in counted:
+            profile.samples[stack] += 1
+
+
+def _run() -> None:
+    interval = PROFILE_INTERVAL_MS / 1000.0
+    while True:
+        _wakeup.wait()
+        with _lock:
+            if not _threads:
+                _wakeup.clear()
+                continue
+        try:
+            _sample_once()
+        except Exception as e:
+            print(f"[PROFILE] Sampling failed: {e}")
+        time.sleep(interval)
+
+
+def _ensure_sampler() -> None:
+    global _sampler
+    if _sampler is None:
+        with _lock:
+            if _sampler is None:
+                _sampler = threading.Thread(target=_run, name="profile-sampler", daemon=True)
+                _sampler.start()
+
+
+# ============================================================
+# Reports
+# ============================================================
+
+def _samples_for(request_id: Optional[str]) -> Tuple[Counter, str]:
+    with _lock:
+        if request_id:
+            for profile in _recent:
+                if profile.id == request_id:
+                    return Counter(profile.samples), f"{profile.path} {profile.id}"
+            raise KeyError(f"unknown profile {request_id!r}")
+        return Counter(_aggregate), f"{_aggregate_requests} requests"
+
+
+def collapsed(request_id: Optional[str] = None) -> str:
+    """Brendan Gregg's folded format: one 'frame;frame;frame count' line per stack"""
+    samples, _ = _samples_for(request_id)
+    return "".join(f"{stack} {count}\n" for stack, count in samples.most_common())
+
+
+def speedscope(request_id: Optional[str] = None) -> Dict[str, Any]:
+    """Sampled profile in speedscope's file format (https://www.speedscope.app)"""
+    samples, name = _samples_for(request_id)
+    frames: List[Dict[str, Any]] = []
+    index: Dict[str, int] = {}
+    stacks, weights = [], []
+    for stack, count in samples.most_common():
+        ids = []
+        for frame in stack.split(";"):
+            if frame not in index:
+                index[frame] = len(frames)
+                file, line = _frame_files.get(frame, (None, None))
+                frames.append({"name": frame, "file": file, "line": line} if file else {"name": frame})
+            ids.append(index[frame])
+        stacks.append(ids)
+        weights.append(count * PROFILE_INTERVAL_MS)
+    return {
+        "$schema": "https://www.speedscope.app/file-format-schema.json",
+        "shared": {"frames": frames},
+        "profiles": [{
+            "type": "sampled",
+            "name": name,
+            "unit": "milliseconds",
+            "startValue": 0,
+            "endValue": sum(weights),
+            "samples": stacks,
+            "weights": weights,
+        }],
+        "name": f"telugu agent {name}",
+        "exporter": "sampling_profiler.py",
+    }
+
+
+def summary(limit: int = 10) -> Dict[str, Any]:
+    """Samples per tag (node) and the functions with the most self samples under each"""
+    samples, _ = _samples_for(None)
+    tags: Dict[str, Counter] = {}
+    for stack, count in samples.items():
+        parts = stack.split(";")
+        leaves = tags.setdefault(parts[0], Counter())
+        leaves[parts[-1]] += count
+    with _lock:
+        recent = [{"id": p.id, "path": p.path, "started": p.started, "duration_ms": p.duration_ms,
+                   "samples": sum(p.samples.values())} for p in reversed(_recent)]
+    return {
+        "requests": _aggregate_requests,
+        "interval_ms": PROFILE_INTERVAL_MS,
+        "tags": {
+            tag: {"samples": sum(leaves.values()), "top_self": leaves.most_common(limit)}
+            for tag, leaves in sorted(tags.items(), key=lambda kv: -sum(kv[1].values()))
+        },
+        "recent": recent,
+    }
+
+
+def reset() -> None:
+    global _aggregate_requests
+    with _lock:
+        _aggregate.clear()
+        _aggregate_requests = 0
+        _recent.clear()
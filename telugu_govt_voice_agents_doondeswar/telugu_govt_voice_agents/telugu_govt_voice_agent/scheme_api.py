@@ -0,0 +1,291 @@
+import gzip
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from flask import Response, request
+import metrics
+from message_catalog import catalog_version, localized, negotiate
+from langgraph_nodes import _eligibility_profile
+from tools.eligibility_engine import check_eligibility
+from tools.scheme_content_store import get_catalog, get_scheme_shard
+from tools.scheme_details_tool import get_eligibility_text, get_scheme_details
+from tools.state_registry import normalize_state, state_codes
+
+try:
+    import brotli
+except ImportError:  # br is offered only when the brotli package is installed
+    brotli = None
+
+# Read-only scheme API (GET /schemes, /schemes/<id>, GET/POST /eligibility).
+# Every GET response has a strong ETag computed from the catalog version of the
+# shards it reads, the message catalog version and the request parameters, so a
+# conditional GET is answered 304 from the cached body, and a reverse proxy can keep
+# serving its copy for SCHEME_API_MAX_AGE seconds (and revalidate cheaply after).
+# Bodies are built once per ETag and kept, with their gzip/br encodings, in a small
+# LRU; each encoding has its own ETag ("<tag>-gzip", "<tag>-br"), and a 304 carries
+# the same ETag the 200 would (no suffix when the body is too small to compress).
+SCHEME_API_MAX_AGE = int(os.getenv("SCHEME_API_MAX_AGE", "60"))
+SCHEME_API_STALE_SECONDS = int(os.getenv("SCHEME_API_STALE_SECONDS", "300"))
+SCHEME_API_CACHE_SIZE = int(os.getenv("SCHEME_API_CACHE_SIZE", "256"))
+# Smaller bodies are not worth compressing
+SCHEME_API_MIN_COMPRESS_BYTES = 512
+# Bump when the response shape changes so old ETags stop matching
+API_FORMAT = "1"
+
+_lock = threading.Lock()
+_bodies: "OrderedDict[str, Dict[str, bytes]]" = OrderedDict()
+
+
+class ApiError(Exception):
+    """Client error, returned as {"error": message} with `status`"""
+
+    def __init__(self, message: str, status: int = 400):
+        super().__init__(message)
+        self.status = status
+
+
+# ============================================================
+# Resources
+# ============================================================
+
+def request_language() -> str:
+    """?language=, else Accept-Language, else the default language"""
+    return negotiate(request.args.get("language"), None, "", request.headers.get("Accept-Language"))
+
+
+def list_filters(args: Dict[str, Any]) -> Tuple[Optional[str], Optional[str]]:
+    """(state code, category) of a /schemes query, normalized so equivalent queries share an ETag"""
+    state = args.get("state") or None
+    if state is not None:
+        code = normalize_state(state)
+        if code is None:
+            raise ApiError(f"unknown state {state!r}; known: {', '.join(state_codes())}")
+        state = code
+    category = (args.get("category") or "").strip().lower() or None
+    return state, category
+
+
+def _store_for(state: Optional[str]):
+    return get_catalog(state)
+
+
+def _shard_for(scheme_id: str):
+    store = get_scheme_shard(scheme_id)
+    if store is None or scheme_id not in store.by_id:
+        raise ApiError(f"unknown scheme {scheme_id!r}", 404)
+    return store
+
+
+def list_version(state: Optional[str]) -> str:
+    return _store_for(state).version
+
+
+def list_schemes(state: Optional[str], category: Optional[str], language: str) -> Dict[str, Any]:
+    store = _store_for(state)
+    in_category = set(store.by_category.get(category, [])) if category else None
+    schemes = []
+    for st in [state] if state else state_codes():
+        for sid in store.by_state.get(st, []):
+            if in_category is not None and sid not in in_category:
+                continue
+            record = store.by_id[sid]
+            schemes.append({
+                "scheme_id": sid,
+                "name": localized(record, "scheme_name", language),
+                "state": st,
+                "categories": record.get("categories", []),
+                "eligibility": get_eligibility_text(sid, store, language),
+            })
+    return {"version": store.version, "language": language, "count": len(schemes), "schemes": schemes}
+
+
+def scheme_version(scheme_id: str) -> str:
+    return _shard_for(scheme_id).version
+
+
+def scheme_detail(scheme_id: str, language: str) -> Dict[str, Any]:
+    store = _shard_for(scheme_id)
+    record = store.by_id[scheme_id]
+    details = get_scheme_details(scheme_id, language)
+    return {
+        "version": store.version,
+        "language": language,
+        "scheme_id": scheme_id,
+        "name": details.get("scheme_name"),
+        "names": {k[len("scheme_name_"):]: v for k, v in record.items() if k.startswith("scheme_name_")},
+        "state": details.get("state"),
+        "categories": record.get("categories", []),
+        "description": details.get("description"),
+        "benefits": details.get("benefits", []),
+        "documents_required": details.get("documents_required", []),
+        "application_process": details.get("application_process", {}),
+        "eligibility": details.get("eligibility"),
+        "rules": store.rules_by_id.get(scheme_id, {}),
+    }
+
+
+def parse_profile(data: Dict[str, Any]) -> Dict[str, Any]:
+    """check_eligibility profile from request fields (query strings arrive as text)"""
+    if not isinstance(data, dict):
+        raise ApiError("expected a JSON object with profile fields")
+    slots: Dict[str, Any] = {}
+    for key, value in data.items():
+        if key == "language" or value in (None, ""):
+            continue
+        if key in {"age", "income"}:
+            try:
+                value = int(float(value))
+            except (TypeError, ValueError):
+                raise ApiError(f"{key} must be a number")
+        elif key == "state":
+            code = normalize_state(value)
+            if code is None:
+                raise ApiError(f"unknown state {value!r}; known: {', '.join(state_codes())}")
+            value = code
+        elif isinstance(value, str) and value.strip().lower() in {"true", "false"}:
+            value = value.strip().lower() == "true"
+        slots[key] = value
+    return _eligibility_profile(slots)
+
+
+def eligibility_version(profile: Dict[str, Any]) -> str:
+    return get_catalog(profile.get("state")).version
+
+
+def eligibility(profile: Dict[str, Any], language: str) -> Dict[str, Any]:
+    store = get_catalog(profile.get("state"))
+    eligible = []
+    for sid in check_eligibility(profile):
+        shard = store if sid in store.by_id else get_scheme_shard(sid)
+        record = shard.by_id.get(sid, {}) if shard is not None else {}
+        eligible.append({
+            "scheme_id": sid,
+            "name": localized(record, "scheme_name", language) or sid,
+            "state": record.get("state"),
+        })
+    return {"version": store.version, "language": language, "profile": profile,
+            "count": len(eligible), "eligible": eligible}
+
+
+# ============================================================
+# HTTP caching
+# ============================================================
+
+def _etag_base(version: str, params: Dict[str, Any]) -> str:
+    key = json.dumps([API_FORMAT, version, catalog_version(), request.path, params], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:20]
+
+
+def _accepted_encodings() -> List[str]:
+    """Encodings we can produce that the client accepts, best first"""
+    accepted: Dict[str, float] = {}
+    for part in request.headers.get("Accept-Encoding", "").split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        if params.strip().startswith("q="):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                q = 0.0
+        if name:
+            accepted[name.strip().lower()] = q
+    offered = (["br"] if brotli is not None else []) + ["gzip"]
+    return [enc for enc in offered if accepted.get(enc, accepted.get("*", 0)) > 0]
+
+
+def _if_none_match(base: str) -> bool:
+    header = request.headers.get("If-None-Match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    for tag in header.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        tag = tag.strip('"')
+        # Any encoding of the same content counts (weak comparison, RFC 9110 13.1.2)
+        if tag.split("-", 1)[0] == base:
+            return True
+    return False
+
+
+def _cached_bodies(base: str, build: Callable[[], Dict[str, Any]]) -> Dict[str, bytes]:
+    with _lock:
+        bodies = _bodies.get(base)
+        if bodies is not None:
+            _bodies.move_to_end(base)
+            metrics.incr("scheme_api.cache_hits")
+            return bodies
+    bodies = {"identity": json.dumps(build(), ensure_ascii=False, separators=(",", ":")).encode("utf-8")}
+    with _lock:
+        _bodies[base] = bodies
+        while len(_bodies) > SCHEME_API_CACHE_SIZE:
+            _bodies.popitem(last=False)
+    return bodies
+
+
+def _encoded(bodies: Dict[str, bytes], encoding: str) -> bytes:
+    body = bodies.get(encoding)
+    if body is None:
+        if encoding == "br":
+            body = brotli.compress(bodies["identity"], quality=5)
+        else:
+            body = gzip.compress(bodies["identity"], compresslevel=6, mtime=0)
+        bodies[encoding] = body
+    return body
+
+
+def _headers(etag: str, encoding: Optional[str]) -> Dict[str, str]:
+    headers = {
+        "ETag": f'"{etag}"',
+        "Cache-Control": f"public, max-age={SCHEME_API_MAX_AGE}, stale-while-revalidate={SCHEME_API_STALE_SECONDS}",
+        "Vary": "Accept-Encoding, Accept-Language",
+    }
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return headers
+
+
+def cached_json(version: Callable[[], str], params: Dict[str, Any], build: Callable[[], Dict[str, Any]]) -> Response:
+    """
+    GET response for a resource whose content is fixed by (version(), params):
+    304 on a matching If-None-Match, else the cached body in the best accepted encoding
+    """
+    metrics.incr("scheme_api.requests")
+    try:
+        base = _etag_base(version(), params)
+        not_modified = _if_none_match(base)
+        # The body (usually already cached) decides the encoding, for the 304 as for the 200
+        bodies = _cached_bodies(base, build)
+    except ApiError as e:
+        return json_error(e)
+
+    encoding = None
+    if len(bodies["identity"]) >= SCHEME_API_MIN_COMPRESS_BYTES:
+        encoding = next(iter(_accepted_encodings()), None)
+    etag = base + (f"-{encoding}" if encoding else "")
+    if not_modified:
+        metrics.incr("scheme_api.not_modified")
+        return Response(status=304, headers=_headers(etag, None))
+    body = _encoded(bodies, encoding) if encoding else bodies["identity"]
+    return Response(body, mimetype="application/json", headers=_headers(etag, encoding))
+
+
+def uncached_json(data: Dict[str, Any]) -> Response:
+    """Response for POST bodies: compressed when accepted, never stored by caches"""
+    body = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    headers = {"Cache-Control": "no-store", "Vary": "Accept-Encoding"}
+    encoding = next(iter(_accepted_encodings()), None) if len(body) >= SCHEME_API_MIN_COMPRESS_BYTES else None
+    if encoding:
+        body = _encoded({"identity": body}, encoding)
+        headers["Content-Encoding"] = encoding
+    return Response(body, mimetype="application/json", headers=headers)
+
+
+def json_error(e: ApiError) -> Response:
+    body = json.dumps({"error": e.args[0]}, ensure_ascii=False).encode("utf-8")
+    return Response(body, status=e.status, mimetype="application/json", headers={"Cache-Control": "no-store"})
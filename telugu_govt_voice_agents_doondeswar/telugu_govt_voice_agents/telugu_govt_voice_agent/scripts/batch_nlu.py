@@ -0,0 +1,212 @@
+"""
+Bulk intent + slot extraction for recorded call transcripts.
+
+Runs the same NLU as intent_slot_extraction_node. Utterances the deterministic
+extractor fully covers and the intent classifier (when INTENT_MODEL_PATH is set)
+is confident about never reach the LLM. The rest are packed --batch-size per prompt with indexed JSON output,
+validated per item, and only the failed items are retried.
+
+Input: a text file (one utterance per line) or JSONL with "text" (and optional "id").
+Output: JSONL {"id", "text", "intent", "slots", "source"} appended as batches finish
+("source" is "classifier" or "llm");
+re-running with the same --out resumes where it stopped.
+
+Usage (from the project directory):
+    python scripts/batch_nlu.py transcripts.txt --out nlu.jsonl [--batch-size 20] [--concurrency 4]
+    LLM_BACKEND_BATCH_NLU=local python scripts/batch_nlu.py ...    # offline run
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+from langgraph_context import estimate_tokens  # noqa: E402
+from langgraph_nodes import FINAL_INTENTS, _merge_extracted_slots, _parse_json_lenient, _sanitize_user_text  # noqa: E402
+from langgraph_prompts import get_prompt  # noqa: E402
+from llm_backend import llm_complete  # noqa: E402
+from tools.intent_model import INTENT_MODEL_MIN_CONFIDENCE, predict_intent  # noqa: E402
+from tools.slot_extractor import extract_slots_with_coverage  # noqa: E402
+
+COMPLETION_TOKENS_PER_ITEM = 40
+
+
+def _load_items(path):
+    items = []
+    with open(path, encoding="utf-8") as f:
+        for n, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            if path.endswith(".jsonl"):
+                try:
+                    row = json.loads(line)
+                except ValueError:
+                    continue
+                text = row.get("text") or row.get("user_text") or ""
+                item_id = str(row.get("id", n))
+            else:
+                text, item_id = line, str(n)
+            items.append({"id": item_id, "text": _sanitize_user_text(text)})
+    return items
+
+
+def _done_ids(path):
+    done = set()
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    done.add(str(json.loads(line)["id"]))
+                except (ValueError, KeyError):
+                    continue  # a torn last line from an interrupted run
+    return done
+
+
+class BatchRunner:
+    def __init__(self, out_path, batch_size, concurrency, max_attempts):
+        self.out_path = out_path
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.max_attempts = max_attempts
+        self.write_lock = threading.Lock()
+        self.stats = {"deterministic": 0, "llm": 0, "failed": 0, "retried": 0, "prompts": 0,
+                      "tokens_in": 0, "tokens_out": 0}
+
+    def _write(self, records):
+        with self.write_lock:
+            with open(self.out_path, "a", encoding="utf-8") as f:
+                for rec in records:
+                    f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+
+    def _prepare(self, item):
+        """Deterministic pass; returns a finished record or None if the LLM is needed"""
+        regex_slots, covered = extract_slots_with_coverage(item["text"])
+        item["regex_slots"] = regex_slots
+        intent, confidence = predict_intent(item["text"])
+        item["model_intent"] = intent if confidence >= INTENT_MODEL_MIN_CONFIDENCE else None
+        if covered and item["model_intent"]:
+            return {"id": item["id"], "text": item["text"], "intent": item["model_intent"],
+                    "slots": _merge_extracted_slots({}, regex_slots), "source": "classifier"}
+        return None
+
+    def _run_batch(self, batch):
+        """Returns (records, failed_items) for one packed prompt"""
+        packed = json.dumps([{"i": k, "text": item["text"]} for k, item in enumerate(batch)], ensure_ascii=False)
+        messages = get_prompt("batch_nlu").render(items=packed)
+        try:
+            raw = llm_complete("batch_nlu", messages, text=packed, temperature=0,
+                               max_tokens=COMPLETION_TOKENS_PER_ITEM * len(batch) + 50)
+        except Exception as e:
+            print(f"[BATCH_NLU] Batch of {len(batch)} failed: {e}")
+            return [], batch
+        with self.write_lock:
+            self.stats["prompts"] += 1
+            self.stats["tokens_in"] += sum(estimate_tokens(m["content"]) for m in messages)
+            self.stats["tokens_out"] += estimate_tokens(raw)
+
+        by_index = {}
+        for result in _parse_json_lenient(raw).get("results", []) or []:
+            if isinstance(result, dict) and isinstance(result.get("i"), int):
+                by_index[result["i"]] = result
+
+        records, failed = [], []
+        for k, item in enumerate(batch):
+            result = by_index.get(k)
+            intent = (result or {}).get("intent")
+            slots = (result or {}).get("slots", {})
+            if not result or intent not in FINAL_INTENTS or not isinstance(slots, dict):
+                failed.append(item)
+                continue
+            records.append({
+                "id": item["id"],
+                "text": item["text"],
+                "intent": item["model_intent"] or intent,
+                "slots": _merge_extracted_slots(slots, item["regex_slots"]),
+                "source": "llm",
+            })
+        return records, failed
+
+    def run(self, items):
+        pending = []
+        deterministic = []
+        for item in items:
+            rec = self._prepare(item)
+            if rec:
+                deterministic.append(rec)
+            else:
+                item["attempts"] = 0
+                pending.append(item)
+        if deterministic:
+            self._write(deterministic)
+            self.stats["deterministic"] += len(deterministic)
+        print(f"[BATCH_NLU] {len(deterministic)} resolved deterministically, {len(pending)} need the LLM")
+
+        futures = {}
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            while pending or futures:
+                while pending and len(futures) < self.concurrency:
+                    batch, pending = pending[: self.batch_size], pending[self.batch_size:]
+                    futures[pool.submit(self._run_batch, batch)] = batch
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    futures.pop(fut)
+                    records, failed = fut.result()
+                    if records:
+                        self._write(records)
+                        self.stats["llm"] += len(records)
+                    gave_up = []
+                    for item in failed:
+                        item["attempts"] += 1
+                        if item["attempts"] >= self.max_attempts:
+                            gave_up.append({"id": item["id"], "text": item["text"], "intent": None,
+                                            "slots": {}, "source": "llm", "error": "no valid result"})
+                        else:
+                            self.stats["retried"] += 1
+                            pending.append(item)
+                    if gave_up:
+                        self._write(gave_up)
+                        self.stats["failed"] += len(gave_up)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch intent + slot extraction")
+    parser.add_argument("input", help="Text file (one utterance per line) or JSONL with 'text'")
+    parser.add_argument("--out", required=True, help="Output JSONL (also the resume checkpoint)")
+    parser.add_argument("--batch-size", type=int, default=20, help="Utterances per prompt")
+    parser.add_argument("--concurrency", type=int, default=4, help="Prompts in flight")
+    parser.add_argument("--max-attempts", type=int, default=3, help="Attempts per utterance")
+    parser.add_argument("--price-in", type=float, default=0.05, help="USD per 1M prompt tokens")
+    parser.add_argument("--price-out", type=float, default=0.08, help="USD per 1M completion tokens")
+    args = parser.parse_args()
+
+    items = _load_items(args.input)
+    done = _done_ids(args.out)
+    todo = [item for item in items if item["id"] not in done]
+    print(f"[BATCH_NLU] {len(items)} utterances, {len(done)} already done, {len(todo)} to process")
+
+    runner = BatchRunner(args.out, args.batch_size, args.concurrency, args.max_attempts)
+    t0 = time.perf_counter()
+    runner.run(todo)
+    elapsed = time.perf_counter() - t0
+
+    s = runner.stats
+    processed = s["deterministic"] + s["llm"] + s["failed"]
+    cost = (s["tokens_in"] * args.price_in + s["tokens_out"] * args.price_out) / 1e6
+    print(f"[BATCH_NLU] processed {processed} in {elapsed:.1f}s = {processed / elapsed if elapsed else 0:.1f} utterances/s")
+    print(f"[BATCH_NLU] deterministic {s['deterministic']}, llm {s['llm']}, failed {s['failed']}, "
+          f"retried {s['retried']}, prompts {s['prompts']}")
+    print(f"[BATCH_NLU] ~{s['tokens_in']} prompt + ~{s['tokens_out']} completion tokens, "
+          f"${cost:.4f} total, ${cost / processed * 1000 if processed else 0:.4f} per 1000 utterances")
+
+
+if __name__ == "__main__":
+    main()
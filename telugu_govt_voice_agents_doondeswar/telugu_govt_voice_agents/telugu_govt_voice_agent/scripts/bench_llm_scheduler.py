@@ -0,0 +1,120 @@
+"""
+Load test for the LLM scheduler against a local fake that enforces rate limits.
+
+Compares hammering the fake directly with going through the token-bucket scheduler:
+throughput vs quota, 429s seen, and latency per priority class. Runs once against a
+requests-per-window limit and once against a tokens-per-window limit; in the token
+case each task sends a differently sized prompt, and scheme identification's is
+larger than the scheduler's token burst.
+
+Usage (from the project directory):
+    python scripts/bench_llm_scheduler.py [--threads 32] [--seconds 10] [--limit 60] [--token-limit 4000] [--window 6]
+"""
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+from collections import defaultdict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+from langgraph_context import estimate_tokens  # noqa: E402
+from llm_backend import DEFAULT_COMPLETION_TOKENS, FakeRateLimitedBackend  # noqa: E402
+from llm_scheduler import TASK_PRIORITY, LLMScheduler, retry_after_seconds  # noqa: E402
+
+TASKS = ["slot_extraction", "intent", "scheme_identification"]
+TEXT = "నేను రైతును తెలంగాణ నుండి నా వయసు 35"
+MESSAGES = [{"role": "user", "content": TEXT}]
+# Prompt size per task (copies of TEXT) in the token-limited run
+PROMPT_REPEATS = {"slot_extraction": 10, "intent": 4, "scheme_identification": 60}
+
+
+def _messages(task, by_tokens):
+    if not by_tokens:
+        return MESSAGES
+    return [{"role": "user", "content": " ".join([TEXT] * PROMPT_REPEATS[task])}]
+
+
+def _cost(messages):
+    return sum(estimate_tokens(m["content"]) for m in messages) + DEFAULT_COMPLETION_TOKENS
+
+
+def _run(mode, args, by_tokens=False):
+    per_window = args.token_limit if by_tokens else args.limit
+    per_minute = per_window * 60.0 / args.window * args.target
+    if by_tokens:
+        fake = FakeRateLimitedBackend(rpm=1e9, tpm=per_window, latency=args.latency, window=args.window)
+        scheduler = LLMScheduler(rpm=1e9, tpm=per_minute, max_queue=args.threads * 2, name=f"bench.{mode}")
+    else:
+        fake = FakeRateLimitedBackend(rpm=per_window, tpm=1e9, latency=args.latency, window=args.window)
+        scheduler = LLMScheduler(rpm=per_minute, tpm=1e9, max_queue=args.threads * 2, name=f"bench.{mode}")
+    label = f"{mode}, {'tokens' if by_tokens else 'requests'}"
+    tokens_used = []
+    stats = defaultdict(list)
+    errors = defaultdict(int)
+    stop_at = time.monotonic() + args.seconds
+
+    def worker(i):
+        task = TASKS[i % len(TASKS)]
+        messages = _messages(task, by_tokens)
+        cost = _cost(messages)
+        while time.monotonic() < stop_at:
+            call = lambda: fake.complete(task, messages, text=TEXT, max_tokens=DEFAULT_COMPLETION_TOKENS)
+            t0 = time.monotonic()
+            try:
+                if mode == "direct":
+                    call()
+                else:
+                    scheduler.run(call, priority=TASK_PRIORITY[task], cost=cost if by_tokens else 1,
+                                  deadline_seconds=args.deadline)
+                stats[task].append((time.monotonic() - t0) * 1000)
+                tokens_used.append(cost)
+            except Exception as e:
+                errors["429" if retry_after_seconds(e) is not None else type(e).__name__] += 1
+                if mode == "direct":
+                    time.sleep(0.05)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(args.threads)]
+    t0 = time.monotonic()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.monotonic() - t0
+
+    ok = sum(len(v) for v in stats.values())
+    quota = per_window / args.window
+    done = sum(tokens_used) if by_tokens else ok
+    unit = "tokens" if by_tokens else "requests"
+    print(f"[{label}] ok {ok} calls, {done / elapsed:.1f} {unit}/s (quota {quota:.1f}/s), "
+          f"upstream 429s {fake.rejected}, client errors {dict(errors)}")
+    for task in TASKS:
+        lat = sorted(stats[task])
+        if lat:
+            print(f"    {task:<22} n={len(lat):<4} p50 {statistics.median(lat):7.0f} ms  "
+                  f"p95 {lat[int(0.95 * (len(lat) - 1))]:7.0f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the LLM token-bucket scheduler")
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--limit", type=int, default=60, help="Requests the fake allows per window")
+    parser.add_argument("--token-limit", type=int, default=4000, help="Tokens the fake allows per window")
+    parser.add_argument("--window", type=float, default=6.0, help="Fake rate-limit window in seconds")
+    parser.add_argument("--latency", type=float, default=0.05, help="Fake upstream latency in seconds")
+    parser.add_argument("--target", type=float, default=0.95, help="Scheduler rate as a fraction of the quota")
+    parser.add_argument("--deadline", type=float, default=10.0)
+    args = parser.parse_args()
+
+    for by_tokens in (False, True):
+        _run("direct", args, by_tokens)
+        _run("scheduled", args, by_tokens)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Compare one-by-one vs batched scheme detail resolution with a simulated slow
+external backend (local stub, no network).
+
+Usage (from the project directory):
+    python scripts/bench_scheme_details.py [--latency-ms 150] [--state TS] [--count 10]
+"""
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+from tools import scheme_details_tool  # noqa: E402
+from tools.scheme_content_store import get_state_shard  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark batched scheme detail fetch")
+    parser.add_argument("--latency-ms", type=float, default=150.0, help="Simulated backend latency per scheme")
+    parser.add_argument("--state", default="TS")
+    parser.add_argument("--count", type=int, default=10, help="Schemes on the result page")
+    args = parser.parse_args()
+
+    def stub_backend(scheme_id, language):
+        time.sleep(args.latency_ms / 1000.0)
+        return {"source": "stub"}
+
+    scheme_details_tool.register_detail_backend("stub", stub_backend)
+    shard = get_state_shard(args.state)
+    ids = shard.by_state.get(args.state, [])[: args.count] if shard else []
+    print(f"{len(ids)} schemes, backend latency {args.latency_ms:.0f} ms, "
+          f"{scheme_details_tool.DETAIL_BACKEND_WORKERS} workers")
+
+    t0 = time.perf_counter()
+    for sid in ids:
+        scheme_details_tool.get_scheme_details(sid)
+    serial_ms = (time.perf_counter() - t0) * 1000
+
+    scheme_details_tool.register_detail_backend("stub", stub_backend)  # drop cached results
+    t0 = time.perf_counter()
+    scheme_details_tool.get_scheme_details_many(ids)
+    batch_ms = (time.perf_counter() - t0) * 1000
+
+    t0 = time.perf_counter()
+    scheme_details_tool.render_scheme_details_many(ids)
+    cached_ms = (time.perf_counter() - t0) * 1000
+
+    print(f"one by one: {serial_ms:.1f} ms  batched: {batch_ms:.1f} ms  cached page render: {cached_ms:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
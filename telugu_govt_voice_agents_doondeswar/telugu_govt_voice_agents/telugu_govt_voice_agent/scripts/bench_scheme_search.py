@@ -0,0 +1,70 @@
+"""
+Query-latency benchmark for the local scheme search index.
+
+Usage (from the project directory):
+    python scripts/bench_scheme_search.py [--iterations 2000] [--state TS]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+from tools import scheme_search  # noqa: E402
+
+QUERIES = [
+    "వికలాంగులకు ఏ పథకాలు ఉన్నాయి",
+    "రైతులకు పెట్టుబడి సహాయం",
+    "వృద్ధులకు పెన్షన్",
+    "అమ్మఒడి",
+    "పెళ్లి కి ఆర్థిక సహాయం",
+    "ఇల్లు కావాలి",
+    "చదువు కోసం స్కాలర్‌షిప్",
+    "గర్భిణీ స్త్రీలకు పథకం",
+    "నిరుద్యోగ యువతకు ఉపాధి",
+    "ఆరోగ్యశ్రీ ఆసుపత్రి చికిత్స",
+]
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    idx = min(len(sorted_values) - 1, int(round(pct / 100.0 * (len(sorted_values) - 1))))
+    return sorted_values[idx]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark scheme search query latency")
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--state", default=None, help="Restrict results to one state (AP/TS)")
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    index = scheme_search.get_search_index()
+    build_ms = (time.perf_counter() - t0) * 1000
+    print(f"index: {len(index.doc_ids)} schemes, {len(index.postings)} terms, "
+          f"vectors={'on' if index.embeddings is not None else 'off (numpy not installed)'}, built in {build_ms:.1f} ms")
+
+    for q in QUERIES:
+        top = scheme_search.search_schemes(q, state=args.state, top_k=3)
+        print(f"  {q} -> {[r['scheme_id'] for r in top]}")
+
+    timings = []
+    for i in range(args.iterations):
+        q = QUERIES[i % len(QUERIES)]
+        t0 = time.perf_counter()
+        scheme_search.search_schemes(q, state=args.state, top_k=5)
+        timings.append((time.perf_counter() - t0) * 1000)
+
+    timings.sort()
+    print(f"queries: {len(timings)}  mean {statistics.mean(timings):.3f} ms  "
+          f"p50 {_percentile(timings, 50):.3f} ms  p95 {_percentile(timings, 95):.3f} ms  "
+          f"p99 {_percentile(timings, 99):.3f} ms  max {timings[-1]:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
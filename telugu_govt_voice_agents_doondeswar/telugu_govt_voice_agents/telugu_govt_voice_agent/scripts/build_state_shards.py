@@ -0,0 +1,50 @@
+"""
+Split the combined catalog files (schemes_master.json, eligibility_rules.json and
+the scheme content file) into one self-contained file per registered state, so a
+worker serving one region only reads that region's data.
+
+Shards are written to SCHEME_SHARD_DIR (data/shards by default); once a state's
+shard file exists it is loaded instead of the combined files. Re-run after
+editing the combined files, or edit the shard files directly.
+
+Usage (from the project directory):
+    python scripts/build_state_shards.py [--out data/shards] [--states TS,AP]
+"""
+import argparse
+import json
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+from tools.scheme_content_store import SCHEME_SHARD_DIR, read_combined_catalog, state_slice  # noqa: E402
+from tools.state_registry import state_codes  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write one catalog shard per state")
+    parser.add_argument("--out", default=SCHEME_SHARD_DIR, help="Shard directory")
+    parser.add_argument("--states", default="", help="Comma-separated state codes (default: all registered)")
+    args = parser.parse_args()
+
+    master, rules, content = read_combined_catalog()
+    states = [st.strip() for st in args.states.split(",") if st.strip()] or state_codes()
+    unregistered = sorted(set(master) - set(state_codes()))
+    if unregistered:
+        print(f"[SHARDS] Catalog states missing from the registry were skipped: {unregistered}")
+
+    os.makedirs(args.out, exist_ok=True)
+    for state in states:
+        shard = state_slice(master, rules, content, state)
+        path = os.path.join(args.out, f"{state}.json")
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(shard, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, path)
+        print(f"{state}: {len(shard['schemes'])} schemes, {len(shard['rules'])} rules -> {path}")
+
+
+if __name__ == "__main__":
+    main()
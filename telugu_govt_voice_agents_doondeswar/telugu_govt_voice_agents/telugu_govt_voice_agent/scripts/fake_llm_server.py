@@ -0,0 +1,134 @@
+"""
+Local stand-in for an OpenAI-compatible LLM server, for load and soak tests.
+
+Serves POST /v1/chat/completions with a configurable delay and error rate and
+answers with the offline local NLU (the same replies LLM_BACKEND=local gives), so
+conversations follow realistic paths without network access or API keys. The
+task is recognised from the prompt template's system message.
+
+Usage (from the project directory):
+    python scripts/fake_llm_server.py [--port 8001] [--latency-ms 300] [--jitter-ms 100] [--error-rate 0.01]
+
+    LLM_BACKEND=openai LLM_OPENAI_BASE_URL=http://127.0.0.1:8001/v1 python app_langgraph.py
+"""
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+from langgraph_prompts import _TEMPLATES  # noqa: E402
+from llm_backend import LocalBackend  # noqa: E402
+
+_USER_TEXT_RE = re.compile(r'User text: "?(.*?)"?\s*$', re.S)
+_ITEMS_RE = re.compile(r"Utterances:\s*(\[.*\])\s*$", re.S)
+
+
+def _task_for(system: str):
+    for name, versions in _TEMPLATES.items():
+        if any(t.system == system for t in versions.values()):
+            return name
+    return None
+
+
+class FakeLLM:
+    def __init__(self, latency_ms: float, jitter_ms: float, error_rate: float):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.backend = LocalBackend()
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+
+    def reply(self, payload: dict):
+        """(status, body) for one chat-completions request"""
+        with self.lock:
+            self.requests += 1
+        delay = max(0.0, random.gauss(self.latency_ms, self.jitter_ms)) if self.jitter_ms else self.latency_ms
+        time.sleep(delay / 1000.0)
+        if random.random() < self.error_rate:
+            with self.lock:
+                self.errors += 1
+            return 500, {"error": {"message": "injected failure", "type": "server_error"}}
+
+        messages = payload.get("messages") or []
+        system = next((m.get("content", "") for m in messages if m.get("role") == "system"), "")
+        user = messages[-1].get("content", "") if messages else ""
+        task = _task_for(system)
+        pattern = _ITEMS_RE if task == "batch_nlu" else _USER_TEXT_RE
+        m = pattern.search(user)
+        text = m.group(1) if m else user
+        try:
+            content = self.backend.complete(task or "intent", messages, text=text)
+        except Exception as e:
+            return 400, {"error": {"message": str(e), "type": "invalid_request_error"}}
+        return 200, {
+            "id": f"fake-{self.requests}",
+            "object": "chat.completion",
+            "model": payload.get("model", "fake"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+        }
+
+
+def make_handler(llm: FakeLLM):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            if not self.path.rstrip("/").endswith("/chat/completions"):
+                return self._send(404, {"error": {"message": "not found"}})
+            try:
+                length = int(self.headers.get("Content-Length") or 0)
+                payload = json.loads(self.rfile.read(length) or b"{}")
+            except Exception as e:
+                return self._send(400, {"error": {"message": f"bad request: {e}"}})
+            self._send(*llm.reply(payload))
+
+        def do_GET(self):
+            self._send(200, {"requests": llm.requests, "errors": llm.errors})
+
+        def _send(self, status, body):
+            raw = json.dumps(body, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(raw)))
+            self.end_headers()
+            self.wfile.write(raw)
+
+        def log_message(self, fmt, *args):
+            pass
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake OpenAI-compatible LLM server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency-ms", type=float, default=300.0, help="Mean reply delay")
+    parser.add_argument("--jitter-ms", type=float, default=100.0, help="Standard deviation of the delay")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with HTTP 500")
+    args = parser.parse_args()
+
+    llm = FakeLLM(args.latency_ms, args.jitter_ms, args.error_rate)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(llm))
+    server.daemon_threads = True
+    print(f"[FAKE_LLM] Listening on http://{args.host}:{args.port}/v1 "
+          f"(latency {args.latency_ms:.0f}±{args.jitter_ms:.0f} ms, error rate {args.error_rate:.1%})", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
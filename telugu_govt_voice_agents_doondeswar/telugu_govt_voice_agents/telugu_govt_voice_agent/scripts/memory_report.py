@@ -0,0 +1,132 @@
+"""
+Memory diagnostics from the command line (see memory_diagnostics.py).
+
+Against a running app started with MEMDIAG=1 MEMDIAG_TOKEN=<token>:
+    python scripts/memory_report.py snapshot --label before [--url http://127.0.0.1:5000] [--token <token>]
+    python scripts/memory_report.py snapshot --label after
+    python scripts/memory_report.py diff --before before --after after [--group-by module|filename|lineno|traceback]
+    python scripts/memory_report.py top | objects | sessions | summary
+
+In-process, without a server: replays example_flows.json for --rounds rounds,
+snapshots after the first (warm-up) round and at the end, and reports the growth:
+    LLM_BACKEND=local python scripts/memory_report.py local --rounds 5
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+import memory_diagnostics  # noqa: E402
+
+FLOWS_PATH = "example_flows.json"
+
+
+def _print_rows(title, rows, columns):
+    print(title)
+    for row in rows:
+        values = "  ".join(f"{row[c]:>12}" for c in columns)
+        print(f"  {values}  {row.get('where') or row.get('type') or row.get('session_id')}")
+    print()
+
+
+def print_report(view, data):
+    if "error" in data:
+        print(f"error: {data['error']}")
+        return
+    if view == "top":
+        _print_rows(f"Top allocators by {data['group_by']} ({data['total_kb']} KB traced)",
+                    data["top"], ["size_kb", "count"])
+    elif view == "diff":
+        _print_rows(f"Growth {data['before']} -> {data['after']} by {data['group_by']} ({data['growth_kb']:+} KB)",
+                    data["top"], ["size_diff_kb", "size_kb", "count_diff"])
+    elif view == "objects":
+        print(f"Agent state dicts {data['agent_state_dicts']}, message dicts {data['message_dicts']}")
+        _print_rows("Objects by type", data["by_type"], ["count"])
+    elif view == "sessions":
+        if "stored_session_bytes" in data:
+            print(f"Session file {data['stored_session_bytes'] / 1024:.1f} KB")
+        _print_rows(f"{data['sessions']} live sessions, {data['total_bytes'] / 1024:.1f} KB",
+                    data["top"], ["copies", "bytes", "history"])
+    else:
+        print(json.dumps(data, ensure_ascii=False, indent=2))
+
+
+def remote(args):
+    import httpx
+
+    headers = {"X-Admin-Token": args.token}
+    url = args.url.rstrip("/") + "/admin/memory"
+    params = {"group_by": args.group_by, "limit": args.limit}
+    if args.command == "snapshot":
+        if args.label:
+            params["label"] = args.label
+        resp = httpx.post(url, params=params, headers=headers, timeout=120)
+        view = "summary"
+    else:
+        params["view"] = args.command
+        for key in ("label", "before", "after"):
+            if getattr(args, key):
+                params[key] = getattr(args, key)
+        resp = httpx.get(url, params=params, headers=headers, timeout=120)
+        view = args.command
+    if resp.status_code == 404:
+        sys.exit("Diagnostics are off: start the app with MEMDIAG=1 and MEMDIAG_TOKEN, and pass --token")
+    print_report(view, resp.json())
+
+
+def local(args):
+    memory_diagnostics.start()
+    from langgraph_workflow import run_agent
+
+    with open(FLOWS_PATH, encoding="utf-8") as f:
+        flows = [[t["user"] for t in flow.get("conversation", []) if t.get("user")]
+                 for flow in json.load(f).get("flows", [])]
+    flows = [f for f in flows if f]
+
+    turns = 0
+    t0 = time.perf_counter()
+    for round_no in range(args.rounds):
+        for flow in flows:
+            state = None
+            for text in flow:
+                # Round-trip through JSON like the session file, so no state object outlives its turn
+                state = json.loads(json.dumps(run_agent(text, state), ensure_ascii=False, default=str))
+                turns += 1
+        if round_no == 0:
+            memory_diagnostics.take_snapshot("warm")
+    memory_diagnostics.take_snapshot("end")
+    print(f"{turns} turns in {time.perf_counter() - t0:.1f}s ({args.rounds} rounds of {len(flows)} flows)\n")
+
+    for group_by in ("module", args.group_by if args.group_by != "module" else "lineno"):
+        print_report("diff", memory_diagnostics.diff("warm", "end", group_by, args.limit))
+    print_report("objects", memory_diagnostics.object_counts(args.limit))
+    print_report("summary", {"process": memory_diagnostics.process_memory(),
+                             "caches": memory_diagnostics.cache_sizes()})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memory profiling and leak diagnostics")
+    parser.add_argument("command", choices=["summary", "snapshot", "top", "diff", "objects", "sessions", "local"])
+    parser.add_argument("--url", default="http://127.0.0.1:5000")
+    parser.add_argument("--token", default=os.getenv("MEMDIAG_TOKEN", ""))
+    parser.add_argument("--label", help="Snapshot to take (snapshot) or report (top)")
+    parser.add_argument("--before", help="Older snapshot for diff")
+    parser.add_argument("--after", help="Newer snapshot for diff (default: latest)")
+    parser.add_argument("--group-by", default="lineno", choices=memory_diagnostics.GROUP_BY)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--rounds", type=int, default=3, help="Replays of the example flows (local)")
+    args = parser.parse_args()
+
+    if args.command == "local":
+        local(args)
+    else:
+        remote(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""
+Aggregate eligibility queries over a beneficiary table (tools/population_index.py).
+
+Usage (from the project directory):
+    python scripts/population_query.py generate --rows 1000000 --out data/population.csv
+    python scripts/population_query.py query "TS_AASARA & ~TS_PENSION & district=Warangal" [--ids 20] [--group-by district]
+    python scripts/population_query.py schemes [--group-by state]
+    python scripts/population_query.py bench [--iterations 200]
+    python scripts/population_query.py verify [--sample 2000]
+
+--path (default POPULATION_PATH, data/population.csv) picks the table: CSV with a
+header row or JSONL.
+"""
+import argparse
+import csv
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+from tools import population_index  # noqa: E402
+from tools.eligibility_engine import check_eligibility  # noqa: E402
+from tools.scheme_content_store import get_content_store  # noqa: E402
+
+DISTRICTS = {
+    "TS": ["Hyderabad", "Warangal", "Karimnagar", "Khammam", "Nizamabad", "Adilabad", "Nalgonda", "Mahabubnagar"],
+    "AP": ["Visakhapatnam", "Krishna", "Guntur", "Kurnool", "Nellore", "Chittoor", "Anantapur", "East Godavari"],
+}
+OCCUPATIONS = ["farmer", "labourer", "employee", "driver", "weaver", "fisherman", "student", "unemployed"]
+BENCH_QUERIES = [
+    "TS_AASARA & ~TS_PENSION",
+    "TS_AASARA & ~TS_PENSION & district=Warangal",
+    "TS_RYTHU_BANDHU | AP_RYTHU_BHAROSA",
+    "(TS_OLD_AGE | AP_OLD_AGE) - income>100000",
+    "TS_KALYANA_LAKSHMI & district=Hyderabad",
+    "state=AP & age>=18 & age<=35 & income<150000",
+]
+
+
+def _generate(args):
+    rng = random.Random(args.seed)
+    states = list(DISTRICTS)
+    with open(args.out, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "state", "district", "age", "income", "gender", "occupation", "has_children"])
+        for i in range(args.rows):
+            state = rng.choice(states)
+            age = min(100, max(0, int(rng.gauss(40, 18))))
+            income = int(rng.lognormvariate(11.8, 0.6)) // 1000 * 1000
+            writer.writerow([
+                f"B{i:08d}",
+                state,
+                rng.choice(DISTRICTS[state]),
+                age if rng.random() > 0.01 else "",
+                income if rng.random() > 0.03 else "",
+                rng.choice(["female", "male"]),
+                rng.choice(OCCUPATIONS),
+                "true" if 22 <= age <= 50 and rng.random() < 0.6 else "false",
+            ])
+    print(f"Wrote {args.rows} rows to {args.out}")
+
+
+def _load(args):
+    return population_index.load_population(args.path)
+
+
+def _query(args):
+    index = _load(args)
+    result = population_index.query_population(args.expr, limit=args.ids, group_by=args.group_by, index=index)
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+
+
+def _schemes(args):
+    index = _load(args)
+    for scheme_id in sorted(get_content_store().rules_by_id):
+        t0 = time.perf_counter()
+        bits = index.scheme(scheme_id)
+        ms = (time.perf_counter() - t0) * 1000
+        line = f"{scheme_id:24s} {population_index.popcount(bits):>10d}  ({ms:.1f} ms)"
+        if args.group_by:
+            groups = index.group_counts(bits, args.group_by)
+            line += "  " + ", ".join(f"{k}={v}" for k, v in groups.items())
+        print(line)
+
+
+def _bench(args):
+    index = _load(args)
+    print(f"population: {index.size} rows, indexes {index.memory_bytes() / 1e6:.1f} MB, built in {index.build_ms:.0f} ms")
+    for expr in BENCH_QUERIES:
+        try:
+            count = index.count(expr)  # warm the scheme bitmap cache
+        except ValueError as e:
+            print(f"  skipped {expr!r}: {e}")
+            continue
+        timings = []
+        for _ in range(args.iterations):
+            t0 = time.perf_counter()
+            index.count(expr)
+            timings.append((time.perf_counter() - t0) * 1000)
+        timings.sort()
+        print(f"  {expr:48s} count={count:<9d} p50={statistics.median(timings):.2f} ms "
+              f"max={timings[-1]:.2f} ms")
+
+
+def _profile(row):
+    """check_eligibility profile of a table row, typed as the agent's slots are"""
+    profile = {}
+    for column, raw in row.items():
+        field = population_index.FIELD_ALIASES.get(column, column)
+        if field == population_index.POPULATION_ID_FIELD or raw in (None, ""):
+            continue
+        if field in population_index.NUMERIC_FIELDS:
+            profile[field] = int(float(raw))
+        elif isinstance(raw, str) and raw.lower() in {"true", "false", "yes", "no"}:
+            profile[field] = raw.lower() in {"true", "yes"}
+        else:
+            profile[field] = raw
+    return profile
+
+
+def _verify(args):
+    """Compare the bitmap answers with check_eligibility on a sample of rows"""
+    rows = list(population_index.read_rows(args.path))
+    index = population_index.PopulationIndex(rows, source=args.path)
+    schemes = {sid: index.scheme(sid) for sid in get_content_store().rules_by_id}
+    rng = random.Random(args.seed)
+    mismatches = 0
+    for row_no in rng.sample(range(len(rows)), min(args.sample, len(rows))):
+        expected = set(check_eligibility(_profile(rows[row_no])))
+        got = {sid for sid, bits in schemes.items() if bits >> row_no & 1}
+        if expected != got:
+            mismatches += 1
+            if mismatches <= 5:
+                print(f"  row {index.ids[row_no]}: engine={sorted(expected)} index={sorted(got)}")
+    print(f"verified {min(args.sample, len(rows))} rows: {mismatches} mismatches")
+    sys.exit(1 if mismatches else 0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Aggregate eligibility queries over a beneficiary table")
+    parser.add_argument("--path", default=population_index.POPULATION_PATH)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("generate", help="write a synthetic beneficiary table")
+    p.add_argument("--rows", type=int, default=1000000)
+    p.add_argument("--out", default=None, help="output CSV (default: --path)")
+    p.add_argument("--seed", type=int, default=7)
+    p.set_defaults(func=_generate)
+
+    p = sub.add_parser("query", help="count (and list/group) the rows matching an expression")
+    p.add_argument("expr")
+    p.add_argument("--ids", type=int, default=0, help="also list the first N matching ids")
+    p.add_argument("--group-by", default=None, help="counts per value of a categorical field")
+    p.set_defaults(func=_query)
+
+    p = sub.add_parser("schemes", help="eligible count for every scheme")
+    p.add_argument("--group-by", default=None)
+    p.set_defaults(func=_schemes)
+
+    p = sub.add_parser("bench", help="query latency")
+    p.add_argument("--iterations", type=int, default=200)
+    p.set_defaults(func=_bench)
+
+    p = sub.add_parser("verify", help="check the index against check_eligibility")
+    p.add_argument("--sample", type=int, default=2000)
+    p.add_argument("--seed", type=int, default=7)
+    p.set_defaults(func=_verify)
+
+    args = parser.parse_args()
+    if getattr(args, "out", "") is None:
+        args.out = args.path
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Query the turn event log (event_log.py) by streaming it block by block.
+
+Only the columns a report needs are decompressed; memory stays constant in the
+number of turns (the funnel keeps one small record per session).
+
+Usage (from the project directory):
+    python scripts/query_events.py intents  [--dir data/events] [--since 2026-01-01] [--until 2026-02-01]
+    python scripts/query_events.py funnel
+    python scripts/query_events.py latency
+    python scripts/query_events.py all
+"""
+import argparse
+import os
+import sys
+import time
+from collections import Counter, defaultdict
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+from event_log import EVENT_LOG_DIR, iter_events  # noqa: E402
+from metrics import Histogram  # noqa: E402
+
+PERCENTILES = (50, 90, 95, 99)
+# Funnel stages, in order: a session reaches a stage once any of its turns does
+FUNNEL_STAGES = ["started", "gave_profile", "eligibility_checked", "found_eligible"]
+
+
+def _print_percentiles(label, hist):
+    values = "  ".join(f"p{q} {hist.percentile(q):8.1f}" for q in PERCENTILES)
+    print(f"  {label:<32} n={hist.count:<8} {values}  max {hist.max:8.1f} ms")
+
+
+def report_intents(events):
+    counts = Counter(e.get("intent") or "unknown" for e in events)
+    total = sum(counts.values())
+    print(f"Intent distribution ({total} turns)")
+    for intent, n in counts.most_common():
+        print(f"  {intent:<20} {n:>9}  {100.0 * n / total:5.1f}%")
+
+
+def report_funnel(events):
+    sessions = {}
+    for e in events:
+        s = sessions.get(e["session_id"])
+        if s is None:
+            s = sessions[e["session_id"]] = {"turns": 0, "stages": {"started": 0}}
+        s["turns"] += 1
+        stages = s["stages"]
+        if "gave_profile" not in stages and any(v is not None for v in (e.get("slots_diff") or {}).values()):
+            stages["gave_profile"] = s["turns"]
+        if "eligibility_checked" not in stages and "eligibility_check" in (e.get("node_path") or []):
+            stages["eligibility_checked"] = s["turns"]
+        if "found_eligible" not in stages and e.get("eligible"):
+            stages["found_eligible"] = s["turns"]
+
+    total = len(sessions)
+    print(f"Funnel ({total} sessions)")
+    to_stage = {stage: Histogram(growth=1.05, smallest=1) for stage in FUNNEL_STAGES}
+    reached = Counter()
+    for s in sessions.values():
+        for stage, turn in s["stages"].items():
+            reached[stage] += 1
+            to_stage[stage].add(turn)
+    for stage in FUNNEL_STAGES:
+        n = reached[stage]
+        pct = 100.0 * n / total if total else 0.0
+        line = f"  {stage:<22} {n:>9}  {pct:5.1f}%"
+        if n and stage != "started":
+            hist = to_stage[stage]
+            line += f"   turns to reach: median {hist.percentile(50):.0f}, p90 {hist.percentile(90):.0f}"
+        print(line)
+
+
+def report_latency(events):
+    total = Histogram()
+    per_node = defaultdict(Histogram)
+    per_llm = defaultdict(Histogram)
+    llm_failures = Counter()
+    for e in events:
+        total.add(e.get("total_ms") or 0.0)
+        for node, ms in zip(e.get("node_path") or [], e.get("node_ms") or []):
+            per_node[node].add(ms)
+        for task, backend, ms, ok in e.get("llm_calls") or []:
+            per_llm[f"{task} ({backend})"].add(ms)
+            if not ok:
+                llm_failures[f"{task} ({backend})"] += 1
+
+    print("Turn latency")
+    _print_percentiles("total", total)
+    print("Node latency")
+    for node in sorted(per_node, key=lambda n: -per_node[n].total):
+        _print_percentiles(node, per_node[node])
+    if per_llm:
+        print("LLM calls")
+        for name in sorted(per_llm, key=lambda n: -per_llm[n].total):
+            _print_percentiles(name, per_llm[name])
+            if llm_failures[name]:
+                print(f"  {'':<32} failed {llm_failures[name]}")
+
+
+REPORTS = {
+    "intents": (report_intents, ["intent"]),
+    "funnel": (report_funnel, ["session_id", "slots_diff", "node_path", "eligible"]),
+    "latency": (report_latency, ["total_ms", "node_path", "node_ms", "llm_calls"]),
+}
+
+
+def _parse_date(value):
+    return datetime.fromisoformat(value).timestamp() if value else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Streaming reports over the turn event log")
+    parser.add_argument("report", choices=list(REPORTS) + ["all"])
+    parser.add_argument("--dir", default=EVENT_LOG_DIR, help="Event log directory")
+    parser.add_argument("--since", help="ISO date/time, inclusive")
+    parser.add_argument("--until", help="ISO date/time, exclusive")
+    args = parser.parse_args()
+
+    since, until = _parse_date(args.since), _parse_date(args.until)
+    names = list(REPORTS) if args.report == "all" else [args.report]
+    for name in names:
+        fn, columns = REPORTS[name]
+        t0 = time.perf_counter()
+        fn(iter_events(args.dir, columns, since, until))
+        print(f"  ({time.perf_counter() - t0:.2f}s)\n")
+
+
+if __name__ == "__main__":
+    main()
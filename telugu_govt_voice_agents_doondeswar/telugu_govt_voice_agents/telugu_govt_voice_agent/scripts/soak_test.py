@@ -0,0 +1,345 @@
+"""
+Concurrent-session load and soak test for the Flask app.
+
+Each simulated kiosk client plays conversations from example_flows.json against
+/agent (first turn fresh, with a think time between turns), polls /get_profile
+every 5 s the way static/js/profile.js does, and now and then calls /reset.
+Clients start gradually over --ramp-up seconds, so the interval report shows
+where latency starts to climb as concurrency grows. Each interval line gives
+turns/s, /agent latency percentiles, error rate, and the server's RSS and open
+file descriptors. Steady RSS or fd growth over a long soak points to a leak.
+
+--spawn starts scripts/fake_llm_server.py and the app itself (LLM_BACKEND=openai
+against the fake server), so no API key or network is needed. To test a running
+server, pass --url, plus --pid for the memory/fd columns. --url can be given
+several times to spread clients over multiple app processes.
+
+Limitation: the app keeps one kiosk session in SESSION_MEMORY_PATH, so every
+client pointed at the same process shares that file. Saves are not atomic and
+load_session_state treats a torn read as a fresh session, so clients overwrite
+and reset each other's state. Latency and leak numbers stay meaningful, but the
+conversations do not. The report counts "state_lost" turns: /agent replies
+whose slots dropped ones the client's previous reply in the same conversation
+had. For realistic per-client state, run one app process per client, each with
+its own SESSION_MEMORY_PATH, and pass each with --url.
+
+Usage (from the project directory):
+    python scripts/soak_test.py --spawn --clients 20 --ramp-up 60 --duration 600
+    python scripts/soak_test.py --spawn --clients 50 --duration 14400 --report-every 300 --csv soak.csv
+    python scripts/soak_test.py --url http://127.0.0.1:5000 --pid 12345 --clients 10
+"""
+import argparse
+import csv
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+import httpx  # noqa: E402
+from metrics import Histogram  # noqa: E402
+
+FLOWS_PATH = "example_flows.json"
+PROFILE_POLL_SECONDS = 5.0  # static/js/profile.js
+PERCENTILES = (50, 95, 99)
+
+
+def load_flows(path: str = FLOWS_PATH):
+    with open(path, encoding="utf-8") as f:
+        flows = json.load(f).get("flows", [])
+    flows = [[t["user"] for t in flow.get("conversation", []) if t.get("user")] for flow in flows]
+    return [f for f in flows if f]
+
+
+def process_stats(pid):
+    """(rss_mb, open_fds) of a process from /proc, or (None, None) when unavailable"""
+    if not pid:
+        return None, None
+    rss = fds = None
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    rss = int(line.split()[1]) / 1024.0
+                    break
+        fds = len(os.listdir(f"/proc/{pid}/fd"))
+    except OSError:
+        pass
+    return rss, fds
+
+
+class Stats:
+    """Counters and latency histograms for the current report interval and the whole run"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.total = {"latency": {}, "requests": Counter(), "errors": Counter(), "state_lost": 0}
+        self._new_interval()
+
+    def _new_interval(self):
+        self.interval = {"latency": {}, "requests": Counter(), "errors": Counter(), "turns": 0, "state_lost": 0}
+
+    def record(self, endpoint: str, ms: float, ok: bool, state_lost: bool = False) -> None:
+        with self.lock:
+            for bucket in (self.interval, self.total):
+                bucket["requests"][endpoint] += 1
+                if not ok:
+                    bucket["errors"][endpoint] += 1
+                bucket["latency"].setdefault(endpoint, Histogram()).add(ms)
+            if state_lost:
+                self.interval["state_lost"] += 1
+                self.total["state_lost"] += 1
+            if endpoint == "/agent" and ok:
+                self.interval["turns"] += 1
+
+    def take_interval(self):
+        with self.lock:
+            interval = self.interval
+            self._new_interval()
+        return interval
+
+
+class Client(threading.Thread):
+    def __init__(self, n: int, base_url: str, flows, stats: Stats, stop: threading.Event, args):
+        super().__init__(name=f"client-{n}", daemon=True)
+        self.base_url = base_url.rstrip("/")
+        self.flows = flows
+        self.stats = stats
+        self.stop = stop
+        self.args = args
+        self.rng = random.Random(args.seed + n)
+        self.next_poll = time.monotonic() + self.rng.uniform(0, PROFILE_POLL_SECONDS)
+        # Slots of this client's last /agent reply in the current conversation
+        self.slots = {}
+
+    def _call(self, http: httpx.Client, method: str, endpoint: str, **kwargs):
+        t0 = time.perf_counter()
+        ok = lost = False
+        try:
+            resp = http.request(method, self.base_url + endpoint, **kwargs)
+            ok = resp.status_code == 200
+            if ok and endpoint == "/agent":
+                data = resp.json()
+                ok = bool(data.get("response"))
+                slots = data.get("slots") or {}
+                if not kwargs["json"].get("fresh"):
+                    # Another client's save or /reset replaced this conversation's state
+                    lost = any(k not in slots for k in self.slots)
+                self.slots = slots
+        except Exception:
+            ok = False
+        self.stats.record(endpoint, (time.perf_counter() - t0) * 1000, ok, lost)
+
+    def _pause(self, http: httpx.Client, seconds: float) -> None:
+        """Think time, polling the profile on profile.js's schedule meanwhile"""
+        deadline = time.monotonic() + seconds
+        while not self.stop.is_set():
+            now = time.monotonic()
+            if now >= self.next_poll:
+                self._call(http, "GET", "/get_profile")
+                self.next_poll = now + PROFILE_POLL_SECONDS
+            wait = min(deadline, self.next_poll) - time.monotonic()
+            if deadline <= time.monotonic():
+                return
+            self.stop.wait(max(0.0, wait))
+
+    def run(self):
+        with httpx.Client(timeout=self.args.timeout) as http:
+            while not self.stop.is_set():
+                flow = self.rng.choice(self.flows)
+                for i, text in enumerate(flow):
+                    if self.stop.is_set():
+                        return
+                    if i == 0:
+                        self.slots = {}
+                    self._call(http, "POST", "/agent", json={"text": text, "fresh": i == 0})
+                    self._pause(http, self.rng.expovariate(1000.0 / self.args.think_ms) if self.args.think_ms else 0)
+                if self.rng.random() < self.args.reset_rate:
+                    self._call(http, "GET", "/reset")
+
+
+def _wait_http(url: str, timeout: float = 60.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(url, timeout=2.0)
+            return
+        except Exception:
+            time.sleep(0.3)
+    raise RuntimeError(f"{url} did not come up within {timeout:.0f}s")
+
+
+def spawn_servers(args, workdir: str):
+    """
+    Start the fake LLM server and the app; returns (processes, app_url, app_pid).
+    The app's session file and event log go to workdir, not the project's data.
+    """
+    quiet = None if args.server_logs else subprocess.DEVNULL
+    llm = subprocess.Popen(
+        [sys.executable, "scripts/fake_llm_server.py", "--port", str(args.llm_port),
+         "--latency-ms", str(args.llm_latency_ms), "--jitter-ms", str(args.llm_latency_ms / 3),
+         "--error-rate", str(args.llm_error_rate)],
+        stdout=quiet,
+    )
+    env = dict(os.environ)
+    env.update({
+        "SESSION_MEMORY_PATH": os.path.join(workdir, "session_memory.json"),
+        "EVENT_LOG": "1",
+        "EVENT_LOG_DIR": os.path.join(workdir, "events"),
+        "LLM_BACKEND": "openai",
+        "LLM_OPENAI_BASE_URL": f"http://127.0.0.1:{args.llm_port}/v1",
+        # The fake server has no quota; keep the scheduler out of the way unless limits are set
+        "LLM_RPM": env.get("LLM_RPM", "100000"),
+        "LLM_TPM": env.get("LLM_TPM", "100000000"),
+    })
+    app = subprocess.Popen(
+        [sys.executable, "-c",
+         f"from app_langgraph import app; app.run(host='127.0.0.1', port={args.app_port}, threaded=True)"],
+        env=env,
+        stdout=quiet,
+        stderr=quiet,
+    )
+    url = f"http://127.0.0.1:{args.app_port}"
+    _wait_http(f"http://127.0.0.1:{args.llm_port}/")
+    _wait_http(url + "/metrics")
+    return [app, llm], url, app.pid
+
+
+def _fmt(value, spec):
+    return "n/a" if value is None else format(value, spec)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent-session soak test")
+    parser.add_argument("--url", action="append", help="App base URL (repeatable; default http://127.0.0.1:5000)")
+    parser.add_argument("--pid", type=int, help="App process id for RSS/fd sampling")
+    parser.add_argument("--spawn", action="store_true", help="Start the fake LLM server and the app")
+    parser.add_argument("--app-port", type=int, default=5055)
+    parser.add_argument("--llm-port", type=int, default=8001)
+    parser.add_argument("--llm-latency-ms", type=float, default=300.0)
+    parser.add_argument("--llm-error-rate", type=float, default=0.0)
+    parser.add_argument("--server-logs", action="store_true", help="Show the spawned app's output")
+    parser.add_argument("--clients", type=int, default=10, help="Simulated concurrent kiosk sessions")
+    parser.add_argument("--ramp-up", type=float, default=30.0, help="Seconds over which clients are started")
+    parser.add_argument("--duration", type=float, default=300.0, help="Total run time in seconds")
+    parser.add_argument("--think-ms", type=float, default=2000.0, help="Mean pause between a reply and the next turn")
+    parser.add_argument("--reset-rate", type=float, default=0.1, help="Chance of /reset after a conversation")
+    parser.add_argument("--timeout", type=float, default=60.0, help="HTTP timeout per request")
+    parser.add_argument("--report-every", type=float, default=10.0, help="Seconds per report line")
+    parser.add_argument("--csv", help="Also write the interval rows to this CSV file")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    flows = load_flows()
+    procs = []
+    urls = args.url or ["http://127.0.0.1:5000"]
+    pid = args.pid
+    workdir = None
+    if args.spawn:
+        workdir = tempfile.mkdtemp(prefix="soak-")
+        procs, url, pid = spawn_servers(args, workdir)
+        urls = [url]
+
+    stats = Stats()
+    stop = threading.Event()
+    clients = [Client(i, urls[i % len(urls)], flows, stats, stop, args) for i in range(args.clients)]
+    rss0, fds0 = process_stats(pid)
+    print(f"{args.clients} clients over {args.ramp_up:.0f}s, {args.duration:.0f}s total, {len(flows)} flows, "
+          f"server RSS {_fmt(rss0, '.1f')} MB, fds {_fmt(fds0, 'd')}")
+    header = ["elapsed_s", "clients", "turns_per_s", "agent_p50_ms", "agent_p95_ms", "agent_p99_ms",
+              "requests", "errors", "error_rate", "state_lost", "rss_mb", "rss_growth_mb", "fds"]
+    print("  ".join(f"{h:>12}" for h in header))
+    writer = None
+    csv_file = open(args.csv, "w", newline="") if args.csv else None
+    if csv_file:
+        writer = csv.writer(csv_file)
+        writer.writerow(header)
+
+    started = time.monotonic()
+    next_report = started + args.report_every
+    last_report = started
+    rss_peak = rss0
+    try:
+        while True:
+            now = time.monotonic()
+            elapsed = now - started
+            if elapsed >= args.duration:
+                break
+            due = int(len(clients) * min(1.0, elapsed / args.ramp_up)) if args.ramp_up > 0 else len(clients)
+            for client in clients[:max(due, 1)]:
+                if not client.is_alive() and client.ident is None:
+                    client.start()
+            if now >= next_report:
+                interval = stats.take_interval()
+                agent = interval["latency"].get("/agent") or Histogram()
+                requests = sum(interval["requests"].values())
+                errors = sum(interval["errors"].values())
+                rss, fds = process_stats(pid)
+                if rss is not None:
+                    rss_peak = max(rss_peak or rss, rss)
+                row = [
+                    round(elapsed), sum(1 for c in clients if c.ident is not None),
+                    round(interval["turns"] / (now - last_report), 2),
+                    *(round(agent.percentile(q), 1) for q in PERCENTILES),
+                    requests, errors, round(errors / requests, 4) if requests else 0.0,
+                    interval["state_lost"],
+                    None if rss is None else round(rss, 1),
+                    None if rss is None or rss0 is None else round(rss - rss0, 1),
+                    fds,
+                ]
+                print("  ".join(f"{'n/a' if v is None else v:>12}" for v in row), flush=True)
+                if writer:
+                    writer.writerow(row)
+                    csv_file.flush()
+                last_report = now
+                next_report = now + args.report_every
+            time.sleep(0.05)
+    except KeyboardInterrupt:
+        print("Interrupted")
+    finally:
+        stop.set()
+        for client in clients:
+            if client.ident is not None:
+                client.join(timeout=args.timeout)
+        rss, fds = process_stats(pid)
+        if rss is not None:
+            rss_peak = max(rss_peak or rss, rss)
+        for proc in procs:
+            proc.terminate()
+        for proc in procs:
+            try:
+                proc.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+        if csv_file:
+            csv_file.close()
+        if workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    elapsed = time.monotonic() - started
+    print(f"\nSummary ({elapsed:.0f}s)")
+    turns = stats.total["requests"]["/agent"] - stats.total["errors"]["/agent"]
+    print(f"  turns {turns}  ({turns / elapsed:.2f}/s)")
+    lost = stats.total["state_lost"]
+    print(f"  state_lost {lost} turns ({100.0 * lost / turns if turns else 0:.2f}%)"
+          + ("  -- clients share the server's single session file; see the module docstring" if lost else ""))
+    for endpoint in sorted(stats.total["latency"]):
+        hist = stats.total["latency"][endpoint]
+        n, err = stats.total["requests"][endpoint], stats.total["errors"][endpoint]
+        pcts = "  ".join(f"p{q} {hist.percentile(q):8.1f}" for q in PERCENTILES)
+        print(f"  {endpoint:<14} n={n:<7} errors {err} ({100.0 * err / n if n else 0:.2f}%)  {pcts}  max {hist.max:8.1f} ms")
+    if rss0 is not None and rss is not None:
+        print(f"  server RSS {rss0:.1f} -> {rss:.1f} MB (peak {rss_peak:.1f}), fds {fds0} -> {fds}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Train the intent classifier (tools/intent_model.py) and write a versioned artifact.
+
+Training data: example_flows.json + catalog-based synthetic sentences
+(tools/local_nlu.py) + any logged turns given with --log (JSONL lines with
+"text", "intent" and "source", as written when INTENT_LOG_PATH is set). Only
+logged rows whose source is in intent_model.TRAINABLE_INTENT_SOURCES are used,
+so the model never learns from its own predictions.
+
+The held-out split is by group (a whole flow, or all fills of one synthetic
+template), so the reported accuracy is on sentences unlike any trained on.
+
+Usage (from the project directory):
+    python scripts/train_intent_model.py [--log data/intent_log.jsonl ...] [--out data/models/intent_model.npz]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import zlib
+from collections import Counter, defaultdict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+from tools import intent_model  # noqa: E402
+from tools.local_nlu import INTENTS, build_grouped_training_examples  # noqa: E402
+
+
+def _load_logged(paths):
+    """(text, intent, group) rows from intent logs; each logged utterance is its own group"""
+    examples = []
+    skipped = 0
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    row = json.loads(line)
+                except ValueError:
+                    continue
+                text = (row.get("text") or row.get("user_text") or "").strip()
+                intent = row.get("intent")
+                if row.get("source") not in intent_model.TRAINABLE_INTENT_SOURCES:
+                    skipped += 1
+                    continue
+                if text and intent in INTENTS:
+                    examples.append((text, intent, f"log:{text}"))
+    if skipped:
+        print(f"skipped {skipped} logged turns not labelled by {'/'.join(intent_model.TRAINABLE_INTENT_SOURCES)}")
+    return examples
+
+
+def _is_holdout(group, holdout_pct):
+    return zlib.crc32(group.encode("utf-8")) % 100 < holdout_pct
+
+
+def _evaluate(model, examples, min_confidence):
+    per_class = defaultdict(lambda: [0, 0])
+    correct = confident = confident_correct = 0
+    for text, gold in examples:
+        pred, prob = model.predict(text)
+        per_class[gold][1] += 1
+        if pred == gold:
+            correct += 1
+            per_class[gold][0] += 1
+        if prob >= min_confidence:
+            confident += 1
+            confident_correct += pred == gold
+    n = len(examples) or 1
+    return {
+        "accuracy": round(correct / n, 4),
+        "gated_coverage": round(confident / n, 4),
+        "gated_accuracy": round(confident_correct / confident, 4) if confident else None,
+        "per_class": {k: f"{c}/{t}" for k, (c, t) in sorted(per_class.items())},
+        "n": len(examples),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the intent classifier")
+    parser.add_argument("--log", action="append", default=[], help="JSONL file of logged (text, intent) turns")
+    parser.add_argument("--out", default=intent_model.INTENT_MODEL_PATH or "data/models/intent_model.npz")
+    parser.add_argument("--holdout", type=int, default=20, help="Percent of examples held out for evaluation")
+    parser.add_argument("--epochs", type=int, default=300)
+    parser.add_argument("--version", default=None, help="Artifact version tag (default: timestamp)")
+    args = parser.parse_args()
+
+    if intent_model.np is None:
+        sys.exit("NumPy is required to train the intent model")
+
+    groups = {}
+    for text, intent, group in build_grouped_training_examples() + _load_logged(args.log):
+        groups.setdefault((text, intent), group)
+    examples = list(groups)
+    print(f"examples: {len(examples)} in {len(set(groups.values()))} groups  {dict(Counter(y for _, y in examples))}")
+
+    train = [e for e in examples if not _is_holdout(groups[e], args.holdout)]
+    heldout = [e for e in examples if _is_holdout(groups[e], args.holdout)]
+    t0 = time.perf_counter()
+    model = intent_model.train_intent_model(train, epochs=args.epochs)
+    print(f"trained on {len(train)} in {time.perf_counter() - t0:.1f} s")
+    report = _evaluate(model, heldout, intent_model.INTENT_MODEL_MIN_CONFIDENCE)
+    print(f"held-out: {json.dumps(report, ensure_ascii=False)}")
+
+    meta = {
+        "heldout": report,
+        "sources": ["example_flows.json", "synthetic"] + args.log,
+        "min_confidence": intent_model.INTENT_MODEL_MIN_CONFIDENCE,
+    }
+    if args.version:
+        meta["version"] = args.version
+    final = intent_model.train_intent_model(examples, epochs=args.epochs, meta=meta)
+
+    sample = [t for t, _ in heldout[:50]] or [t for t, _ in examples[:50]]
+    t0 = time.perf_counter()
+    for i in range(2000):
+        final.predict(sample[i % len(sample)])
+    per_call_us = (time.perf_counter() - t0) / 2000 * 1e6
+    size_mb = (final.weights.nbytes + final.idf.nbytes) / (1024 * 1024)
+
+    final.save(args.out)
+    print(f"saved {args.out} version {final.version}: {per_call_us:.0f} us/prediction, "
+          f"{size_mb:.1f} MB in memory, {os.path.getsize(args.out) / 1024:.0f} KB on disk")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,417 @@
+import base64
+import json
+import os
+import re
+import shutil
+import struct
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterator, List, Optional
+import metrics
+from message_catalog import DEFAULT_LANGUAGE
+
+# Optional server-side audio path (POST /agent/audio). Both engines run locally on CPU:
+#   ASR_ENGINE=vosk      streaming Kaldi recogniser (pip install vosk), one model dir per language in
+#                        ASR_MODEL_PATH ({lang} is replaced by the language code), e.g.
+#                        vosk-model-small-te-0.42 unpacked to data/models/vosk-model-small-te
+#   ASR_ENGINE=whisper   faster-whisper int8 (pip install faster-whisper), model size/path in ASR_MODEL;
+#                        partial transcripts come from re-decoding the buffer every ASR_PARTIAL_SECONDS
+#   TTS_ENGINE=espeak    espeak-ng subprocess (apt install espeak-ng)
+# Both recognise and speak the turn's negotiated language (message_catalog speech_lang).
+# Input audio is 16 kHz mono 16-bit PCM, raw (audio/L16) or WAV.
+SAMPLE_RATE = 16000
+ASR_ENGINE = os.getenv("ASR_ENGINE", "vosk")
+ASR_MODEL_PATH = os.getenv("ASR_MODEL_PATH", "data/models/vosk-model-small-{lang}")
+ASR_MODEL = os.getenv("ASR_MODEL", "small")
+ASR_CPU_THREADS = int(os.getenv("ASR_CPU_THREADS", "1"))
+ASR_PARTIAL_SECONDS = float(os.getenv("ASR_PARTIAL_SECONDS", "1.0"))
+TTS_ENGINE = os.getenv("TTS_ENGINE", "espeak")
+# espeak voice for every language; empty picks the voice named after the turn's language code
+TTS_VOICE = os.getenv("TTS_VOICE", "")
+TTS_RATE = int(os.getenv("TTS_RATE", "150"))
+# ASR/TTS work runs on one shared pool, so concurrent calls never oversubscribe the CPU.
+AUDIO_WORKERS = int(os.getenv("AUDIO_WORKERS", str(os.cpu_count() or 2)))
+AUDIO_CHUNK_BYTES = 8000  # 0.25 s
+MAX_AUDIO_SECONDS = float(os.getenv("MAX_AUDIO_SECONDS", "30"))
+# A partial unchanged for this much further audio counts as stable (see on_partial)
+PARTIAL_STABLE_SECONDS = 0.5
+
+
+class SpeechUnavailableError(RuntimeError):
+    """The configured engine's package, binary or model is not installed"""
+
+
+def language_code(speech_lang: Optional[str]) -> str:
+    """"te-IN" -> "te" (the default language when empty)"""
+    return (speech_lang or DEFAULT_LANGUAGE).split("-")[0].lower()
+
+
+# ============================================================
+# ASR engines
+# ============================================================
+
+class ASRStream:
+    """One utterance being recognised; fed PCM chunks in order"""
+
+    def accept(self, pcm: bytes) -> Optional[str]:
+        """Consume a chunk; returns the current partial transcript when it changed"""
+        raise NotImplementedError
+
+    def finish(self) -> str:
+        raise NotImplementedError
+
+
+class ASREngine:
+    name = "base"
+
+    def new_stream(self, language: str = DEFAULT_LANGUAGE) -> ASRStream:
+        """A stream recognising `language` (a code such as "te")"""
+        raise NotImplementedError
+
+
+class VoskStream(ASRStream):
+    def __init__(self, recognizer):
+        self.recognizer = recognizer
+        self.final_parts: List[str] = []
+        self.last_partial = ""
+
+    def accept(self, pcm: bytes) -> Optional[str]:
+        if self.recognizer.AcceptWaveform(pcm):
+            text = json.loads(self.recognizer.Result()).get("text", "")
+            if text:
+                self.final_parts.append(text)
+            partial = " ".join(self.final_parts)
+        else:
+            partial = " ".join(self.final_parts + [json.loads(self.recognizer.PartialResult()).get("partial", "")]).strip()
+        if partial and partial != self.last_partial:
+            self.last_partial = partial
+            return partial
+        return None
+
+    def finish(self) -> str:
+        text = json.loads(self.recognizer.FinalResult()).get("text", "")
+        return " ".join(self.final_parts + ([text] if text else [])).strip()
+
+
+class VoskEngine(ASREngine):
+    name = "vosk"
+
+    def __init__(self, model_path: str = ASR_MODEL_PATH):
+        try:
+            from vosk import KaldiRecognizer, Model, SetLogLevel
+        except ImportError:
+            raise SpeechUnavailableError("ASR_ENGINE=vosk needs the vosk package")
+        SetLogLevel(-1)
+        self._recognizer_cls = KaldiRecognizer
+        self._model_cls = Model
+        self.model_path = model_path
+        self.models: Dict[str, object] = {}
+        self._lock = threading.Lock()
+        # Fail at startup (and in /agent/audio/status) when not even the default model is there
+        self._model(DEFAULT_LANGUAGE)
+
+    def _model(self, language: str):
+        model = self.models.get(language)
+        if model is None:
+            with self._lock:
+                model = self.models.get(language)
+                if model is None:
+                    path = self.model_path.replace("{lang}", language)
+                    if not os.path.isdir(path):
+                        raise SpeechUnavailableError(f"Vosk model for '{language}' not found at {path} (set ASR_MODEL_PATH)")
+                    model = self.models[language] = self._model_cls(path)
+        return model
+
+    def new_stream(self, language: str = DEFAULT_LANGUAGE) -> ASRStream:
+        return VoskStream(self._recognizer_cls(self._model(language), SAMPLE_RATE))
+
+
+class WhisperStream(ASRStream):
+    def __init__(self, engine: "WhisperEngine", language: str):
+        self.engine = engine
+        self.language = language
+        self.buffer = bytearray()
+        self.decoded_bytes = 0
+        self.last_partial = ""
+
+    def accept(self, pcm: bytes) -> Optional[str]:
+        self.buffer.extend(pcm)
+        if len(self.buffer) - self.decoded_bytes < ASR_PARTIAL_SECONDS * SAMPLE_RATE * 2:
+            return None
+        self.decoded_bytes = len(self.buffer)
+        partial = self.engine.transcribe(bytes(self.buffer), self.language)
+        if partial and partial != self.last_partial:
+            self.last_partial = partial
+            return partial
+        return None
+
+    def finish(self) -> str:
+        return self.engine.transcribe(bytes(self.buffer), self.language) if self.buffer else ""
+
+
+class WhisperEngine(ASREngine):
+    name = "whisper"
+
+    def __init__(self, model: str = ASR_MODEL):
+        try:
+            import numpy as np
+            from faster_whisper import WhisperModel
+        except ImportError:
+            raise SpeechUnavailableError("ASR_ENGINE=whisper needs numpy and faster-whisper")
+        self._np = np
+        self.model = WhisperModel(model, device="cpu", compute_type="int8", cpu_threads=ASR_CPU_THREADS)
+
+    def transcribe(self, pcm: bytes, language: str = DEFAULT_LANGUAGE) -> str:
+        audio = self._np.frombuffer(pcm, dtype=self._np.int16).astype(self._np.float32) / 32768.0
+        segments, _ = self.model.transcribe(audio, language=language, beam_size=1, vad_filter=True)
+        return " ".join(s.text.strip() for s in segments).strip()
+
+    def new_stream(self, language: str = DEFAULT_LANGUAGE) -> ASRStream:
+        return WhisperStream(self, language)
+
+
+# ============================================================
+# TTS engines
+# ============================================================
+
+class TTSEngine:
+    name = "base"
+
+    def synthesize(self, text: str, language: str = DEFAULT_LANGUAGE) -> bytes:
+        """WAV bytes for one sentence spoken in `language` (a code such as "te")"""
+        raise NotImplementedError
+
+
+class EspeakEngine(TTSEngine):
+    name = "espeak"
+
+    def __init__(self, voice: str = TTS_VOICE, rate: int = TTS_RATE):
+        self.binary = shutil.which("espeak-ng") or shutil.which("espeak")
+        if not self.binary:
+            raise SpeechUnavailableError("TTS_ENGINE=espeak needs espeak-ng on PATH")
+        self.voice = voice
+        self.rate = rate
+
+    def synthesize(self, text: str, language: str = DEFAULT_LANGUAGE) -> bytes:
+        proc = subprocess.run(
+            [self.binary, "-v", self.voice or language, "-s", str(self.rate), "--stdout", text],
+            capture_output=True,
+            timeout=30,
+        )
+        if proc.returncode != 0:
+            raise RuntimeError(proc.stderr.decode("utf-8", "replace").strip() or "espeak failed")
+        return proc.stdout
+
+
+_ASR_FACTORIES: Dict[str, Callable[[], ASREngine]] = {"vosk": VoskEngine, "whisper": WhisperEngine}
+_TTS_FACTORIES: Dict[str, Callable[[], TTSEngine]] = {"espeak": EspeakEngine}
+_engines: Dict[str, object] = {}
+_engine_lock = threading.Lock()
+
+
+def register_asr_engine(name: str, factory: Callable[[], ASREngine]) -> None:
+    _ASR_FACTORIES[name] = factory
+    _engines.pop(f"asr:{name}", None)
+
+
+def register_tts_engine(name: str, factory: Callable[[], TTSEngine]) -> None:
+    _TTS_FACTORIES[name] = factory
+    _engines.pop(f"tts:{name}", None)
+
+
+def _get_engine(kind: str, name: str, factories: Dict[str, Callable]):
+    key = f"{kind}:{name}"
+    engine = _engines.get(key)
+    if engine is None:
+        with _engine_lock:
+            engine = _engines.get(key)
+            if engine is None:
+                factory = factories.get(name)
+                if factory is None:
+                    raise SpeechUnavailableError(f"Unknown {kind.upper()} engine '{name}'")
+                t0 = time.perf_counter()
+                engine = factory()
+                print(f"[SPEECH] Loaded {kind} engine {name} in {(time.perf_counter() - t0) * 1000:.0f} ms")
+                _engines[key] = engine
+    return engine
+
+
+def get_asr_engine() -> ASREngine:
+    return _get_engine("asr", ASR_ENGINE, _ASR_FACTORIES)
+
+
+def get_tts_engine() -> Optional[TTSEngine]:
+    """None when TTS is not installed; the client then speaks with the browser voice"""
+    try:
+        return _get_engine("tts", TTS_ENGINE, _TTS_FACTORIES)
+    except SpeechUnavailableError as e:
+        print(f"[SPEECH] TTS unavailable: {e}")
+        return None
+
+
+def speech_status() -> Dict[str, object]:
+    status = {"asr_engine": ASR_ENGINE, "tts_engine": TTS_ENGINE, "workers": AUDIO_WORKERS}
+    try:
+        get_asr_engine()
+        status["asr"] = True
+    except SpeechUnavailableError as e:
+        status["asr"] = False
+        status["asr_error"] = str(e)
+    status["tts"] = get_tts_engine() is not None
+    return status
+
+
+_pool: Optional[ThreadPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> ThreadPoolExecutor:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ThreadPoolExecutor(max_workers=AUDIO_WORKERS, thread_name_prefix="audio")
+    return _pool
+
+
+# ============================================================
+# Pipeline
+# ============================================================
+
+def pcm_chunks(stream, chunk_bytes: int = AUDIO_CHUNK_BYTES) -> Iterator[bytes]:
+    """
+    Read a (possibly chunked) request body as it arrives and yield PCM chunks.
+    A RIFF/WAV header is validated and skipped; anything else is taken as raw 16 kHz PCM.
+    """
+    head = stream.read(12)
+    if head[:4] == b"RIFF" and head[8:12] == b"WAVE":
+        while True:
+            chunk_header = stream.read(8)
+            if len(chunk_header) < 8:
+                return
+            chunk_id, size = chunk_header[:4], struct.unpack("<I", chunk_header[4:])[0]
+            if chunk_id == b"data":
+                break
+            body = stream.read(size + (size & 1))
+            if chunk_id == b"fmt ":
+                fmt, channels, rate = struct.unpack("<HHI", body[:8])
+                bits = struct.unpack("<H", body[14:16])[0]
+                if (fmt, channels, rate, bits) != (1, 1, SAMPLE_RATE, 16):
+                    raise ValueError(f"WAV must be 16 kHz mono 16-bit PCM, got {rate} Hz, {channels} ch, {bits} bit")
+        head = b""
+    pending = head
+    while True:
+        data = stream.read(chunk_bytes)
+        if not data:
+            break
+        pending += data
+        cut = len(pending) - len(pending) % 2
+        if cut >= chunk_bytes:
+            yield pending[:cut]
+            pending = pending[cut:]
+    cut = len(pending) - len(pending) % 2
+    if cut:
+        yield pending[:cut]
+
+
+_SENTENCE_END = re.compile(r"(?<=[.!?।])\s+|\n+")
+
+
+def split_sentences(text: str, min_chars: int = 20) -> List[str]:
+    """Sentence-sized TTS units; very short pieces are joined to the next one"""
+    sentences, current = [], ""
+    for piece in _SENTENCE_END.split(text or ""):
+        piece = piece.strip()
+        if not piece:
+            continue
+        current = f"{current} {piece}".strip()
+        if len(current) >= min_chars:
+            sentences.append(current)
+            current = ""
+    if current:
+        sentences.append(current)
+    return sentences
+
+
+def run_audio_turn(
+    chunks: Iterator[bytes],
+    run_turn: Callable[[str], Dict],
+    speak: bool = True,
+    on_partial: Optional[Callable[[str, bool], None]] = None,
+    speech_lang: Optional[str] = None,
+) -> Iterator[Dict]:
+    """
+    Stream one spoken turn: ASR runs while the upload is still arriving, partial
+    transcripts are emitted and passed to on_partial(text, stable), where stable is
+    True once the text stayed the same for PARTIAL_STABLE_SECONDS of audio. The final transcript goes
+    through run_turn (the normal agent turn), and the reply is synthesised sentence
+    by sentence on the worker pool and streamed back in order.
+    ASR listens for speech_lang (the session's negotiated language before the turn);
+    TTS speaks the reply's own speech_lang, which may differ if the user switched.
+
+    Yields events: partial, transcript, response, audio, done (or error).
+    """
+    pool = _get_pool()
+    timings: Dict[str, float] = {}
+    t_start = time.perf_counter()
+    try:
+        stream = pool.submit(get_asr_engine().new_stream, language_code(speech_lang)).result()
+        asr_ms = 0.0
+        audio_bytes = 0
+        last_partial = ""
+        partial_at = 0
+        stable_sent = False
+        for pcm in chunks:
+            audio_bytes += len(pcm)
+            if audio_bytes > MAX_AUDIO_SECONDS * SAMPLE_RATE * 2:
+                raise ValueError(f"Audio longer than {MAX_AUDIO_SECONDS:.0f} s")
+            t0 = time.perf_counter()
+            partial = pool.submit(stream.accept, pcm).result()
+            asr_ms += (time.perf_counter() - t0) * 1000
+            if partial and partial != last_partial:
+                last_partial, partial_at, stable_sent = partial, audio_bytes, False
+                if on_partial:
+                    on_partial(partial, False)
+                yield {"type": "partial", "text": partial}
+            elif last_partial and not stable_sent and audio_bytes - partial_at >= PARTIAL_STABLE_SECONDS * SAMPLE_RATE * 2:
+                stable_sent = True
+                if on_partial:
+                    on_partial(last_partial, True)
+        t_upload_done = time.perf_counter()
+        transcript = pool.submit(stream.finish).result()
+        timings["asr_final_ms"] = (time.perf_counter() - t_upload_done) * 1000
+        timings["asr_ms"] = asr_ms + timings["asr_final_ms"]
+        timings["audio_seconds"] = audio_bytes / (SAMPLE_RATE * 2)
+        yield {"type": "transcript", "text": transcript}
+        if not transcript:
+            yield {"type": "error", "message": "no speech recognised"}
+            return
+
+        t0 = time.perf_counter()
+        reply = run_turn(transcript)
+        timings["agent_ms"] = (time.perf_counter() - t0) * 1000
+        tts = get_tts_engine() if speak else None
+        yield {"type": "response", "tts": tts is not None, **reply}
+
+        if tts is not None:
+            t0 = time.perf_counter()
+            reply_language = language_code(reply.get("speech_lang") or speech_lang)
+            futures = [pool.submit(tts.synthesize, s, reply_language) for s in split_sentences(reply.get("response", ""))]
+            for index, fut in enumerate(futures):
+                wav = fut.result()
+                if index == 0:
+                    timings["tts_first_audio_ms"] = (time.perf_counter() - t0) * 1000
+                yield {"type": "audio", "index": index, "format": "wav", "data": base64.b64encode(wav).decode("ascii")}
+            timings["tts_ms"] = (time.perf_counter() - t0) * 1000
+    except Exception as e:
+        metrics.incr("audio.errors")
+        print(f"[SPEECH] Audio turn failed: {e}")
+        yield {"type": "error", "message": str(e)}
+        return
+    finally:
+        timings["total_ms"] = (time.perf_counter() - t_start) * 1000
+        for stage, value in timings.items():
+            metrics.observe(f"audio.{stage}", value)
+    yield {"type": "done", "timings": {k: round(v, 1) for k, v in timings.items()}}
@@ -12,10 +12,59 @@ class TeluguVoiceHandler {
         this.voiceEnabled = true;
         this.selectedVoice = null;
         this.statusElement = null;
+
+        // Optional server-side ASR/TTS (/agent/audio)
+        this.serverAudio = null;
+        this.recorder = null;
+        this.audioQueue = [];
+        this.currentAudio = null;
+
+        // Interim results are sent to /agent/partial so NLU starts while the user speaks
+        this.lastPartial = '';
+        this.partialTimer = null;
+        this.partialPauseMs = 500;
+
+        // Response language: ?lang=en|hi|ur|te pins it, otherwise the server negotiates it.
+        // Recognition and synthesis follow the speech_lang of the last response.
+        this.language = new URLSearchParams(window.location.search).get('lang');
+        this.speechLang = 'te-IN';
+        this.voices = [];
+
+        // /agent requests that time out or fail are retried with the same turn_id;
+        // the server answers a retry from the original turn instead of running it again.
+        // A retry may wait up to TURN_DEDUP_WAIT_SECONDS (60 s) for the original, so the
+        // timeout is longer than that.
+        this.turnTimeoutMs = 65000;
+        this.turnRetries = 2;
+        this.turnRetryDelayMs = 1000;
         
         this.initializeSpeechRecognition();
         this.loadVoices();
         this.setupEventHandlers();
+        this.checkServerAudio();
+    }
+
+    /**
+     * Use server-side speech when the browser has no recognition or ?server_audio=1 is set
+     */
+    async checkServerAudio() {
+        const forced = new URLSearchParams(window.location.search).get('server_audio') === '1';
+        if (this.recognition && !forced) {
+            return;
+        }
+        try {
+            const response = await fetch('/agent/audio/status');
+            const status = await response.json();
+            if (status.asr) {
+                this.serverAudio = status;
+                console.log('Using server-side speech:', status);
+                if (!this.recognition) {
+                    this.updateVoiceStatus('సర్వర్ వాయిస్ సిద్ధంగా ఉంది', 'success');
+                }
+            }
+        } catch (error) {
+            console.error('Server audio status check failed:', error);
+        }
     }
 
     /**
@@ -31,10 +80,10 @@ class TeluguVoiceHandler {
         const SpeechRecognition = window.SpeechRecognition || window.webkitSpeechRecognition;
         this.recognition = new SpeechRecognition();
         
-        // Configure for Telugu
-        this.recognition.lang = 'te-IN';
+        // Telugu until a response says otherwise (see applyLanguage)
+        this.recognition.lang = this.speechLang;
         this.recognition.continuous = false;
-        this.recognition.interimResults = false;
+        this.recognition.interimResults = true;
         this.recognition.maxAlternatives = 1;
 
         // Set up event handlers
@@ -45,9 +94,14 @@ class TeluguVoiceHandler {
         };
 
         this.recognition.onresult = (event) => {
-            const result = event.results[0][0];
-            const teluguText = result.transcript;
-            const confidence = result.confidence || 0.5;
+            const result = event.results[event.results.length - 1];
+            if (!result.isFinal) {
+                this.sendPartial(result[0].transcript);
+                return;
+            }
+            this.clearPartial();
+            const teluguText = result[0].transcript;
+            const confidence = result[0].confidence || 0.5;
             this.handleSpeechResult(teluguText, confidence);
         };
 
@@ -59,6 +113,7 @@ class TeluguVoiceHandler {
         };
 
         this.recognition.onend = () => {
+            this.clearPartial();
             this.isListening = false;
             this.updateMicrophoneButton(false);
             this.updateVoiceStatus('వినడం ముగిసింది', 'success');
@@ -66,7 +121,7 @@ class TeluguVoiceHandler {
     }
 
     /**
-     * Load and select best Telugu voice
+     * Load voices and select the best one for the current language
      */
     loadVoices() {
         const loadVoicesImpl = () => {
@@ -75,7 +130,8 @@ class TeluguVoiceHandler {
                 setTimeout(loadVoicesImpl, 100);
                 return;
             }
-            this.selectBestTeluguVoice(voices);
+            this.voices = voices;
+            this.selectBestVoice(voices);
         };
 
         // Load voices immediately and on voiceschanged event
@@ -84,20 +140,21 @@ class TeluguVoiceHandler {
     }
 
     /**
-     * Select best available Telugu voice
+     * Select best available voice for this.speechLang
      */
-    selectBestTeluguVoice(voices) {
-        // Priority: Telugu female → Telugu any → Hindi → English Indian → Default
+    selectBestVoice(voices) {
+        // Priority: language female → language any → language without region → Hindi → English Indian → Default
+        const base = this.speechLang.split('-')[0];
         this.selectedVoice = voices.find(v => 
-            v.lang.includes('te-IN') && v.name.toLowerCase().includes('female')
+            v.lang.includes(this.speechLang) && v.name.toLowerCase().includes('female')
         );
         
         if (!this.selectedVoice) {
-            this.selectedVoice = voices.find(v => v.lang.includes('te-IN'));
+            this.selectedVoice = voices.find(v => v.lang.includes(this.speechLang));
         }
         
         if (!this.selectedVoice) {
-            this.selectedVoice = voices.find(v => v.lang.includes('te'));
+            this.selectedVoice = voices.find(v => v.lang.startsWith(base));
         }
         
         if (!this.selectedVoice) {
@@ -111,6 +168,73 @@ class TeluguVoiceHandler {
         console.log('Selected voice:', this.selectedVoice?.name || 'Default');
     }
 
+    /**
+     * Switch recognition and synthesis to the language the server answered in
+     */
+    applyLanguage(data) {
+        if (!data || !data.speech_lang || data.speech_lang === this.speechLang) {
+            return;
+        }
+        this.speechLang = data.speech_lang;
+        if (this.recognition) {
+            this.recognition.lang = this.speechLang;
+        }
+        if (this.voices.length) {
+            this.selectBestVoice(this.voices);
+        }
+    }
+
+    newTurnId() {
+        if (window.crypto && window.crypto.randomUUID) {
+            return window.crypto.randomUUID();
+        }
+        return Date.now().toString(36) + Math.random().toString(36).slice(2, 12);
+    }
+
+    /**
+     * POST one user turn to /agent and return the parsed reply. Timeouts, network
+     * errors and 503 (original still running; waits for Retry-After) are retried with
+     * the same turn_id. Any other non-2xx response (400, 409, 5xx) is thrown without a retry.
+     */
+    async postTurn(payload) {
+        const body = JSON.stringify({ ...payload, turn_id: this.newTurnId() });
+        let lastError = null;
+        let retryDelayMs = 0;
+        for (let attempt = 0; attempt <= this.turnRetries; attempt++) {
+            if (attempt > 0) {
+                await new Promise(resolve => setTimeout(resolve, retryDelayMs || this.turnRetryDelayMs * attempt));
+            }
+            retryDelayMs = 0;
+            const controller = new AbortController();
+            const timer = setTimeout(() => controller.abort(), this.turnTimeoutMs);
+            let response = null;
+            try {
+                response = await fetch('/agent', {
+                    method: 'POST',
+                    headers: { 'Content-Type': 'application/json' },
+                    body: body,
+                    signal: controller.signal
+                });
+            } catch (error) {
+                lastError = error;
+            } finally {
+                clearTimeout(timer);
+            }
+            if (response && response.status !== 503) {
+                if (!response.ok) {
+                    throw new Error(`/agent returned ${response.status}`);
+                }
+                return await response.json();
+            }
+            if (response) {
+                retryDelayMs = (parseFloat(response.headers.get('Retry-After')) || 0) * 1000;
+                lastError = new Error(`/agent returned ${response.status}`);
+            }
+            console.warn(`Turn attempt ${attempt + 1} failed:`, lastError);
+        }
+        throw lastError;
+    }
+
     /**
      * Set up event handlers for UI elements
      */
@@ -171,6 +295,11 @@ class TeluguVoiceHandler {
      * Start listening for speech
      */
     startListening() {
+        if (this.serverAudio) {
+            this.startServerRecording();
+            return;
+        }
+
         if (!this.recognition) {
             this.showFallbackMessage();
             return;
@@ -195,6 +324,10 @@ class TeluguVoiceHandler {
      * Stop listening for speech
      */
     stopListening() {
+        if (this.recorder) {
+            this.stopServerRecording();
+            return;
+        }
         if (this.recognition && this.isListening) {
             this.recognition.stop();
         }
@@ -223,7 +356,7 @@ class TeluguVoiceHandler {
         this.stopSpeaking();
 
         const utterance = new SpeechSynthesisUtterance(text);
-        utterance.lang = 'te-IN';
+        utterance.lang = this.speechLang;
         utterance.rate = 0.8;
         utterance.pitch = 1.0;
         utterance.volume = 1.0;
@@ -261,6 +394,11 @@ class TeluguVoiceHandler {
         if (this.synthesis.speaking) {
             this.synthesis.cancel();
         }
+        this.audioQueue = [];
+        if (this.currentAudio) {
+            this.currentAudio.pause();
+            this.currentAudio = null;
+        }
         this.isSpeaking = false;
         this.currentUtterance = null;
     }
@@ -350,17 +488,13 @@ class TeluguVoiceHandler {
             this.addUserMessage(text, true, confidence);
 
             // Send to backend
-            const response = await fetch('/agent', {
-                method: 'POST',
-                headers: { 'Content-Type': 'application/json' },
-                body: JSON.stringify({ 
-                    text: text,
-                    voice_input: true,
-                    confidence: confidence
-                })
+            const data = await this.postTurn({
+                text: text,
+                voice_input: true,
+                confidence: confidence,
+                language: this.language
             });
-
-            const data = await response.json();
+            this.applyLanguage(data);
             
             // Display bot response
             this.addBotMessage(data.response);
@@ -378,6 +512,177 @@ class TeluguVoiceHandler {
         }
     }
 
+    /**
+     * Send an interim transcript for speculative NLU; after a pause with no
+     * change it is re-sent as stable so the server can start LLM calls early
+     */
+    sendPartial(text) {
+        text = (text || '').trim();
+        if (!text || text === this.lastPartial) {
+            return;
+        }
+        this.lastPartial = text;
+        this.updateVoiceStatus(text, 'listening');
+        this.postPartial(text, false);
+
+        clearTimeout(this.partialTimer);
+        this.partialTimer = setTimeout(() => this.postPartial(text, true), this.partialPauseMs);
+    }
+
+    postPartial(text, stable) {
+        fetch('/agent/partial', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ text: text, stable: stable })
+        }).catch(error => console.warn('Partial NLU request failed:', error));
+    }
+
+    clearPartial() {
+        clearTimeout(this.partialTimer);
+        this.partialTimer = null;
+        this.lastPartial = '';
+    }
+
+    /**
+     * Record microphone audio as 16 kHz 16-bit PCM for /agent/audio
+     */
+    async startServerRecording() {
+        if (this.isListening) {
+            return;
+        }
+        this.stopSpeaking();
+        try {
+            const stream = await navigator.mediaDevices.getUserMedia({ audio: true });
+            const context = new (window.AudioContext || window.webkitAudioContext)();
+            const source = context.createMediaStreamSource(stream);
+            const processor = context.createScriptProcessor(4096, 1, 1);
+            const ratio = context.sampleRate / 16000;
+            const chunks = [];
+
+            processor.onaudioprocess = (event) => {
+                const input = event.inputBuffer.getChannelData(0);
+                const out = new Int16Array(Math.floor(input.length / ratio));
+                for (let i = 0; i < out.length; i++) {
+                    const sample = Math.max(-1, Math.min(1, input[Math.floor(i * ratio)]));
+                    out[i] = sample < 0 ? sample * 0x8000 : sample * 0x7fff;
+                }
+                chunks.push(out);
+            };
+            source.connect(processor);
+            processor.connect(context.destination);
+
+            this.recorder = { stream, context, source, processor, chunks };
+            this.isListening = true;
+            this.updateVoiceStatus('వింటున్నాను...', 'listening');
+            this.updateMicrophoneButton(true);
+        } catch (error) {
+            console.error('Microphone error:', error);
+            this.handleSpeechError('not-allowed');
+        }
+    }
+
+    /**
+     * Stop recording and send the utterance to the server
+     */
+    stopServerRecording() {
+        const { stream, context, source, processor, chunks } = this.recorder;
+        this.recorder = null;
+        source.disconnect();
+        processor.disconnect();
+        stream.getTracks().forEach(track => track.stop());
+        context.close();
+
+        this.isListening = false;
+        this.updateMicrophoneButton(false);
+        this.updateVoiceStatus('ప్రాసెస్ చేస్తున్నాను...', 'info');
+        this.sendServerAudio(new Blob(chunks, { type: 'audio/L16; rate=16000' }));
+    }
+
+    /**
+     * POST audio to /agent/audio and handle the streamed NDJSON events
+     */
+    async sendServerAudio(blob) {
+        try {
+            const query = this.language ? `?language=${encodeURIComponent(this.language)}` : '';
+            const response = await fetch('/agent/audio' + query, {
+                method: 'POST',
+                headers: { 'Content-Type': 'audio/L16; rate=16000' },
+                body: blob
+            });
+            if (!response.ok) {
+                throw new Error(`HTTP ${response.status}`);
+            }
+            const reader = response.body.getReader();
+            const decoder = new TextDecoder();
+            let buffered = '';
+            let gotAudio = false;
+            let reply = null;
+
+            while (true) {
+                const { done, value } = await reader.read();
+                if (done) break;
+                buffered += decoder.decode(value, { stream: true });
+                const lines = buffered.split('\n');
+                buffered = lines.pop();
+                for (const line of lines) {
+                    if (!line.trim()) continue;
+                    const event = JSON.parse(line);
+                    if (event.type === 'partial') {
+                        this.updateVoiceStatus(event.text, 'listening');
+                    } else if (event.type === 'transcript') {
+                        this.addUserMessage(event.text, true);
+                    } else if (event.type === 'response') {
+                        reply = event;
+                        this.applyLanguage(event);
+                        this.addBotMessage(event.response);
+                    } else if (event.type === 'audio') {
+                        gotAudio = true;
+                        this.queueServerAudio(event);
+                    } else if (event.type === 'error') {
+                        this.updateVoiceStatus(event.message, 'error');
+                    }
+                }
+            }
+
+            // No server TTS: fall back to the browser voice
+            if (reply && !gotAudio && this.voiceEnabled) {
+                this.speakTelugu(reply.response);
+            }
+        } catch (error) {
+            console.error('Error sending audio:', error);
+            this.updateVoiceStatus('సందేశం పంపడంలో లోపం', 'error');
+        }
+    }
+
+    /**
+     * Play server TTS sentences in order as they arrive
+     */
+    queueServerAudio(event) {
+        if (!this.voiceEnabled) {
+            return;
+        }
+        this.audioQueue.push(`data:audio/wav;base64,${event.data}`);
+        if (!this.currentAudio) {
+            this.playNextServerAudio();
+        }
+    }
+
+    playNextServerAudio() {
+        const src = this.audioQueue.shift();
+        if (!src) {
+            this.currentAudio = null;
+            this.isSpeaking = false;
+            this.updateVoiceStatus('మాట్లాడడం పూర్తయింది', 'success');
+            return;
+        }
+        this.isSpeaking = true;
+        this.updateVoiceStatus('మాట్లాడుతున్నాను...', 'speaking');
+        this.currentAudio = new Audio(src);
+        this.currentAudio.onended = () => this.playNextServerAudio();
+        this.currentAudio.onerror = () => this.playNextServerAudio();
+        this.currentAudio.play().catch(() => this.playNextServerAudio());
+    }
+
     /**
      * Add user message to chat
      */
@@ -589,17 +894,13 @@ async function sendMessage(text, isVoiceInput = false, confidence = null) {
         voiceHandler.addUserMessage(text, isVoiceInput, confidence);
         
         // Send to backend
-        const response = await fetch('/agent', {
-            method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({ 
-                text: text,
-                voice_input: isVoiceInput,
-                confidence: confidence
-            })
+        const data = await voiceHandler.postTurn({
+            text: text,
+            voice_input: isVoiceInput,
+            confidence: confidence,
+            language: voiceHandler.language
         });
-        
-        const data = await response.json();
+        voiceHandler.applyLanguage(data);
         
         // Add bot response to chat
         voiceHandler.addBotMessage(data.response);
@@ -0,0 +1,7 @@
+import os
+import sys
+
+# Modules are flat and read data/ relative to the project directory
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
@@ -0,0 +1,28 @@
+import os
+import time
+import event_log
+
+
+def _old_file(directory, name, age_seconds):
+    path = os.path.join(directory, name)
+    with open(path, "wb") as f:
+        f.write(event_log.MAGIC)
+    os.utime(path, (time.time() - age_seconds,) * 2)
+    return path
+
+
+def test_rotation_prunes_by_count_and_age(tmp_path):
+    directory = str(tmp_path)
+    for i in range(5):
+        _old_file(directory, f"turns-old{i}.tlog", i * 3600)
+    _old_file(directory, "turns-expired.tlog", 40 * 86400)
+
+    writer = event_log.EventLogWriter(directory=directory, max_files=3, max_age_days=30)
+    writer._write_block([{"ts": time.time()}])
+    writer._file.close()
+
+    names = sorted(os.path.basename(p) for p in event_log.log_files(directory))
+    assert len(names) == 3
+    assert "turns-old0.tlog" in names and "turns-old1.tlog" in names
+    assert "turns-expired.tlog" not in names
+
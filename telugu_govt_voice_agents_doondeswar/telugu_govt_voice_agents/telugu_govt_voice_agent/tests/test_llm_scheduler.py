@@ -0,0 +1,36 @@
+import pytest
+from llm_scheduler import TokenBucket
+
+
+def _bucket(per_minute, burst, now=0.0):
+    bucket = TokenBucket(per_minute, burst=burst)
+    bucket.updated = now
+    return bucket
+
+
+def test_small_request_is_admitted_from_the_burst():
+    bucket = _bucket(6000, burst=200)
+    assert bucket.wait_time(150, 0.0) == 0.0
+    bucket.take(150)
+    assert bucket.wait_time(100, 0.0) == pytest.approx(0.5)
+
+
+def test_oversized_request_is_charged_in_full():
+    bucket = _bucket(6000, burst=200)
+    assert bucket.wait_time(1500, 0.0) == 0.0
+    bucket.take(1500)
+    assert bucket.tokens == -1300
+    # The debt is paid back at 100 tokens/s before the next caller gets in
+    assert bucket.wait_time(100, 0.0) == pytest.approx(14.0)
+    assert bucket.wait_time(100, 14.0) == 0.0
+
+
+def test_long_run_rate_stays_under_the_limit():
+    bucket = _bucket(6000, burst=200)
+    now, charged = 0.0, 0
+    while now < 600:
+        now += bucket.wait_time(1500, now)
+        bucket.take(1500)
+        charged += 1500
+    # Ten minutes at 6000/min, plus at most one burst and one request of slack
+    assert charged <= 6000 * 10 + 200 + 1500
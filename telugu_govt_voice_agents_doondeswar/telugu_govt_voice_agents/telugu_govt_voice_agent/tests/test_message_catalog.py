@@ -0,0 +1,19 @@
+import pytest
+from message_catalog import compile_template
+
+
+def test_fields_are_substituted_and_extras_ignored():
+    assert compile_template("{n}. {name}")(n=1, name="రైతు బంధు", language="te") == "1. రైతు బంధు"
+    assert compile_template("{v:.1f}")(v=2.25) == "2.2"
+
+
+@pytest.mark.parametrize("template", [
+    "{name.__class__}",
+    "{names[0]}",
+    "{n:{width.__class__}}",
+    "{n!x}",
+    "{import}",
+])
+def test_unsafe_templates_are_rejected(template):
+    with pytest.raises(ValueError):
+        compile_template(template)
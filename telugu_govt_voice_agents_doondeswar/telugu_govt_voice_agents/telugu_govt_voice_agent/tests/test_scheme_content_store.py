@@ -0,0 +1,21 @@
+from collections import OrderedDict
+import pytest
+from tools import scheme_content_store
+
+
+@pytest.fixture
+def no_shards(monkeypatch):
+    monkeypatch.setattr(scheme_content_store, "_shards", OrderedDict())
+    monkeypatch.setattr(scheme_content_store, "_id_states", {})
+    monkeypatch.setattr(scheme_content_store, "_merged", None)
+
+
+def test_unknown_scheme_id_loads_nothing(no_shards):
+    assert scheme_content_store.get_scheme_shard("NOT_A_SCHEME") is None
+    assert not scheme_content_store._shards
+
+
+def test_scheme_id_prefix_loads_only_its_state(no_shards):
+    store = scheme_content_store.get_scheme_shard("AP_AMMA_VODI")
+    assert store is not None and "AP_AMMA_VODI" in store.by_id
+    assert list(scheme_content_store._shards) == ["AP"]
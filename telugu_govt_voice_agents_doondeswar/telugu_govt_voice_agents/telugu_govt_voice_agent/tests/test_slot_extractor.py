@@ -0,0 +1,62 @@
+import pytest
+from tools.slot_extractor import extract_slots_with_coverage, normalize_number_words, parse_amount, unmatched_text
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("అరవై ఐదు", "65"),
+    ("రెండున్నర లక్షలు", "2.5 లక్షలు"),
+    ("అర లక్ష", "0.5 లక్ష"),
+    ("పదివేలు", "10వేలు"),
+    ("అరవైఏళ్ళు", "60ఏళ్ళు"),
+    # Words that only start with a number word stay as they are
+    ("ఒకసారి", "ఒకసారి"),
+    ("వందనం", "వందనం"),
+    ("ఇరవై ఒకసారి", "20 ఒకసారి"),
+])
+def test_number_words(text, expected):
+    assert normalize_number_words(text) == expected
+
+
+@pytest.mark.parametrize("text, amount", [
+    ("రెండున్నర లక్షలు", 250000),
+    ("50 వేలు", 50000),
+    ("2.5 lakh", 250000),
+])
+def test_parse_amount(text, amount):
+    assert parse_amount(text) == amount
+
+
+@pytest.mark.parametrize("text, slots", [
+    ("నేను రైతును తెలంగాణ నుండి నా వయసు 35", {"occupation": "farmer", "state": "TS", "age": 35}),
+    ("నేను తెలంగాణ రైతును నా వయసు అరవై ఐదు ఆదాయం రెండున్నర లక్షలు",
+     {"state": "TS", "occupation": "farmer", "age": 65, "income": 250000}),
+    ("నేను మహిళను", {"gender": "female"}),
+    ("నేను పురుషుడిని", {"gender": "male"}),
+    ("ఆంధ్ర ప్రదేశ్ నుండి", {"state": "AP"}),
+])
+def test_covered_utterances(text, slots):
+    assert extract_slots_with_coverage(text) == (slots, True)
+
+
+def test_prefix_of_a_word_is_not_a_slot():
+    # "మగ్గం" (loom) starts with "మగ" (male)
+    slots, covered = extract_slots_with_coverage("మగ్గం నేత")
+    assert slots == {"occupation": "weaver"}
+    assert not covered
+
+
+@pytest.mark.parametrize("text", [
+    "రోజుకూలీ",           # keyword inside a longer word
+    "ఒకసారి రైతును",      # non-slot word
+    "రైతు బీమా గురించి చెప్పండి",
+])
+def test_partial_coverage_goes_to_llm(text):
+    assert extract_slots_with_coverage(text)[1] is False
+
+
+@pytest.mark.parametrize("text, rest", [
+    ("నేను రైతును తెలంగాణ నుండి నా వయసు 35", ""),
+    ("నేను రైతును, వికలాంగులకు ఏ పథకాలు", ", వికలాంగులకు ఏ పథకాలు"),
+])
+def test_unmatched_text(text, rest):
+    assert unmatched_text(text) == rest
@@ -0,0 +1,55 @@
+import threading
+import pytest
+import turn_dedup
+
+
+def _start_slow_turn(turn_id, text, release):
+    started = threading.Event()
+
+    def run():
+        started.set()
+        release.wait(5)
+        return {"response": "ok"}
+
+    thread = threading.Thread(target=turn_dedup.run_once, args=(turn_id, text, lambda: None, run))
+    thread.start()
+    started.wait(5)
+    return thread
+
+
+def test_retry_of_a_running_turn_is_still_running(monkeypatch):
+    monkeypatch.setattr(turn_dedup, "TURN_DEDUP_WAIT_SECONDS", 0.05)
+    release = threading.Event()
+    thread = _start_slow_turn("t-running", "నమస్కారం", release)
+    try:
+        with pytest.raises(turn_dedup.TurnStillRunning):
+            turn_dedup.run_once("t-running", "నమస్కారం", lambda: None, lambda: {})
+        with pytest.raises(turn_dedup.TurnConflict):
+            turn_dedup.run_once("t-running", "వేరే మాట", lambda: None, lambda: {})
+    finally:
+        release.set()
+        thread.join()
+
+
+def test_finished_turn_is_replayed():
+    recent = turn_dedup.record(None, "t-done", "నమస్కారం", {"response": "hi"})
+    response, replayed = turn_dedup.run_once("t-done", "నమస్కారం", lambda: {"recent_turns": recent}, lambda: {})
+    assert replayed and response == {"response": "hi"}
+
+
+def test_turn_finished_during_the_session_read_is_replayed():
+    session = {}
+
+    def run():
+        session["recent_turns"] = turn_dedup.record(None, "t-race", "నమస్కారం", {"response": "hi"})
+        return {"response": "hi"}
+
+    def load_state():
+        snapshot = dict(session)
+        if not session:
+            # The original finishes after this read started, so the snapshot misses it
+            turn_dedup.run_once("t-race", "నమస్కారం", lambda: dict(session), run)
+        return snapshot
+
+    response, replayed = turn_dedup.run_once("t-race", "నమస్కారం", load_state, lambda: pytest.fail("ran twice"))
+    assert replayed and response == {"response": "hi"}
@@ -1,12 +1,43 @@
-import json
+import os
+import threading
+from collections import OrderedDict
+from tools.scheme_content_store import get_catalog
+
+# Results per (catalog version, profile), so a profile checked ahead of time
+# (langgraph_prefetch) or asked about again is answered without re-running the rules
+ELIGIBILITY_CACHE_SIZE = int(os.getenv("ELIGIBILITY_CACHE_SIZE", "4096"))
+
+_results = OrderedDict()
+_results_lock = threading.Lock()
 
-with open("data/eligibility_rules.json", encoding="utf-8") as f:
-    RULES = json.load(f)
 
 def check_eligibility(profile):
-    eligible = []
+    # Only the user's state shard is needed once the state is known
+    store = get_catalog(profile.get("state"))
+    try:
+        key = (store.version, frozenset(profile.items()))
+    except TypeError:  # unhashable slot value
+        key = None
+    if key is not None:
+        with _results_lock:
+            cached = _results.get(key)
+            if cached is not None:
+                _results.move_to_end(key)
+                return list(cached)
+
+    eligible = _evaluate(store.rules, profile)
 
-    for rule in RULES:
+    if key is not None and ELIGIBILITY_CACHE_SIZE > 0:
+        with _results_lock:
+            _results[key] = tuple(eligible)
+            while len(_results) > ELIGIBILITY_CACHE_SIZE:
+                _results.popitem(last=False)
+    return eligible
+
+
+def _evaluate(rules, profile):
+    eligible = []
+    for rule in rules:
         ok = True
         for k, v in rule["rules"].items():
             if k == "age_min":
@@ -0,0 +1,205 @@
+import json
+import os
+import threading
+import time
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # the trained classifier is optional; intent detection falls back to the LLM
+    np = None
+
+# Character n-gram TF-IDF + softmax linear model. Features are hashed into HASH_DIM
+# buckets, so the artifact is a fixed-size weight matrix (HASH_DIM x n_intents).
+# Opt-in: empty (the default) keeps intent detection on the LLM. The shipped artifact is
+# data/models/intent_model.npz; its held-out accuracy is still low, so check it before enabling.
+INTENT_MODEL_PATH = os.getenv("INTENT_MODEL_PATH", "")
+INTENT_MODEL_MIN_CONFIDENCE = float(os.getenv("INTENT_MODEL_MIN_CONFIDENCE", "0.6"))
+# When set, every turn's (utterance, final intent, source) is appended here as training data.
+INTENT_LOG_PATH = os.getenv("INTENT_LOG_PATH", "")
+# Intent sources whose labels are trusted for retraining: the LLM and the deterministic
+# overrides. "classifier" (this model's own prediction) and "fallback" are logged but skipped.
+TRAINABLE_INTENT_SOURCES = ("llm", "override")
+HASH_DIM = 1 << 15
+NGRAM_RANGE = (1, 4)
+
+
+def _grams(text: str) -> List[str]:
+    compact = " ".join((text or "").lower().split())
+    padded = f" {compact} "
+    grams = []
+    for n in range(NGRAM_RANGE[0], NGRAM_RANGE[1] + 1):
+        for i in range(len(padded) - n + 1):
+            grams.append(padded[i : i + n])
+    return grams
+
+
+def hashed_counts(text: str) -> Dict[int, float]:
+    counts: Dict[int, float] = {}
+    for gram in _grams(text):
+        idx = zlib.crc32(gram.encode("utf-8")) % HASH_DIM
+        counts[idx] = counts.get(idx, 0.0) + 1.0
+    return counts
+
+
+def _tfidf(counts: Dict[int, float], idf) -> Tuple[List[int], List[float]]:
+    idx = list(counts)
+    vals = [(1.0 + np.log(counts[i])) * idf[i] for i in idx]
+    norm = float(np.sqrt(sum(v * v for v in vals))) or 1.0
+    return idx, [v / norm for v in vals]
+
+
+class IntentModel:
+    def __init__(self, weights, bias, idf, labels: List[str], meta: Dict):
+        self.weights = weights
+        self.bias = bias
+        self.idf = idf
+        self.labels = labels
+        self.meta = meta
+        self.version = meta.get("version", "unknown")
+
+    def predict(self, text: str) -> Tuple[str, float]:
+        """(intent, probability) for one utterance"""
+        idx, vals = _tfidf(hashed_counts(text), self.idf)
+        if not idx:
+            return "unknown", 0.0
+        logits = np.asarray(vals, dtype=np.float32) @ self.weights[idx] + self.bias
+        logits = logits - logits.max()
+        probs = np.exp(logits)
+        probs /= probs.sum()
+        best = int(probs.argmax())
+        return self.labels[best], float(probs[best])
+
+    def save(self, path: str) -> None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = path + ".tmp.npz"
+        np.savez_compressed(
+            tmp,
+            weights=self.weights,
+            bias=self.bias,
+            idf=self.idf,
+            labels=np.array(self.labels),
+            meta=np.array(json.dumps(self.meta, ensure_ascii=False)),
+        )
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> "IntentModel":
+        with np.load(path, allow_pickle=False) as data:
+            meta = json.loads(str(data["meta"]))
+            if meta.get("hash_dim") != HASH_DIM or tuple(meta.get("ngram_range", ())) != NGRAM_RANGE:
+                raise ValueError(f"{path}: feature settings do not match this code, retrain the model")
+            return cls(
+                data["weights"].astype(np.float32),
+                data["bias"].astype(np.float32),
+                data["idf"].astype(np.float32),
+                [str(x) for x in data["labels"]],
+                meta,
+            )
+
+
+def _design_matrix(texts: List[str], idf):
+    x = np.zeros((len(texts), HASH_DIM), dtype=np.float32)
+    for row, text in enumerate(texts):
+        idx, vals = _tfidf(hashed_counts(text), idf)
+        x[row, idx] = vals
+    return x
+
+
+def train_intent_model(
+    examples: List[Tuple[str, str]],
+    epochs: int = 300,
+    learning_rate: float = 2.0,
+    l2: float = 1e-4,
+    meta: Optional[Dict] = None,
+) -> IntentModel:
+    """Full-batch softmax regression on TF-IDF features"""
+    texts = [t for t, _ in examples]
+    labels = sorted({y for _, y in examples})
+    label_idx = {y: i for i, y in enumerate(labels)}
+    y = np.array([label_idx[lbl] for _, lbl in examples])
+
+    df = np.zeros(HASH_DIM, dtype=np.float32)
+    for text in texts:
+        df[list(hashed_counts(text))] += 1.0
+    idf = (np.log((1.0 + len(texts)) / (1.0 + df)) + 1.0).astype(np.float32)
+
+    x = _design_matrix(texts, idf)
+    active = np.flatnonzero(x.any(axis=0))
+    xa = x[:, active]
+    onehot = np.eye(len(labels), dtype=np.float32)[y]
+    w = np.zeros((len(active), len(labels)), dtype=np.float32)
+    b = np.zeros(len(labels), dtype=np.float32)
+    for _ in range(epochs):
+        logits = xa @ w + b
+        logits -= logits.max(axis=1, keepdims=True)
+        probs = np.exp(logits)
+        probs /= probs.sum(axis=1, keepdims=True)
+        grad = (probs - onehot) / len(texts)
+        w -= learning_rate * (xa.T @ grad + l2 * w)
+        b -= learning_rate * grad.sum(axis=0)
+
+    weights = np.zeros((HASH_DIM, len(labels)), dtype=np.float32)
+    weights[active] = w
+    meta = dict(meta or {})
+    meta.update({
+        "hash_dim": HASH_DIM,
+        "ngram_range": list(NGRAM_RANGE),
+        "trained_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "n_examples": len(texts),
+    })
+    meta.setdefault("version", time.strftime("%Y%m%d%H%M%S"))
+    return IntentModel(weights, b, idf, labels, meta)
+
+
+_model: Optional[IntentModel] = None
+_model_mtime: Optional[float] = None
+_lock = threading.Lock()
+
+
+def get_intent_model() -> Optional[IntentModel]:
+    """Currently deployed model (reloaded when the artifact file changes), or None"""
+    global _model, _model_mtime
+    if np is None or not INTENT_MODEL_PATH:
+        return None
+    try:
+        mtime = os.stat(INTENT_MODEL_PATH).st_mtime
+    except OSError:
+        return None
+    if _model_mtime != mtime:
+        with _lock:
+            if _model_mtime != mtime:
+                try:
+                    _model = IntentModel.load(INTENT_MODEL_PATH)
+                    print(f"[INTENT_MODEL] Loaded {INTENT_MODEL_PATH} version {_model.version}")
+                except Exception as e:
+                    print(f"[INTENT_MODEL] Could not load {INTENT_MODEL_PATH}: {e}")
+                    _model = None
+                _model_mtime = mtime
+    return _model
+
+
+def predict_intent(text: str) -> Tuple[Optional[str], float]:
+    """(intent, confidence) from the trained model; (None, 0.0) when no model is deployed"""
+    model = get_intent_model()
+    if model is None:
+        return None, 0.0
+    return model.predict(text)
+
+
+_log_lock = threading.Lock()
+
+
+def log_intent_example(text: str, intent: str, source: Optional[str]) -> None:
+    """Append one (utterance, final intent, source) row to INTENT_LOG_PATH for retraining"""
+    if not INTENT_LOG_PATH or not text or not intent or not source:
+        return
+    try:
+        line = json.dumps({"ts": time.strftime("%Y-%m-%dT%H:%M:%S"), "text": text, "intent": intent,
+                           "source": source}, ensure_ascii=False)
+        with _log_lock:
+            with open(INTENT_LOG_PATH, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+    except Exception as e:
+        print(f"[INTENT_MODEL] Could not log intent example: {e}")
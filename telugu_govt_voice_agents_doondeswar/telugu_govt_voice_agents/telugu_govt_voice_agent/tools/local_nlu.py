@@ -0,0 +1,196 @@
+import json
+import math
+import threading
+from typing import Dict, List, Optional, Tuple
+from tools.scheme_content_store import get_catalog, get_state_shard
+from tools.scheme_search import search_schemes
+from tools.state_registry import get_state_registry
+
+# In-process NLU used by the "local" LLM backend: no network, CPU only, ~1 ms per call.
+EXAMPLE_FLOWS_PATH = "example_flows.json"
+INTENTS = [
+    "greeting", "time_query", "name_query", "scheme_list", "scheme_info", "scheme_criteria",
+    "scheme_search", "eligibility_check", "apply", "unknown",
+]
+NGRAM_RANGE = (2, 4)
+MIN_INTENT_SIMILARITY = 0.12
+SCHEME_SEARCH_MIN_SCORE = 0.9
+
+# {scheme} / {state} are filled from the scheme catalog.
+_SYNTHETIC_TEMPLATES: Dict[str, List[str]] = {
+    "greeting": ["నమస్కారం", "నమస్తే", "హలో", "హాయ్", "శుభోదయం", "hello", "hi", "good morning", "నమస్కారం అండి"],
+    "time_query": ["టైమ్ ఎంత", "ఇప్పుడు సమయం ఎంత", "టైం ఎంత అయింది", "సమయం ఎంత", "what time is it", "ఇప్పుడు టైమ్ ఎంత"],
+    "name_query": ["నా పేరు ఏమిటి", "నా పేరు చెప్పు", "నా పేరు ఏంటి", "what is my name", "నా పేరు మీకు తెలుసా"],
+    "scheme_list": [
+        "{state} లో ఏమేమి పథకాలు ఉన్నాయి", "{state} పథకాల జాబితా", "{state} ప్రభుత్వ పథకాలు చెప్పండి",
+        "అన్ని పథకాలు చెప్పండి", "ఏ ఏ పథకాలు ఉన్నాయి", "list of schemes in {state}", "పథకాల లిస్ట్ చెప్పండి",
+    ],
+    "scheme_info": [
+        "{scheme} గురించి చెప్పండి", "{scheme} వివరాలు", "{scheme} అంటే ఏమిటి", "{scheme} పథకం ఏమిటి",
+        "{scheme} లో ఏమి ఇస్తారు", "tell me about {scheme}", "{scheme} పథకం గురించి తెలుసుకోవాలి",
+    ],
+    "scheme_criteria": [
+        "{scheme} రావాలి అంటే ఏం కావాలి", "{scheme} కి అర్హత ప్రమాణాలు ఏమిటి", "{scheme} కి ఎంత వయసు ఉండాలి",
+        "{scheme} కి ఆదాయ పరిమితి ఎంత", "{scheme} నిబంధనలు ఏమిటి", "{scheme} criteria",
+    ],
+    "scheme_search": [
+        "నాకు ప్రభుత్వ పథకం కావాలి", "నాకు సరిపోయే పథకాలు చెప్పండి", "నాకు సహాయం కావాలి",
+        "రైతులకు ఏ పథకాలు ఉన్నాయి", "వికలాంగులకు ఏ పథకాలు ఉన్నాయి", "వృద్ధులకు పెన్షన్ పథకం",
+        "మహిళలకు పథకాలు", "నేను రైతును {state} నుండి", "నా వయసు 60 నాకు ఏ పథకం వస్తుంది",
+    ],
+    "eligibility_check": [
+        "నాకు {scheme} వస్తుందా", "నేను {scheme} కి అర్హుడినా", "నేను అర్హుడినా", "నాకు అర్హత ఉందా",
+        "{scheme} నాకు వస్తుందా రాదా", "am I eligible for {scheme}", "నాకు పెన్షన్ వస్తుందా",
+    ],
+    "apply": [
+        "{scheme} కి ఎలా దరఖాస్తు చేయాలి", "అప్లై ఎలా చేయాలి", "దరఖాస్తు విధానం ఏమిటి",
+        "how to apply for {scheme}", "{scheme} అప్లికేషన్ ఎక్కడ ఇవ్వాలి", "దరఖాస్తు ఎక్కడ చేయాలి",
+    ],
+    "unknown": ["సరే", "ఏమో", "వాతావరణం ఎలా ఉంది", "క్రికెట్ స్కోర్ ఎంత", "పాట పాడు", "ok", "hmm", "జోక్ చెప్పు"],
+}
+
+
+def _ngrams(text: str) -> Dict[str, float]:
+    compact = " ".join((text or "").lower().split())
+    padded = f" {compact} "
+    counts: Dict[str, float] = {}
+    for n in range(NGRAM_RANGE[0], NGRAM_RANGE[1] + 1):
+        for i in range(len(padded) - n + 1):
+            gram = padded[i : i + n]
+            counts[gram] = counts.get(gram, 0.0) + 1.0
+    return counts
+
+
+def _normalize(vec: Dict[str, float]) -> Dict[str, float]:
+    norm = math.sqrt(sum(v * v for v in vec.values()))
+    return {k: v / norm for k, v in vec.items()} if norm else vec
+
+
+def _state_names() -> List[str]:
+    """Telugu and English names of every registered state, for the {state} templates"""
+    names: List[str] = []
+    for entry in get_state_registry().values():
+        for name in (entry["name_te"], entry["names"].get("en", "").lower()):
+            if name and name not in names:
+                names.append(name)
+    return names
+
+
+def build_training_examples(state: Optional[str] = None) -> List[Tuple[str, str]]:
+    """(text, intent) pairs from example_flows.json plus catalog-driven synthetic sentences"""
+    return [(text, intent) for text, intent, _ in build_grouped_training_examples(state)]
+
+
+def build_grouped_training_examples(state: Optional[str] = None) -> List[Tuple[str, str, str]]:
+    """
+    (text, intent, group) triples. Sentences from one flow ("flow:<name>") or filled in
+    from one template ("template:<intent>:<n>") share a group, so a held-out split by
+    group never tests on a near-copy of a training sentence.
+    """
+    examples: List[Tuple[str, str, str]] = []
+    try:
+        with open(EXAMPLE_FLOWS_PATH, encoding="utf-8") as f:
+            flows = json.load(f).get("flows", [])
+        for n, flow in enumerate(flows):
+            group = f"flow:{flow.get('name') or n}"
+            for turn in flow.get("conversation", []):
+                intent = turn.get("expected_intent")
+                # Bare profile statements ("నా వయసు 35") continue a scheme search.
+                if intent is None and turn.get("expected_slots"):
+                    intent = "scheme_search"
+                if intent in INTENTS and turn.get("user"):
+                    examples.append((turn["user"], intent, group))
+    except Exception as e:
+        print(f"[LOCAL_NLU] Could not read {EXAMPLE_FLOWS_PATH}: {e}")
+
+    # Scheme names of `state`'s shard (every state when it is not known)
+    store = get_catalog(state)
+    scheme_names = sorted(store.by_name)
+    state_names = _state_names()
+    for intent, templates in _SYNTHETIC_TEMPLATES.items():
+        for i, template in enumerate(templates):
+            group = f"template:{intent}:{i}"
+            if "{scheme}" in template:
+                # A rotating slice of the catalog keeps the classes balanced.
+                for j in range(6):
+                    name = scheme_names[(i * 7 + j * 5) % len(scheme_names)] if scheme_names else "పథకం"
+                    examples.append((template.replace("{scheme}", name), intent, group))
+            elif "{state}" in template:
+                for name in state_names:
+                    examples.append((template.replace("{state}", name), intent, group))
+            else:
+                examples.append((template, intent, group))
+    return examples
+
+
+class LocalIntentClassifier:
+    """Nearest-centroid classifier over character n-grams (pure Python, trained in milliseconds)"""
+
+    def __init__(self, examples: List[Tuple[str, str]]):
+        sums: Dict[str, Dict[str, float]] = {}
+        for text, intent in examples:
+            centroid = sums.setdefault(intent, {})
+            for gram, value in _normalize(_ngrams(text)).items():
+                centroid[gram] = centroid.get(gram, 0.0) + value
+        self.centroids = {intent: _normalize(vec) for intent, vec in sums.items()}
+
+    def predict(self, text: str) -> Tuple[str, float]:
+        query = _normalize(_ngrams(text))
+        best, best_score = "unknown", 0.0
+        for intent, centroid in self.centroids.items():
+            score = sum(value * centroid.get(gram, 0.0) for gram, value in query.items())
+            if score > best_score:
+                best, best_score = intent, score
+        if best_score < MIN_INTENT_SIMILARITY:
+            return "unknown", best_score
+        return best, round(best_score, 4)
+
+
+# state (None for the merged catalog) -> (catalog version, classifier)
+_classifiers: Dict[Optional[str], Tuple[str, LocalIntentClassifier]] = {}
+_lock = threading.Lock()
+
+
+def get_intent_classifier(user_state: Optional[str] = None) -> LocalIntentClassifier:
+    """
+    Classifier trained for the current catalog version of the session's state
+    (synthetic data uses scheme names); the merged catalog only when the state is unknown
+    """
+    key = user_state if get_state_shard(user_state) is not None else None
+    version = get_catalog(key).version
+    entry = _classifiers.get(key)
+    if entry is None or entry[0] != version:
+        with _lock:
+            entry = _classifiers.get(key)
+            if entry is None or entry[0] != version:
+                entry = (version, LocalIntentClassifier(build_training_examples(key)))
+                _classifiers[key] = entry
+    return entry[1]
+
+
+def classify_intent(text: str, user_state: Optional[str] = None) -> str:
+    return get_intent_classifier(user_state).predict(text)[0]
+
+
+def identify_scheme(text: str, user_state: Optional[str] = None) -> Optional[str]:
+    """Scheme id mentioned in text: exact/compacted name match first, then a confident search hit"""
+    shard = get_state_shard(user_state)
+    store = shard or get_catalog(None)
+    states = [user_state] if shard else list(store.by_state)
+    compact = "".join((text or "").split())
+    if not compact:
+        return None
+
+    best_id, best_len = None, 0
+    for st in states:
+        for sid in store.by_state.get(st, []):
+            name_compact = "".join(store.by_id[sid]["scheme_name_te"].split())
+            if name_compact and name_compact in compact and len(name_compact) > best_len:
+                best_id, best_len = sid, len(name_compact)
+    if best_id:
+        return best_id
+
+    hits = search_schemes(text, state=user_state if shard else None, top_k=2)
+    if hits and hits[0]["score"] >= SCHEME_SEARCH_MIN_SCORE and (len(hits) == 1 or hits[1]["score"] < hits[0]["score"] * 0.8):
+        return hits[0]["scheme_id"]
+    return None
@@ -0,0 +1,414 @@
+import csv
+import json
+import os
+import re
+import threading
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from tools.scheme_content_store import get_scheme_shard
+from tools.state_registry import normalize_state
+
+# Beneficiary table for aggregate questions ("how many people in Warangal qualify for
+# TS_AASARA but not TS_PENSION"). CSV with a header row or JSONL, one person per row:
+#   id,state,district,age,income,gender,occupation,has_children
+# Rows are numbered 0..N-1 on load and every index is a bitmap over those numbers,
+# held in a Python int (bit i set = row i matches): AND/OR/NOT and popcount run in C
+# over 30-bit digits, so a query over millions of rows is a handful of big-int ops.
+#   categorical fields: one bitmap per value (state=TS, occupation=farmer, ...)
+#   age / income:       rows sorted by value, with cumulative bitmaps every 1/RANGE_BUCKETS
+#                       of the rows; a range is a prefix bitmap plus at most one bucket of rows
+POPULATION_PATH = os.getenv("POPULATION_PATH", "data/population.csv")
+POPULATION_ID_FIELD = os.getenv("POPULATION_ID_FIELD", "id")
+RANGE_BUCKETS = int(os.getenv("POPULATION_RANGE_BUCKETS", "128"))
+NUMERIC_FIELDS = ("age", "income")
+# Column names accepted for the fields eligibility rules use
+FIELD_ALIASES = {"annual_income": "income"}
+_BOOL_WORDS = {"true": "true", "yes": "true", "false": "false", "no": "false"}
+
+_TOKEN_RE = re.compile(
+    r"\s*(?:"
+    r"(?P<cmp>[A-Za-z_]\w*\s*(?:<=|>=|!=|=|<|>)\s*(?:\"[^\"]*\"|'[^']*'|[^\s&|()~!]+))"
+    r"|(?P<name>[A-Za-z_]\w*|\*)"
+    r"|(?P<op>[&|()~!-])"
+    r")"
+)
+_CMP_RE = re.compile(r"([A-Za-z_]\w*)\s*(<=|>=|!=|=|<|>)\s*(.+)")
+
+
+def _key(value: Any) -> Optional[str]:
+    """Normalized categorical value; None for missing"""
+    if value is None:
+        return None
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    text = str(value).strip().lower()
+    if not text:
+        return None
+    return _BOOL_WORDS.get(text, text)
+
+
+def _number(value: Any) -> Optional[float]:
+    if value is None or isinstance(value, bool):
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _bits_of(rows: Iterable[int]) -> int:
+    """Bitmap with the given row numbers set"""
+    rows = list(rows)
+    if not rows:
+        return 0
+    buf = bytearray((max(rows) >> 3) + 1)
+    for r in rows:
+        buf[r >> 3] |= 1 << (r & 7)
+    return int.from_bytes(buf, "little")
+
+
+def popcount(bits: int) -> int:
+    return bits.bit_count()
+
+
+def iter_rows(bits: int, offset: int = 0, limit: Optional[int] = None) -> List[int]:
+    """Row numbers set in a bitmap, ascending"""
+    found: List[int] = []
+    if bits <= 0:
+        return found
+    data = bits.to_bytes((bits.bit_length() + 7) >> 3, "little")
+    skipped = 0
+    for i, byte in enumerate(data):
+        if not byte:
+            continue
+        for j in range(8):
+            if byte >> j & 1:
+                if skipped < offset:
+                    skipped += 1
+                    continue
+                found.append((i << 3) | j)
+                if limit is not None and len(found) >= limit:
+                    return found
+    return found
+
+
+class RangeIndex:
+    """Rows sorted by a numeric field, with cumulative bitmaps at bucket boundaries"""
+
+    def __init__(self, values: List[float], rows: List[int], buckets: int = RANGE_BUCKETS):
+        order = sorted(range(len(values)), key=values.__getitem__)
+        self.values = array("d", [values[i] for i in order])
+        self.rows = array("l", [rows[i] for i in order])
+        self.step = max(1, -(-len(order) // max(1, buckets)))
+        # prefix[k] = rows at sorted positions < k * step
+        self.prefix: List[int] = [0]
+        buf = bytearray((max(rows) >> 3) + 1 if rows else 0)
+        for start in range(0, len(order), self.step):
+            for r in self.rows[start:start + self.step]:
+                buf[r >> 3] |= 1 << (r & 7)
+            self.prefix.append(int.from_bytes(buf, "little"))
+        self.present = self.prefix[-1]
+
+    def below(self, value: float, inclusive: bool = False) -> int:
+        """Rows with field < value (<= when inclusive)"""
+        pos = bisect_right(self.values, value) if inclusive else bisect_left(self.values, value)
+        k = pos // self.step
+        return self.prefix[k] | _bits_of(self.rows[k * self.step:pos])
+
+    def compare(self, op: str, value: float) -> int:
+        if op == "<":
+            return self.below(value)
+        if op == "<=":
+            return self.below(value, inclusive=True)
+        if op == ">":
+            return self.present & ~self.below(value, inclusive=True)
+        if op == ">=":
+            return self.present & ~self.below(value)
+        equal = self.below(value, inclusive=True) & ~self.below(value)
+        return equal if op == "=" else self.present & ~equal
+
+
+class PopulationIndex:
+    """Bitmap indexes over a beneficiary table; see the module comment"""
+
+    def __init__(self, rows: Iterable[Dict[str, Any]], source: str = ""):
+        t0 = time.perf_counter()
+        self.source = source
+        self.ids: List[str] = []
+        # Row numbers per categorical value, and values + row numbers per numeric field
+        postings: Dict[str, Dict[str, List[int]]] = {}
+        numeric: Dict[str, Tuple[List[float], List[int]]] = {field: ([], []) for field in NUMERIC_FIELDS}
+        self.labels: Dict[str, Dict[str, str]] = {}
+        columns: Dict[str, str] = {}
+        # Raw cell -> value key per field; categorical columns have few distinct values
+        keys: Dict[str, Dict[Any, Optional[str]]] = {}
+
+        for row_no, row in enumerate(rows):
+            self.ids.append(str(row.get(POPULATION_ID_FIELD, row_no)))
+            for column, raw in row.items():
+                field = columns.get(column)
+                if field is None:
+                    field = columns[column] = FIELD_ALIASES.get(column, column)
+                if field == POPULATION_ID_FIELD:
+                    continue
+                if field in numeric:
+                    number = _number(raw)
+                    if number is not None:
+                        numeric[field][0].append(number)
+                        numeric[field][1].append(row_no)
+                    continue
+                cache = keys.setdefault(field, {})
+                try:
+                    key = cache[raw]
+                except KeyError:
+                    key = cache[raw] = self._categorical_key(field, raw)
+                except TypeError:  # unhashable JSON value
+                    key = None
+                if key is not None:
+                    postings.setdefault(field, {}).setdefault(key, []).append(row_no)
+
+        self.size = len(self.ids)
+        self.all = (1 << self.size) - 1
+        self.categorical: Dict[str, Dict[str, int]] = {
+            field: {key: _bits_of(row_nos) for key, row_nos in values.items()}
+            for field, values in postings.items()
+        }
+        self.ranges: Dict[str, RangeIndex] = {
+            field: RangeIndex(values, row_nos) for field, (values, row_nos) in numeric.items() if values
+        }
+        self._schemes: Dict[Tuple[str, str], int] = {}
+        self._lock = threading.Lock()
+        self.build_ms = (time.perf_counter() - t0) * 1000
+        print(f"[POPULATION] Indexed {self.size} rows from {source or 'memory'}: "
+              f"{len(self.categorical)} categorical + {len(self.ranges)} range fields in {self.build_ms:.0f} ms")
+
+    def _categorical_key(self, field: str, raw: Any) -> Optional[str]:
+        value = normalize_state(raw) or raw if field == "state" else raw
+        key = _key(value)
+        if key is not None:
+            self.labels.setdefault(field, {}).setdefault(key, str(value).strip())
+        return key
+
+    @property
+    def fields(self) -> List[str]:
+        return sorted(set(self.categorical) | set(self.ranges))
+
+    def eq(self, field: str, value: Any) -> int:
+        """Rows whose field equals value (missing values never match)"""
+        if field in self.ranges:
+            number = _number(value)
+            return self.ranges[field].compare("=", number) if number is not None else 0
+        if field == "state":
+            value = normalize_state(value) or value
+        return self.categorical.get(field, {}).get(_key(value), 0)
+
+    def compare(self, field: str, op: str, value: Any) -> int:
+        if op in {"=", "!="} and field not in self.ranges:
+            matched = self.eq(field, value)
+            if op == "=":
+                return matched
+            present = 0
+            for bits in self.categorical.get(field, {}).values():
+                present |= bits
+            return present & ~matched
+        number = _number(value)
+        if field not in self.ranges or number is None:
+            raise ValueError(f"{field}{op}{value}: comparisons need a numeric field ({', '.join(self.ranges)})")
+        return self.ranges[field].compare(op, number)
+
+    def evaluate(self, rules: Dict[str, Any]) -> int:
+        """
+        Rows satisfying an eligibility rule set, with check_eligibility semantics:
+        every condition must hold and a row missing a field a rule needs does not qualify.
+        """
+        bits = self.all
+        for k, v in rules.items():
+            if k == "age_min":
+                bits &= self._range("age", ">=", v)
+            elif k == "age_range":
+                bits &= self._range("age", ">=", v[0]) & self._range("age", "<=", v[1])
+            elif k == "income_below":
+                bits &= self._range("income", "<=", v)
+            else:
+                bits &= self.eq(k, v)
+            if not bits:
+                break
+        return bits
+
+    def _range(self, field: str, op: str, value: float) -> int:
+        index = self.ranges.get(field)
+        return index.compare(op, value) if index else 0
+
+    def scheme(self, scheme_id: str) -> int:
+        """Rows eligible for a scheme; cached per catalog version of the scheme's shard"""
+        store = get_scheme_shard(scheme_id)
+        if store is None or scheme_id not in store.rules_by_id:
+            raise ValueError(f"unknown scheme or field: {scheme_id}")
+        key = (scheme_id, store.version)
+        bits = self._schemes.get(key)
+        if bits is None:
+            bits = self.evaluate(store.rules_by_id[scheme_id])
+            with self._lock:
+                self._schemes = {k: v for k, v in self._schemes.items() if k[0] != scheme_id}
+                self._schemes[key] = bits
+        return bits
+
+    def query(self, expr: str) -> int:
+        """
+        Rows matching an expression over scheme ids and field conditions:
+          TS_AASARA & ~TS_PENSION & district=Warangal
+          (TS_RYTHU_BANDHU | TS_RYTHU_BHEEMA) - age>60
+        & and, | or, ~ or ! not, - and-not; * is every row. Conditions: field=value,
+        field!=value (quote values with spaces: district="East Godavari"), and
+        <, <=, >, >= on age/income.
+        """
+        return _Parser(self, expr).parse()
+
+    def count(self, expr: str) -> int:
+        return popcount(self.query(expr))
+
+    def ids_of(self, bits: int, offset: int = 0, limit: Optional[int] = 100) -> List[str]:
+        return [self.ids[r] for r in iter_rows(bits, offset, limit)]
+
+    def group_counts(self, bits: int, field: str) -> Dict[str, int]:
+        """Matching rows per value of a categorical field (e.g. per district), largest first"""
+        if field not in self.categorical:
+            raise ValueError(f"{field}: not a categorical field ({', '.join(self.categorical)})")
+        labels = self.labels.get(field, {})
+        counts = {labels.get(key, key): popcount(bits & value_bits) for key, value_bits in self.categorical[field].items()}
+        return dict(sorted(((k, v) for k, v in counts.items() if v), key=lambda kv: (-kv[1], kv[0])))
+
+    def memory_bytes(self) -> int:
+        """Approximate size of the bitmaps and sorted columns"""
+        total = sum((b.bit_length() + 7) // 8 for values in self.categorical.values() for b in values.values())
+        for index in self.ranges.values():
+            total += sum((b.bit_length() + 7) // 8 for b in index.prefix)
+            total += index.values.itemsize * len(index.values) + index.rows.itemsize * len(index.rows)
+        return total
+
+
+class _Parser:
+    """Recursive descent over the query() grammar: or := and ('|' and)*; and := not (('&'|'-') not)*"""
+
+    def __init__(self, index: PopulationIndex, expr: str):
+        self.index = index
+        self.tokens: List[Tuple[str, str]] = []
+        pos = 0
+        expr = expr or ""
+        while pos < len(expr):
+            if expr[pos:].strip() == "":
+                break
+            match = _TOKEN_RE.match(expr, pos)
+            if not match or match.end() == pos:
+                raise ValueError(f"cannot parse query at {expr[pos:]!r}")
+            kind = match.lastgroup
+            self.tokens.append((kind, match.group(kind).strip()))
+            pos = match.end()
+        self.pos = 0
+
+    def _peek(self) -> Optional[str]:
+        return self.tokens[self.pos][1] if self.pos < len(self.tokens) else None
+
+    def _next(self) -> Tuple[str, str]:
+        if self.pos >= len(self.tokens):
+            raise ValueError("query ended unexpectedly")
+        token = self.tokens[self.pos]
+        self.pos += 1
+        return token
+
+    def parse(self) -> int:
+        if not self.tokens:
+            raise ValueError("empty query")
+        bits = self._or()
+        if self.pos != len(self.tokens):
+            raise ValueError(f"unexpected {self._peek()!r} in query")
+        return bits
+
+    def _or(self) -> int:
+        bits = self._and()
+        while self._peek() == "|":
+            self._next()
+            bits |= self._and()
+        return bits
+
+    def _and(self) -> int:
+        bits = self._not()
+        while self._peek() in {"&", "-"}:
+            op = self._next()[1]
+            other = self._not()
+            bits = bits & other if op == "&" else bits & ~other
+        return bits
+
+    def _not(self) -> int:
+        if self._peek() in {"~", "!"}:
+            self._next()
+            return self.index.all & ~self._not()
+        return self._atom()
+
+    def _atom(self) -> int:
+        kind, text = self._next()
+        if text == "(":
+            bits = self._or()
+            if self._peek() != ")":
+                raise ValueError("missing ')' in query")
+            self._next()
+            return bits
+        if kind == "cmp":
+            field, op, value = _CMP_RE.match(text).groups()
+            if len(value) >= 2 and value[0] == value[-1] and value[0] in "\"'":
+                value = value[1:-1]
+            return self.index.compare(FIELD_ALIASES.get(field, field), op, value)
+        if kind == "name":
+            return self.index.all if text == "*" else self.index.scheme(text)
+        raise ValueError(f"unexpected {text!r} in query")
+
+
+def read_rows(path: str) -> Iterable[Dict[str, Any]]:
+    """Rows of a .csv (header row) or .jsonl beneficiary table"""
+    with open(path, encoding="utf-8", newline="") as f:
+        if path.endswith(".jsonl") or path.endswith(".ndjson"):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from csv.DictReader(f)
+
+
+def load_population(path: str = POPULATION_PATH) -> PopulationIndex:
+    return PopulationIndex(read_rows(path), source=path)
+
+
+_population: Optional[PopulationIndex] = None
+_population_mtime: Optional[float] = None
+_load_lock = threading.Lock()
+
+
+def get_population_index() -> PopulationIndex:
+    """Index of POPULATION_PATH, loaded once and rebuilt when the file changes"""
+    global _population, _population_mtime
+    mtime = os.path.getmtime(POPULATION_PATH)
+    if _population is None or mtime != _population_mtime:
+        with _load_lock:
+            if _population is None or mtime != _population_mtime:
+                _population, _population_mtime = load_population(POPULATION_PATH), mtime
+    return _population
+
+
+def query_population(expr: str, limit: int = 0, offset: int = 0, group_by: Optional[str] = None,
+                     index: Optional[PopulationIndex] = None) -> Dict[str, Any]:
+    """
+    Count (and optionally list or group) the people matching a query(), e.g.
+    query_population("TS_AASARA & ~TS_PENSION & district=Warangal", limit=20)
+    """
+    index = index or get_population_index()
+    t0 = time.perf_counter()
+    bits = index.query(expr)
+    result: Dict[str, Any] = {"query": expr, "count": popcount(bits), "population": index.size}
+    if limit:
+        result["ids"] = index.ids_of(bits, offset, limit)
+    if group_by:
+        result["groups"] = index.group_counts(bits, group_by)
+    result["ms"] = round((time.perf_counter() - t0) * 1000, 3)
+    return result
@@ -0,0 +1,423 @@
+import json
+import os
+import hashlib
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+from tools.state_registry import is_known_state, state_codes
+
+SCHEMES_MASTER_PATH = "data/schemes_master.json"
+ELIGIBILITY_RULES_PATH = "data/eligibility_rules.json"
+# JSON by default; point this at a .db/.sqlite file to load content from SQLite instead.
+SCHEME_CONTENT_PATH = os.getenv("SCHEME_CONTENT_PATH", "data/scheme_details_te.json")
+RELOAD_CHECK_SECONDS = float(os.getenv("SCHEME_CONTENT_RELOAD_SECONDS", "2"))
+
+_LIST_FIELDS = ["benefits_te", "documents_te", "keywords_te", "categories"]
+_STR_FIELDS = ["description_te", "apply_process_te"]
+_PROCESS_LIST_KEYS = ["online", "offline"]
+# Other response languages use the same fields with their own suffix (description_en,
+# benefits_hi, ...), see message_catalog.localized; Telugu is always the fallback.
+_LOCALIZED_RE = re.compile(r"^(?P<base>[a-z_]+)_(?P<lang>[a-z]{2})$")
+
+
+class ContentValidationError(ValueError):
+    pass
+
+
+def _read_json_bytes(raw: bytes, path: str) -> Any:
+    try:
+        return json.loads(raw.decode("utf-8"))
+    except Exception as e:
+        raise ContentValidationError(f"{path}: invalid JSON ({e})")
+
+
+def _read_sqlite_content(path: str) -> Dict[str, Any]:
+    """
+    SQLite layout:
+        content_defaults(field TEXT PRIMARY KEY, value TEXT)            -- value is JSON
+        scheme_content(scheme_id TEXT, field TEXT, value TEXT,
+                       PRIMARY KEY (scheme_id, field))                  -- value is JSON
+    """
+    content: Dict[str, Any] = {"defaults": {}, "schemes": {}}
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        for field, value in conn.execute("SELECT field, value FROM content_defaults"):
+            content["defaults"][field] = json.loads(value)
+        for scheme_id, field, value in conn.execute("SELECT scheme_id, field, value FROM scheme_content"):
+            content["schemes"].setdefault(scheme_id, {})[field] = json.loads(value)
+    except Exception as e:
+        raise ContentValidationError(f"{path}: cannot read SQLite content ({e})")
+    finally:
+        conn.close()
+    return content
+
+
+def _is_str_list(value: Any) -> bool:
+    return isinstance(value, list) and all(isinstance(x, str) and x.strip() for x in value)
+
+
+def _field_kind(field: str) -> Optional[str]:
+    """Schema of a content field ("list" / "str"), including localized variants of the Telugu fields"""
+    m = _LOCALIZED_RE.match(field)
+    te_field = f"{m.group('base')}_te" if m else field
+    if te_field in _LIST_FIELDS or field in _LIST_FIELDS:
+        return "list"
+    if te_field in _STR_FIELDS:
+        return "str"
+    return None
+
+
+def _validate_record(where: str, record: Any) -> None:
+    if not isinstance(record, dict):
+        raise ContentValidationError(f"{where}: expected an object")
+    for field in record:
+        kind = _field_kind(field)
+        if kind == "list" and not _is_str_list(record[field]):
+            raise ContentValidationError(f"{where}.{field}: expected a list of non-empty strings")
+        if kind == "str" and not isinstance(record[field], str):
+            raise ContentValidationError(f"{where}.{field}: expected a string")
+    process = record.get("application_process")
+    if process is not None:
+        if not isinstance(process, dict):
+            raise ContentValidationError(f"{where}.application_process: expected an object")
+        for key in _PROCESS_LIST_KEYS:
+            if key in process and not _is_str_list(process[key]):
+                raise ContentValidationError(f"{where}.application_process.{key}: expected a list of strings")
+    unknown = {f for f in record if _field_kind(f) is None} - {"application_process"}
+    if unknown:
+        raise ContentValidationError(f"{where}: unknown fields {sorted(unknown)}")
+
+
+def validate_content(content: Any, master: Any, rules: Any) -> None:
+    """Raise ContentValidationError if the data files do not match the expected schema"""
+    if not isinstance(master, dict):
+        raise ContentValidationError(f"{SCHEMES_MASTER_PATH}: expected an object keyed by state")
+    for st, schemes in master.items():
+        if not isinstance(schemes, list):
+            raise ContentValidationError(f"{SCHEMES_MASTER_PATH}.{st}: expected a list")
+        for i, scheme in enumerate(schemes):
+            if not isinstance(scheme, dict) or not scheme.get("scheme_id") or not scheme.get("scheme_name_te"):
+                raise ContentValidationError(f"{SCHEMES_MASTER_PATH}.{st}[{i}]: scheme_id and scheme_name_te are required")
+
+    if not isinstance(rules, list):
+        raise ContentValidationError(f"{ELIGIBILITY_RULES_PATH}: expected a list")
+    for i, rule in enumerate(rules):
+        if not isinstance(rule, dict) or not rule.get("scheme_id") or not isinstance(rule.get("rules"), dict):
+            raise ContentValidationError(f"{ELIGIBILITY_RULES_PATH}[{i}]: scheme_id and rules are required")
+
+    if not isinstance(content, dict) or not isinstance(content.get("schemes", {}), dict):
+        raise ContentValidationError(f"{SCHEME_CONTENT_PATH}: expected an object with a 'schemes' object")
+    _validate_record("defaults", content.get("defaults", {}))
+    for scheme_id, record in content.get("schemes", {}).items():
+        _validate_record(f"schemes.{scheme_id}", record)
+
+
+class SchemeContentStore:
+    """Immutable snapshot of the scheme catalog with per-field indexes"""
+
+    def __init__(self, master: Dict[str, List[dict]], rules: List[dict], content: Dict[str, Any], version: str):
+        self.version = version
+        self.rules = rules
+        self.defaults: Dict[str, Any] = content.get("defaults", {})
+
+        self.by_id: Dict[str, dict] = {}
+        self.by_state: Dict[str, List[str]] = {}
+        self.by_name: Dict[str, str] = {}
+        self.by_document: Dict[str, List[str]] = {}
+        self.by_category: Dict[str, List[str]] = {}
+        self.rules_by_id: Dict[str, dict] = {}
+
+        scheme_content = content.get("schemes", {})
+        for st, schemes in master.items():
+            ids = self.by_state.setdefault(st, [])
+            for scheme in schemes:
+                sid = scheme["scheme_id"].strip()
+                name = scheme["scheme_name_te"].strip()
+                if sid in self.by_id:
+                    continue
+                record = dict(scheme_content.get(sid, {}))
+                record.update({k: v.strip() for k, v in scheme.items()
+                               if k.startswith("scheme_name_") and isinstance(v, str) and v.strip()})
+                record.update({"scheme_id": sid, "scheme_name_te": name, "state": st})
+                self.by_id[sid] = record
+                ids.append(sid)
+                if name not in self.by_name:
+                    self.by_name[name] = sid
+                for doc in record.get("documents_te", []):
+                    self.by_document.setdefault(doc, []).append(sid)
+                for category in record.get("categories", []):
+                    self.by_category.setdefault(category, []).append(sid)
+
+        orphans = sorted(set(scheme_content) - set(self.by_id))
+        if orphans:
+            print(f"[CONTENT_STORE] Content for unknown scheme ids ignored: {orphans}")
+
+        for rule in rules:
+            self.rules_by_id.setdefault(rule["scheme_id"], rule["rules"])
+
+    @classmethod
+    def merge(cls, shards: List["SchemeContentStore"], version: str) -> "SchemeContentStore":
+        """One snapshot over several shards, sharing their records (nothing is re-read or re-validated)"""
+        store = cls({}, [], {}, version)
+        seen_rules = set()
+        for shard in shards:
+            if not store.defaults:
+                store.defaults = shard.defaults
+            for sid, record in shard.by_id.items():
+                store.by_id.setdefault(sid, record)
+            for st, ids in shard.by_state.items():
+                store.by_state.setdefault(st, []).extend(ids)
+            for name, sid in shard.by_name.items():
+                store.by_name.setdefault(name, sid)
+            for doc, ids in shard.by_document.items():
+                store.by_document.setdefault(doc, []).extend(ids)
+            for category, ids in shard.by_category.items():
+                store.by_category.setdefault(category, []).extend(ids)
+            for rule in shard.rules:
+                # State-less rules are present in every shard
+                key = (rule["scheme_id"], json.dumps(rule["rules"], sort_keys=True))
+                if key not in seen_rules:
+                    seen_rules.add(key)
+                    store.rules.append(rule)
+                    store.rules_by_id.setdefault(rule["scheme_id"], rule["rules"])
+        return store
+
+    def get(self, scheme_id: str) -> Optional[dict]:
+        return self.by_id.get(scheme_id)
+
+
+# Per-state shards: data/shards/<STATE>.json ({"schemes": [...], "rules": [...], "content": {...}},
+# see scripts/build_state_shards.py) when present, otherwise that state's slice of the combined files.
+SCHEME_SHARD_DIR = os.getenv("SCHEME_SHARD_DIR", "data/shards")
+# Least recently used shards are evicted once the resident catalog holds more schemes than this.
+SCHEME_SHARD_MAX_SCHEMES = int(os.getenv("SCHEME_SHARD_MAX_SCHEMES", "50000"))
+# States loaded (and rendered) at startup: "*" for every registered state, "" for none, or "TS,AP".
+SCHEME_PRELOAD_STATES = os.getenv("SCHEME_PRELOAD_STATES", "*")
+
+_lock = threading.Lock()
+_shards: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+_merged: Optional[SchemeContentStore] = None
+_merged_checked = 0.0
+_resident_version = ""
+# scheme id -> state of every shard loaded so far, for ids without a state prefix
+_id_states: Dict[str, str] = {}
+
+
+def _shard_path(state: str) -> str:
+    return os.path.join(SCHEME_SHARD_DIR, f"{state}.json")
+
+
+def _source_paths(state: str) -> List[str]:
+    path = _shard_path(state)
+    if os.path.exists(path):
+        return [path]
+    return [SCHEMES_MASTER_PATH, ELIGIBILITY_RULES_PATH, SCHEME_CONTENT_PATH]
+
+
+def _source_mtimes(paths: List[str]) -> Dict[str, float]:
+    mtimes = {}
+    for path in paths:
+        try:
+            mtimes[path] = os.stat(path).st_mtime
+        except OSError:
+            mtimes[path] = 0.0
+    return mtimes
+
+
+def read_combined_catalog() -> tuple:
+    """(master, rules, content) from the combined, all-state source files, validated"""
+    with open(SCHEMES_MASTER_PATH, "rb") as f:
+        master = _read_json_bytes(f.read(), SCHEMES_MASTER_PATH)
+    with open(ELIGIBILITY_RULES_PATH, "rb") as f:
+        rules = _read_json_bytes(f.read(), ELIGIBILITY_RULES_PATH)
+    if not os.path.exists(SCHEME_CONTENT_PATH):
+        content: Dict[str, Any] = {"defaults": {}, "schemes": {}}
+    elif SCHEME_CONTENT_PATH.endswith((".db", ".sqlite", ".sqlite3")):
+        content = _read_sqlite_content(SCHEME_CONTENT_PATH)
+    else:
+        with open(SCHEME_CONTENT_PATH, "rb") as f:
+            content = _read_json_bytes(f.read(), SCHEME_CONTENT_PATH)
+    validate_content(content, master, rules)
+    known = {s["scheme_id"].strip() for schemes in master.values() for s in schemes}
+    orphans = sorted(set(content.get("schemes", {})) - known)
+    if orphans:
+        print(f"[CONTENT_STORE] Content for unknown scheme ids ignored: {orphans}")
+    return master, rules, content
+
+
+def state_slice(master: Dict[str, List[dict]], rules: List[dict], content: Dict[str, Any], state: str) -> Dict[str, Any]:
+    """
+    One state's part of the combined files. Rules follow their scheme's state, then
+    their own "state" requirement; rules tied to no state are copied into every shard.
+    """
+    schemes = master.get(state, []) or []
+    ids = {s["scheme_id"].strip() for s in schemes}
+    scheme_states = {s["scheme_id"].strip(): st for st, lst in master.items() for s in lst}
+    state_rules = []
+    for rule in rules:
+        owner = scheme_states.get(rule["scheme_id"]) or rule["rules"].get("state")
+        if owner in (None, state):
+            state_rules.append(rule)
+    scheme_content = content.get("schemes", {})
+    return {
+        "schemes": schemes,
+        "rules": state_rules,
+        "content": {
+            "defaults": content.get("defaults", {}),
+            "schemes": {sid: scheme_content[sid] for sid in sorted(ids) if sid in scheme_content},
+        },
+    }
+
+
+def _load_shard(state: str) -> SchemeContentStore:
+    path = _shard_path(state)
+    if os.path.exists(path):
+        with open(path, "rb") as f:
+            data = _read_json_bytes(f.read(), path)
+        if not isinstance(data, dict):
+            raise ContentValidationError(f"{path}: expected an object")
+        data = {"schemes": data.get("schemes", []), "rules": data.get("rules", []), "content": data.get("content", {})}
+        validate_content(data["content"], {state: data["schemes"]}, data["rules"])
+    else:
+        data = state_slice(*read_combined_catalog(), state)
+    # Versioned by the shard's own data, so editing one state leaves the others' caches warm.
+    version = hashlib.sha1(json.dumps(data, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()[:12]
+    return SchemeContentStore({state: data["schemes"]}, data["rules"], data["content"], version)
+
+
+def _shards_changed() -> None:
+    global _merged, _resident_version
+    _merged = None
+    for state, entry in _shards.items():
+        for sid in list(entry["store"].by_id) + list(entry["store"].rules_by_id):
+            _id_states.setdefault(sid, state)
+    versions = sorted(f"{state}:{entry['store'].version}" for state, entry in _shards.items())
+    _resident_version = hashlib.sha1("|".join(versions).encode("utf-8")).hexdigest()[:12]
+
+
+def _evict_shards() -> None:
+    resident = sum(len(entry["store"].by_id) for entry in _shards.values())
+    while resident > SCHEME_SHARD_MAX_SCHEMES and len(_shards) > 1:
+        state, entry = _shards.popitem(last=False)
+        resident -= len(entry["store"].by_id)
+        _shards_changed()
+        print(f"[CONTENT_STORE] Evicted shard {state} ({len(entry['store'].by_id)} schemes)")
+
+
+def get_state_shard(state: Optional[str], evict: bool = True) -> Optional[SchemeContentStore]:
+    """
+    Catalog snapshot for one registered state, loaded on first use (None for an unknown state).
+    Source files are re-checked at most every RELOAD_CHECK_SECONDS; a changed file is
+    reloaded and validated, and an invalid update is rejected while the previous
+    snapshot keeps serving. With evict=False a newly loaded shard is only kept if it
+    fits in SCHEME_SHARD_MAX_SCHEMES without evicting another one.
+    """
+    if not is_known_state(state):
+        return None
+    now = time.monotonic()
+    entry = _shards.get(state)
+    if entry is not None and now - entry["checked"] < RELOAD_CHECK_SECONDS:
+        with _lock:
+            if state in _shards:
+                _shards.move_to_end(state)
+        return entry["store"]
+
+    with _lock:
+        entry = _shards.get(state)
+        if entry is None:
+            mtimes = _source_mtimes(_source_paths(state))
+            store = _load_shard(state)
+            resident = sum(len(e["store"].by_id) for e in _shards.values())
+            if not evict and _shards and resident + len(store.by_id) > SCHEME_SHARD_MAX_SCHEMES:
+                return store
+            _shards[state] = {"store": store, "mtimes": mtimes, "checked": now}
+            _shards_changed()
+            print(f"[CONTENT_STORE] Loaded shard {state}: {len(store.by_id)} schemes, version {store.version}")
+            _evict_shards()
+            return store
+
+        _shards.move_to_end(state)
+        if now - entry["checked"] < RELOAD_CHECK_SECONDS:
+            return entry["store"]
+        entry["checked"] = now
+        mtimes = _source_mtimes(_source_paths(state))
+        if mtimes == entry["mtimes"]:
+            return entry["store"]
+        entry["mtimes"] = mtimes
+        try:
+            new_store = _load_shard(state)
+        except (OSError, ContentValidationError) as e:
+            print(f"[CONTENT_STORE] Reload of {state} rejected, keeping version {entry['store'].version}: {e}")
+            return entry["store"]
+        if new_store.version != entry["store"].version:
+            print(f"[CONTENT_STORE] Reloaded shard {state}: {entry['store'].version} -> {new_store.version}")
+            entry["store"] = new_store
+            _shards_changed()
+        return entry["store"]
+
+
+def get_content_store() -> SchemeContentStore:
+    """
+    Every registered state merged into one snapshot, for cross-state queries
+    (search without a state, catalog-wide prompts). Merging reuses the shard
+    records and indexes; when the shard budget cannot hold the whole catalog the
+    missing shards are read for this call only and the merge is not kept.
+    """
+    global _merged, _merged_checked
+    now = time.monotonic()
+    merged = _merged
+    if merged is not None and now - _merged_checked < RELOAD_CHECK_SECONDS:
+        return merged
+
+    shards = [get_state_shard(state, evict=False) for state in state_codes()]
+    version = hashlib.sha1("|".join(s.version for s in shards).encode("utf-8")).hexdigest()[:12]
+    with _lock:
+        if _merged is not None and _merged.version == version:
+            _merged_checked = now
+            return _merged
+        merged = SchemeContentStore.merge(shards, version)
+        if all(state in _shards for state in state_codes()):
+            _merged, _merged_checked = merged, now
+    return merged
+
+
+def get_catalog(state: Optional[str]) -> SchemeContentStore:
+    """The shard of the session's state, or every state merged when the state is not known"""
+    return get_state_shard(state) or get_content_store()
+
+
+def get_scheme_shard(scheme_id: str) -> Optional[SchemeContentStore]:
+    """
+    Shard holding a scheme id (or its eligibility rule). Loaded shards are searched
+    first; otherwise the state comes from the id's prefix ("TS_RYTHU_BANDHU") or from
+    the ids seen in earlier loads, and only that one shard is loaded. An id no state
+    claims returns None without loading anything.
+    """
+    with _lock:
+        resident = [entry["store"] for entry in _shards.values()]
+    for store in resident:
+        if scheme_id in store.by_id or scheme_id in store.rules_by_id:
+            return store
+    prefix = scheme_id.split("_", 1)[0]
+    state = prefix if is_known_state(prefix) else _id_states.get(scheme_id)
+    if state is None:
+        return None
+    store = get_state_shard(state)
+    if store is not None and (scheme_id in store.by_id or scheme_id in store.rules_by_id):
+        return store
+    return None
+
+
+def resident_version() -> str:
+    """Version of the currently loaded shards (changes on load, reload and eviction)"""
+    return _resident_version
+
+
+def preload_states() -> List[str]:
+    """States named by SCHEME_PRELOAD_STATES that are registered"""
+    if SCHEME_PRELOAD_STATES.strip() == "*":
+        return state_codes()
+    return [st.strip() for st in SCHEME_PRELOAD_STATES.split(",") if is_known_state(st.strip())]
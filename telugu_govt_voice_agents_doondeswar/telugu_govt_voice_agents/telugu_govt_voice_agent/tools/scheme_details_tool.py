@@ -1,5 +1,59 @@
-import json
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Callable, Dict, List, Optional, Tuple
+from tools.scheme_content_store import get_catalog, get_scheme_shard, get_state_shard, preload_states
+from tools.state_registry import state_codes, state_name
+from message_catalog import has_message, localized, msg
+
+# Rendered answers are a pure function of (scheme_id, view, language) for a given
+# version of the scheme's state shard, so they are built once and then served as a
+# single dict lookup. Each entry carries that shard version, so reloading one state
+# only rebuilds that state's schemes.
+DETAIL_VIEWS = ["summary", "full", "documents", "criteria"]
+_DETAILS_CACHE: Dict[Tuple[str, str], Tuple[str, dict]] = {}
+_RENDER_CACHE: Dict[Tuple[str, str, str], Tuple[str, Optional[str]]] = {}
+
+# Optional enrichment backends (e.g. external scheme APIs). Each one is called as
+# fetch(scheme_id, language) -> dict of extra/overriding detail fields, and is fanned
+# out on a bounded pool so a page of N schemes costs one round, not N.
+DETAIL_BACKEND_WORKERS = int(os.getenv("DETAIL_BACKEND_WORKERS", "8"))
+DETAIL_BACKEND_TIMEOUT_SECONDS = float(os.getenv("DETAIL_BACKEND_TIMEOUT_SECONDS", "2"))
+_DETAIL_BACKENDS: Dict[str, Callable[[str, str], dict]] = {}
+_pool: Optional[ThreadPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def get_data_version(state: Optional[str] = None) -> str:
+    """Version of the scheme data for a state (its shard), or of the whole catalog when the state is unknown"""
+    return get_catalog(state).version
+
+
+def _shard_version(store) -> str:
+    return store.version if store is not None else ""
+
+
+def register_detail_backend(name: str, fetch: Callable[[str, str], dict]) -> None:
+    """Add (or replace) an enrichment backend; cached details are rebuilt"""
+    _DETAIL_BACKENDS[name] = fetch
+    _DETAILS_CACHE.clear()
+    _RENDER_CACHE.clear()
+
+
+def unregister_detail_backend(name: str) -> None:
+    if _DETAIL_BACKENDS.pop(name, None) is not None:
+        _DETAILS_CACHE.clear()
+        _RENDER_CACHE.clear()
+
+
+def _get_pool() -> ThreadPoolExecutor:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ThreadPoolExecutor(max_workers=DETAIL_BACKEND_WORKERS, thread_name_prefix="scheme-details")
+    return _pool
+
 
 def get_scheme_details(scheme_id: str, language: str = "te") -> dict:
     """
@@ -7,7 +61,8 @@ def get_scheme_details(scheme_id: str, language: str = "te") -> dict:
     
     Args:
         scheme_id: Scheme identifier (e.g., TS_RYTHU_BANDHU)
-        language: Language code (te for Telugu, en for English)
+        language: Response language (te, en, hi, ur; see data/messages). Names and
+            content use the record's <field>_<language> values when present, else Telugu
     
     Returns:
         Dictionary with scheme details including:
@@ -17,153 +72,160 @@ def get_scheme_details(scheme_id: str, language: str = "te") -> dict:
         - documents_required
         - application_process
         - eligibility_criteria
-    """
     
-    with open("data/schemes_master.json", encoding="utf-8") as f:
-        schemes_master = json.load(f)
-    
-    scheme_name = None
-    state = None
-    
-    for st, schemes in schemes_master.items():
-        for scheme in schemes:
-            if scheme["scheme_id"] == scheme_id:
-                scheme_name = scheme["scheme_name_te"]
-                state = st
-                break
+    Results are memoized per shard version; treat the returned dict as read-only.
+    """
+    return get_scheme_details_many([scheme_id], language)[scheme_id]
+
+
+def get_scheme_details_many(scheme_ids: List[str], language: str = "te") -> Dict[str, dict]:
+    """
+    Batch version of get_scheme_details: {scheme_id: details} for every requested id
     
-    if not scheme_name:
+    All ids are resolved against one catalog snapshot, and registered backends are
+    called concurrently (bounded by DETAIL_BACKEND_WORKERS, each call limited to
+    DETAIL_BACKEND_TIMEOUT_SECONDS). Results go through the same per-version cache.
+    """
+    results: Dict[str, dict] = {}
+    missing: List[str] = []
+    shards = {}
+    for sid in scheme_ids:
+        if sid in shards:
+            continue
+        shards[sid] = get_scheme_shard(sid)
+        cached = _DETAILS_CACHE.get((sid, language))
+        if cached is not None and cached[0] == _shard_version(shards[sid]):
+            results[sid] = cached[1]
+        else:
+            missing.append(sid)
+    if not missing:
+        return results
+
+    built = {sid: _build_scheme_details(shards[sid], sid, language) for sid in missing}
+
+    # A backend failure leaves that scheme uncached so the next request retries it.
+    complete = {sid: True for sid in missing}
+    found = [sid for sid in missing if not built[sid].get("error")]
+    if _DETAIL_BACKENDS and found:
+        pool = _get_pool()
+        futures = {
+            pool.submit(fetch, sid, language): (name, sid)
+            for name, fetch in list(_DETAIL_BACKENDS.items())
+            for sid in found
+        }
+        done, not_done = wait(futures, timeout=DETAIL_BACKEND_TIMEOUT_SECONDS)
+        for fut in not_done:
+            name, sid = futures[fut]
+            fut.cancel()
+            complete[sid] = False
+            print(f"[SCHEME_DETAILS] Backend '{name}' timed out for {sid}")
+        for fut in done:
+            name, sid = futures[fut]
+            try:
+                extra = fut.result() or {}
+                built[sid].update(extra)
+            except Exception as e:
+                complete[sid] = False
+                print(f"[SCHEME_DETAILS] Backend '{name}' failed for {sid}: {e}")
+
+    for sid in missing:
+        if complete[sid]:
+            _DETAILS_CACHE[(sid, language)] = (_shard_version(shards[sid]), built[sid])
+        results[sid] = built[sid]
+    return results
+
+
+def _build_scheme_details(store, scheme_id: str, language: str = "te") -> dict:
+    record = store.get(scheme_id) if store else None
+    if not record:
         return {"error": "Scheme not found"}
     
+    scheme_name = localized(record, "scheme_name", language)
+    state = record["state"]
     details = {
         "scheme_id": scheme_id,
         "scheme_name": scheme_name,
         "state": state,
-        "description": f"{scheme_name} పథకం {state} రాష్ట్ర ప్రభుత్వం అందిస్తున్న సంక్షేమ పథకం",
-        "benefits": get_scheme_benefits(scheme_id),
-        "documents_required": get_required_documents(scheme_id),
-        "application_process": get_application_process(scheme_id),
-        "eligibility": get_eligibility_text(scheme_id)
+        "description": localized(record, "description", language)
+        or msg(language, "details.default_description", name=scheme_name, state=state_name(state, language)),
+        "benefits": _benefits(store, record, language),
+        "documents_required": _documents(store, record, language),
+        "application_process": _application_process(store, record),
+        "eligibility": _eligibility_text(store.rules_by_id.get(scheme_id), language)
     }
     
     return details
 
 
+def _benefits(store, record: dict, language: str = "te") -> list:
+    return list(localized(record, "benefits", language) or localized(store.defaults, "benefits", language) or [])
+
+
+def _documents(store, record: dict, language: str = "te") -> list:
+    return list(localized(store.defaults, "documents", language) or []) + list(localized(record, "documents", language) or [])
+
+
+def _application_process(store, record: dict) -> dict:
+    process = dict(store.defaults.get("application_process", {}))
+    process.update(record.get("application_process", {}))
+    if record.get("apply_process_te"):
+        process["channel"] = record["apply_process_te"]
+    return process
+
+
 def get_scheme_benefits(scheme_id: str) -> list:
     """Get benefits for a specific scheme"""
-    
-    benefits_map = {
-        "TS_RYTHU_BANDHU": [
-            "ఎకరానికి రూ. 5000 ఆర్థిక సహాయం",
-            "సంవత్సరానికి రెండు సార్లు చెల్లింపు",
-            "నేరుగా బ్యాంకు ఖాతాలో జమ"
-        ],
-        "TS_RYTHU_BHEEMA": [
-            "రైతు మరణించినప్పుడు రూ. 5 లక్షల బీమా",
-            "కుటుంబానికి ఆర్థిక భద్రత",
-            "ప్రీమియం ప్రభుత్వం చెల్లిస్తుంది"
-        ],
-        "AP_RYTHU_BHAROSA": [
-            "ఎకరానికి రూ. 7500 ఆర్థిక సహాయం",
-            "సంవత్సరానికి ఒకసారి చెల్లింపు",
-            "నేరుగా బ్యాంకు ఖాతాలో జమ"
-        ],
-        "AP_AMMA_VODI": [
-            "పిల్లల చదువుకు సంవత్సరానికి రూ. 15000",
-            "తల్లుల ఖాతాలో నేరుగా జమ",
-            "విద్యా ఖర్చులకు మద్దతు"
-        ]
-    }
-    
-    return benefits_map.get(scheme_id, ["పథకం వివరాలు త్వరలో అందుబాటులో ఉంటాయి"])
+    store = get_scheme_shard(scheme_id) or get_catalog(None)
+    return _benefits(store, store.get(scheme_id) or {})
 
 
 def get_required_documents(scheme_id: str) -> list:
-    """Get required documents for a specific scheme"""
-    
-    common_docs = [
-        "ఆధార్ కార్డు",
-        "రేషన్ కార్డు",
-        "బ్యాంకు పాస్‌బుక్",
-        "ఫోటో"
-    ]
-    
-    scheme_specific = {
-        "TS_RYTHU_BANDHU": ["పట్టా పత్రాలు", "భూ రికార్డులు"],
-        "TS_RYTHU_BHEEMA": ["పట్టా పత్రాలు", "భూ రికార్డులు"],
-        "AP_RYTHU_BHAROSA": ["పట్టా పత్రాలు", "భూ రికార్డులు"],
-        "AP_AMMA_VODI": ["పిల్లల పాఠశాల సర్టిఫికెట్", "తల్లి ఆధార్"],
-        "TS_KALYANA_LAKSHMI": ["వివాహ ఆహ్వాన పత్రిక", "వయస్సు ధృవీకరణ పత్రం"],
-        "TS_AASARA": ["వయస్సు ధృవీకరణ పత్రం", "ఆదాయ ధృవీకరణ పత్రం"]
-    }
-    
-    specific = scheme_specific.get(scheme_id, [])
-    return common_docs + specific
+    """Get required documents for a specific scheme (common documents first)"""
+    store = get_scheme_shard(scheme_id) or get_catalog(None)
+    return _documents(store, store.get(scheme_id) or {})
 
 
 def get_application_process(scheme_id: str) -> dict:
     """Get application process steps"""
-    
-    return {
-        "online": [
-            "అధికారిక వెబ్‌సైట్‌కు వెళ్లండి",
-            "లాగిన్ చేయండి లేదా రిజిస్టర్ చేయండి",
-            "పథకం ఎంచుకోండి",
-            "వివరాలు నింపండి",
-            "పత్రాలు అప్‌లోడ్ చేయండి",
-            "సబ్మిట్ చేయండి"
-        ],
-        "offline": [
-            "సమీప గ్రామ సచివాలయం/మీసేవ కేంద్రానికి వెళ్లండి",
-            "దరఖాస్తు ఫారం తీసుకోండి",
-            "వివరాలు నింపండి",
-            "అవసరమైన పత్రాలు జతచేయండి",
-            "సబ్మిట్ చేయండి"
-        ],
-        "helpline": "1800-XXX-XXXX"
-    }
+    store = get_scheme_shard(scheme_id) or get_catalog(None)
+    return _application_process(store, store.get(scheme_id) or {})
 
 
-def get_eligibility_text(scheme_id: str) -> str:
-    """Get human-readable eligibility criteria"""
-    
-    with open("data/eligibility_rules.json", encoding="utf-8") as f:
-        rules = json.load(f)
-    
-    for rule in rules:
-        if rule["scheme_id"] == scheme_id:
-            criteria = rule["rules"]
-            
-            if not criteria:
-                return "అందరికీ అర్హత ఉంది"
-            
-            text_parts = []
-            
-            if "age_min" in criteria:
-                text_parts.append(f"వయస్సు {criteria['age_min']} సంవత్సరాలు పైబడి ఉండాలి")
-            
-            if "age_range" in criteria:
-                text_parts.append(f"వయస్సు {criteria['age_range'][0]} నుండి {criteria['age_range'][1]} మధ్య ఉండాలి")
-            
-            if "gender" in criteria:
-                gender_te = "మహిళ" if criteria["gender"] == "female" else "పురుషుడు"
-                text_parts.append(f"{gender_te} అయి ఉండాలి")
-            
-            if "occupation" in criteria:
-                occ_map = {
-                    "farmer": "రైతు",
-                    "weaver": "నేత కార్మికుడు",
-                    "fisherman": "మత్స్యకారుడు",
-                    "driver": "డ్రైవర్"
-                }
-                text_parts.append(f"{occ_map.get(criteria['occupation'], criteria['occupation'])} అయి ఉండాలి")
-            
-            if "income_below" in criteria:
-                text_parts.append(f"వార్షిక ఆదాయం రూ. {criteria['income_below']} కంటే తక్కువ ఉండాలి")
-            
-            return ", ".join(text_parts)
+def get_eligibility_text(scheme_id: str, store=None, language: str = "te") -> str:
+    """Get human-readable eligibility criteria (from `store` if given, else the scheme's shard)"""
+    store = store or get_scheme_shard(scheme_id)
+    return _eligibility_text(store.rules_by_id.get(scheme_id) if store else None, language)
+
+
+def _eligibility_text(criteria: Optional[dict], language: str = "te") -> str:
+    if criteria is not None:
+        if not criteria:
+            return msg(language, "rule.everyone")
+        
+        text_parts = []
+        
+        if "age_min" in criteria:
+            text_parts.append(msg(language, "rule.age_min", age=criteria["age_min"]))
+        
+        if "age_range" in criteria:
+            text_parts.append(msg(language, "rule.age_range", low=criteria["age_range"][0], high=criteria["age_range"][1]))
+        
+        if "gender" in criteria:
+            gender = msg(language, "gender.female" if criteria["gender"] == "female" else "gender.male")
+            text_parts.append(msg(language, "rule.must_be", who=gender))
+        
+        if "occupation" in criteria:
+            occupation = criteria["occupation"]
+            if has_message(f"occupation.{occupation}"):
+                occupation = msg(language, f"occupation.{occupation}")
+            text_parts.append(msg(language, "rule.must_be", who=occupation))
+        
+        if "income_below" in criteria:
+            text_parts.append(msg(language, "rule.income_below", income=criteria["income_below"]))
+        
+        return msg(language, "rule.separator").join(text_parts)
     
-    return "అర్హత వివరాలు అందుబాటులో లేవు"
+    return msg(language, "rule.unavailable")
 
 
 def get_schemes_by_category(category: str, state: str = None) -> list:
@@ -173,34 +235,118 @@ def get_schemes_by_category(category: str, state: str = None) -> list:
     Categories: farmer, pension, women, student, housing, health, employment
     """
     
-    category_map = {
-        "farmer": ["RYTHU", "BHAROSA", "BANDHU", "BHEEMA"],
-        "pension": ["PENSION", "AASARA", "OLD_AGE", "DISABLED"],
-        "women": ["AMMA", "KALYANA", "LAKSHMI", "SHAADI", "CHEYYUTHA"],
-        "student": ["SCHOLARSHIP", "FEE", "STUDENT"],
-        "housing": ["HOUSING", "2BHK"],
-        "health": ["AROGYASRI", "HEALTH", "KCR_KIT"],
-        "employment": ["UNEMPLOYMENT", "SKILL", "SELF_EMPLOYMENT"]
-    }
-    
-    keywords = category_map.get(category.lower(), [])
-    
-    with open("data/schemes_master.json", encoding="utf-8") as f:
-        schemes_master = json.load(f)
-    
     results = []
     
-    states_to_search = [state] if state else ["TS", "AP"]
+    states_to_search = [state] if state else state_codes()
     
     for st in states_to_search:
-        if st in schemes_master:
-            for scheme in schemes_master[st]:
-                scheme_id = scheme["scheme_id"]
-                if any(keyword in scheme_id for keyword in keywords):
-                    results.append({
-                        "scheme_id": scheme_id,
-                        "scheme_name": scheme["scheme_name_te"],
-                        "state": st
-                    })
+        store = get_state_shard(st)
+        if store is None:
+            continue
+        scheme_ids = set(store.by_category.get(category.lower(), []))
+        for scheme_id in store.by_state.get(st, []):
+            if scheme_id in scheme_ids:
+                results.append({
+                    "scheme_id": scheme_id,
+                    "scheme_name": store.by_id[scheme_id]["scheme_name_te"],
+                    "state": st
+                })
     
     return results
+
+
+def _render_scheme_detail(scheme_id: str, view: str, language: str) -> Optional[str]:
+    details = get_scheme_details(scheme_id, language)
+    if details.get("error"):
+        return None
+
+    name = details.get("scheme_name", "")
+    eligibility_text = (details.get("eligibility") or "").strip()
+    benefits = details.get("benefits", [])
+    docs = details.get("documents_required", [])
+    offline = details.get("application_process", {}).get("offline", [])
+
+    def bullet(item):
+        return msg(language, "details.bullet", item=item)
+
+    if view == "criteria":
+        if eligibility_text:
+            return msg(language, "details.criteria", name=name, eligibility=eligibility_text)
+        return msg(language, "details.criteria_unavailable", name=name)
+
+    if view == "documents":
+        lines = [msg(language, "details.documents_title", name=name)]
+        for d in docs[:8]:
+            lines.append(bullet(d))
+        if offline:
+            lines.append("\n" + msg(language, "details.offline_process"))
+            for step in offline[:6]:
+                lines.append(bullet(step))
+        return "\n".join(lines)
+
+    lines = [msg(language, "details.title", name=name)]
+    if eligibility_text:
+        lines.append(msg(language, "details.eligibility", eligibility=eligibility_text))
+    if benefits:
+        lines.append(msg(language, "details.benefits"))
+        for b in benefits[:5]:
+            lines.append(bullet(b))
+    if view == "full":
+        if docs:
+            lines.append(msg(language, "details.documents"))
+            for d in docs[:6]:
+                lines.append(bullet(d))
+        if offline:
+            lines.append(msg(language, "details.offline_process"))
+            for step in offline[:5]:
+                lines.append(bullet(step))
+    return "\n".join(lines)
+
+
+def render_scheme_detail(scheme_id: str, view: str = "summary", language: str = "te") -> Optional[str]:
+    """
+    Get a ready-to-send scheme answer from the versioned render cache
+    
+    Views:
+        summary   - name, eligibility and benefits
+        full      - summary plus documents and offline application steps
+        documents - documents and offline application steps
+        criteria  - one-line eligibility answer
+    
+    Returns None if the scheme is unknown.
+    """
+    version = _shard_version(get_scheme_shard(scheme_id))
+    key = (scheme_id, view, language)
+    cached = _RENDER_CACHE.get(key)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+    text = _render_scheme_detail(scheme_id, view, language)
+    # Do not pin an answer built while an enrichment backend was failing.
+    details = _DETAILS_CACHE.get((scheme_id, language))
+    if text is None or (details is not None and details[0] == version):
+        _RENDER_CACHE[key] = (version, text)
+    return text
+
+
+def render_scheme_details_many(scheme_ids: List[str], view: str = "summary", language: str = "te") -> Dict[str, Optional[str]]:
+    """render_scheme_detail for a whole result page, with details fetched in one batch"""
+    get_scheme_details_many(scheme_ids, language)
+    return {sid: render_scheme_detail(sid, view, language) for sid in scheme_ids}
+
+
+def precompute_scheme_details(language: str = "te", states: Optional[List[str]] = None) -> int:
+    """
+    Render every view of every scheme of the given states (default: SCHEME_PRELOAD_STATES)
+    into the cache, loading their shards; returns the number of entries
+    """
+    scheme_ids: List[str] = []
+    for st in preload_states() if states is None else states:
+        store = get_state_shard(st)
+        if store is not None:
+            scheme_ids.extend(store.by_id)
+    count = 0
+    for scheme_id in scheme_ids:
+        for view in DETAIL_VIEWS:
+            if render_scheme_detail(scheme_id, view, language) is not None:
+                count += 1
+    return count
@@ -0,0 +1,211 @@
+import math
+import re
+import threading
+import weakref
+import zlib
+from typing import Dict, List, Optional, Tuple
+from tools.scheme_content_store import get_catalog
+from tools.scheme_details_tool import get_eligibility_text
+
+try:
+    import numpy as np
+except ImportError:  # the vector index is optional; BM25 works without it
+    np = None
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+# Field weights act as term-frequency multipliers in BM25.
+FIELD_WEIGHTS = {
+    "name": 3.0,
+    "keywords": 2.0,
+    "categories": 1.0,
+    "description": 1.0,
+    "benefits": 1.0,
+    "eligibility": 1.0,
+}
+EMBED_DIM = 1024
+EMBED_WEIGHT = 0.5
+EMBED_MIN_SIMILARITY = 0.35
+RELATIVE_CUTOFF = 0.35
+# Terms found in more than this share of schemes ("అర్హత") do not make a query a topic search
+TOPIC_MAX_DF = 0.5
+
+_TOKEN_SPLIT_RE = re.compile(r"[^\wఀ-౿]+")
+# Common Telugu case/plural endings, longest first ("వికలాంగులకు" -> "వికలాంగు").
+_SUFFIXES = ["వారికి", "లకు", "లను", "లలో", "లతో", "లకి", "కు", "కి", "ను", "ని", "లో", "తో", "లు", "ల", "గా"]
+_STOPWORDS_RAW = [
+    "ఏ", "ఏమి", "ఏమేమి", "ఏవి", "ఏంటి", "ఎలా", "పథకం", "పథకాలు", "పథకాల", "ఉన్నాయి", "ఉంది", "ఉన్న",
+    "కి", "కు", "ని", "ను", "లో", "తో", "నాకు", "నేను", "మాకు", "మా", "నా", "గురించి", "చెప్పండి", "చెప్పు", "కావాలి", "కోసం", "మరియు", "ఇచ్చే", "సహాయం", "ఆర్థిక",
+    "the", "a", "an", "of", "for", "is", "are", "what", "which", "scheme", "schemes",
+]
+
+
+def _stem(token: str) -> str:
+    for suffix in _SUFFIXES:
+        if token.endswith(suffix) and len(token) - len(suffix) >= 2:
+            return token[: -len(suffix)]
+    return token
+
+
+_STOPWORDS = {_stem(w) for w in _STOPWORDS_RAW} | set(_STOPWORDS_RAW)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase, split on non-letters and strip common Telugu suffixes"""
+    tokens = []
+    for raw in _TOKEN_SPLIT_RE.split((text or "").lower()):
+        if not raw or raw.isdigit():
+            continue
+        tok = _stem(raw)
+        if tok in _STOPWORDS or raw in _STOPWORDS:
+            continue
+        tokens.append(tok)
+    return tokens
+
+
+def _char_ngrams(text: str, n: int = 3) -> List[str]:
+    compact = "".join((text or "").lower().split())
+    if not compact:
+        return []
+    padded = f"#{compact}#"
+    if len(padded) <= n:
+        return [padded]
+    return [padded[i : i + n] for i in range(len(padded) - n + 1)]
+
+
+def _embed(texts: List[str]):
+    """Hashed character-trigram vector, L2-normalised (robust to ASR spelling/spacing variants)"""
+    vec = np.zeros(EMBED_DIM, dtype=np.float32)
+    for text in texts:
+        for gram in _char_ngrams(text):
+            vec[zlib.crc32(gram.encode("utf-8")) % EMBED_DIM] += 1.0
+    norm = float(np.linalg.norm(vec))
+    return vec / norm if norm else vec
+
+
+class SchemeSearchIndex:
+    """BM25 inverted index over scheme text, plus an optional NumPy cosine index"""
+
+    def __init__(self, store):
+        self.version = store.version
+        self.doc_ids: List[str] = []
+        self.doc_states: List[str] = []
+        self.doc_len: List[float] = []
+        self.postings: Dict[str, List[Tuple[int, float]]] = {}
+
+        embed_rows = []
+        for sid, record in store.by_id.items():
+            fields = {
+                "name": [record["scheme_name_te"]],
+                "keywords": record.get("keywords_te", []),
+                "categories": record.get("categories", []),
+                "description": [record.get("description_te", "")],
+                "benefits": record.get("benefits_te", []),
+                "eligibility": [get_eligibility_text(sid, store)],
+            }
+            tf: Dict[str, float] = {}
+            for field, texts in fields.items():
+                weight = FIELD_WEIGHTS[field]
+                for text in texts:
+                    for tok in tokenize(text):
+                        tf[tok] = tf.get(tok, 0.0) + weight
+
+            doc_idx = len(self.doc_ids)
+            self.doc_ids.append(sid)
+            self.doc_states.append(record["state"])
+            self.doc_len.append(sum(tf.values()))
+            for tok, freq in tf.items():
+                self.postings.setdefault(tok, []).append((doc_idx, freq))
+            if np is not None:
+                embed_rows.append(_embed(fields["name"] + list(fields["keywords"])))
+
+        n_docs = len(self.doc_ids)
+        self.avgdl = (sum(self.doc_len) / n_docs) if n_docs else 0.0
+        self.idf = {
+            tok: math.log(1 + (n_docs - len(plist) + 0.5) / (len(plist) + 0.5))
+            for tok, plist in self.postings.items()
+        }
+        self.embeddings = np.vstack(embed_rows) if (np is not None and embed_rows) else None
+
+    def _bm25(self, query_tokens: List[str]) -> Dict[int, float]:
+        scores: Dict[int, float] = {}
+        for tok in set(query_tokens):
+            plist = self.postings.get(tok)
+            if not plist:
+                continue
+            idf = self.idf[tok]
+            for doc_idx, freq in plist:
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * self.doc_len[doc_idx] / (self.avgdl or 1.0))
+                scores[doc_idx] = scores.get(doc_idx, 0.0) + idf * freq * (BM25_K1 + 1) / (freq + norm)
+        return scores
+
+    def topic_terms(self, query: str) -> List[str]:
+        """Query tokens that pick out a subset of schemes (found in some, but at most TOPIC_MAX_DF of them)"""
+        limit = TOPIC_MAX_DF * len(self.doc_ids)
+        return [tok for tok in tokenize(query) if 0 < len(self.postings.get(tok, ())) <= limit]
+
+    def search(self, query: str, state: Optional[str] = None, top_k: int = 5) -> List[Tuple[str, float]]:
+        combined: Dict[int, float] = {}
+
+        bm25 = self._bm25(tokenize(query))
+        if bm25:
+            best = max(bm25.values())
+            for doc_idx, score in bm25.items():
+                combined[doc_idx] = score / best
+
+        if self.embeddings is not None:
+            sims = self.embeddings @ _embed([query])
+            k = min(top_k * 2, len(self.doc_ids))
+            for doc_idx in np.argpartition(-sims, k - 1)[:k]:
+                sim = float(sims[doc_idx])
+                if sim >= EMBED_MIN_SIMILARITY:
+                    combined[int(doc_idx)] = combined.get(int(doc_idx), 0.0) + EMBED_WEIGHT * sim
+
+        if state:
+            combined = {i: s for i, s in combined.items() if self.doc_states[i] == state}
+        if not combined:
+            return []
+
+        ranked = sorted(combined.items(), key=lambda x: (-x[1], x[0]))
+        cutoff = ranked[0][1] * RELATIVE_CUTOFF
+        return [(self.doc_ids[i], round(s, 4)) for i, s in ranked[:top_k] if s >= cutoff]
+
+
+# One index per catalog snapshot (a state shard or the merged catalog); an index
+# goes away with its snapshot when the shard is evicted or reloaded.
+_indexes: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+_index_lock = threading.Lock()
+
+
+def get_search_index(state: Optional[str] = None) -> SchemeSearchIndex:
+    """Search index for one state's shard, or for the merged catalog when state is None/unknown"""
+    return _index_for(get_catalog(state))
+
+
+def _index_for(store) -> SchemeSearchIndex:
+    index = _indexes.get(store)
+    if index is None:
+        with _index_lock:
+            index = _indexes.get(store)
+            if index is None:
+                index = _indexes[store] = SchemeSearchIndex(store)
+    return index
+
+
+def search_schemes(query: str, state: Optional[str] = None, top_k: int = 5) -> List[dict]:
+    """
+    Rank schemes for a free-text Telugu/English query, e.g. "వికలాంగులకు ఏ పథకాలు ఉన్నాయి"
+
+    Returns a list of {scheme_id, scheme_name, state, score}, best first.
+    """
+    store = get_catalog(state)
+    results = []
+    for sid, score in _index_for(store).search(query, state=state, top_k=top_k):
+        record = store.by_id[sid]
+        results.append({
+            "scheme_id": sid,
+            "scheme_name": record["scheme_name_te"],
+            "state": record["state"],
+            "score": score,
+        })
+    return results
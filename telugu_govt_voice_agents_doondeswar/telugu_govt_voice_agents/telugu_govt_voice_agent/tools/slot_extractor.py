@@ -0,0 +1,247 @@
+import re
+from typing import Any, Dict, List, Optional, Tuple
+from tools.state_registry import get_state_registry
+
+# Telugu block; used for word tails ("రైతును") and word boundaries, since Python's
+# \b/\w do not treat Telugu vowel signs as word characters.
+_TE = "ఀ-౿"
+
+_UNITS = {
+    "ఒకటి": 1, "ఒక్క": 1, "ఒక": 1, "రెండు": 2, "మూడు": 3, "నాలుగు": 4, "ఐదు": 5, "అయిదు": 5,
+    "ఆరు": 6, "ఏడు": 7, "ఎనిమిది": 8, "తొమ్మిది": 9, "పది": 10, "పదకొండు": 11, "పన్నెండు": 12,
+    "పదమూడు": 13, "పద్నాలుగు": 14, "పదిహేను": 15, "పదహారు": 16, "పదిహేడు": 17, "పద్దెనిమిది": 18,
+    "పందొమ్మిది": 19,
+}
+_TENS = {
+    "ఇరవై": 20, "ముప్పై": 30, "ముప్ఫై": 30, "నలభై": 40, "యాభై": 50, "అరవై": 60, "డెబ్బై": 70,
+    "ఎనభై": 80, "తొంభై": 90, "వంద": 100,
+}
+# "-న్నర" = "and a half" ("రెండున్నర లక్షలు" = 2.5 lakh); "అర లక్ష" = half a lakh.
+_HALVES = {
+    "ఒకటిన్నర": 1.5, "రెండున్నర": 2.5, "మూడున్నర": 3.5, "నాలుగున్నర": 4.5, "ఐదున్నర": 5.5,
+    "ఆరున్నర": 6.5, "ఏడున్నర": 7.5, "ఎనిమిదిన్నర": 8.5, "తొమ్మిదిన్నర": 9.5, "పదిన్నర": 10.5,
+}
+
+
+def _alt(words) -> str:
+    return "|".join(re.escape(w) for w in sorted(words, key=len, reverse=True))
+
+
+# A number word must end its word ("ఒకసారి" and "వందనం" are not numbers), except
+# when a unit is written joined to it ("పదివేలు", "అరవైఏళ్ళు").
+_NUMBER_JOINED_UNITS = r"లక్ష|వేల|వెయ్యి|సంవత్సర|ఏళ్ళ|ఏళ్ల"
+
+_NUMBER_WORD_RE = re.compile(
+    rf"(?<![{_TE}A-Za-z])(?:"
+    rf"(?P<half>{_alt(_HALVES)})"
+    rf"|(?P<tens>{_alt(_TENS)})(?:\s*(?P<tens_unit>{_alt(_UNITS)}))?"
+    rf"|(?P<unit>{_alt(_UNITS)})"
+    rf"|(?P<ara>అర)(?=\s*(?:లక్ష|వేల|వెయ్యి))"
+    rf")(?:(?![{_TE}A-Za-z])|(?={_NUMBER_JOINED_UNITS}))"
+)
+
+_OCCUPATIONS = [
+    ("రైతు", "farmer"),
+    ("farmer", "farmer"),
+    ("కూలీ", "laborer"),
+    ("laborer", "laborer"),
+    ("లేబరర్", "laborer"),
+    ("ఉద్యోగి", "employee"),
+    ("employee", "employee"),
+    ("వేవర్", "weaver"),
+    ("weaver", "weaver"),
+    ("నేతకారుడు", "weaver"),
+    ("నేత", "weaver"),
+    ("డ్రైవర్", "driver"),
+    ("driver", "driver"),
+    ("మత్స్యకారుడు", "fisherman"),
+    ("fisherman", "fisherman"),
+    ("ఇస్త్రీవాడు", "iron_worker"),
+    ("ఇస్త్రీ", "iron_worker"),
+]
+_OCC_GROUPS = {f"occ{i}": value for i, (_, value) in enumerate(_OCCUPATIONS)}
+# State names come from the registry (data/states.json): one group per state, any
+# alias followed by a Telugu case/word tail, spaces inside an alias optional.
+_STATE_GROUPS = {f"state{i}": entry for i, entry in enumerate(get_state_registry().values())}
+
+
+def _state_pattern(entry: Dict[str, Any]) -> str:
+    aliases = sorted(entry["aliases"], key=len, reverse=True)
+    return "|".join(r"\s*".join(re.escape(part) for part in alias.split()) for alias in aliases)
+
+
+_NUM = r"\d+(?:\.\d+)?"
+# A keyword whose last consonant continues into a cluster is another word ("మగ్గం" is not "మగ")
+_NO_CLUSTER = "(?!్)"
+# Word tails that keep a keyword match a whole word ("రైతును", "మహిళలకు", "తెలంగాణా");
+# with any other tail the word is left to the LLM when computing coverage.
+_WORD_TAILS = {
+    "", "ా", "ను", "ని", "కు", "కి", "గా", "తో", "లో", "లు", "ల", "లకు", "లకి", "లను", "లలో",
+    "ుడు", "ుడిని", "ులు", "ులకు", "ురాలు", "ురాలిని",
+}
+_WORD_GROUPS = ("gender_f", "gender_m")
+_INCOME_UNIT = r"(?:లక్ష|lakh|వేల|వెయ్యి|thousand)"
+
+# One master pattern, scanned once. Alternatives are listed in the same priority order
+# the individual patterns used to be tried in; _RANK resolves overlaps between slots.
+_MASTER_RE = re.compile(
+    "|".join([
+        rf"(?:వయసు|వయస్సు|age)\s*(?P<age_pre>\d{{1,3}})(?![\d.])(?:\s*(?:సంవత్సర|years|ఏళ్ళ|ఏళ్ల)[{_TE}]*)?",
+        rf"(?:ఆదాయం|income)\s*(?P<inc_pre>{_NUM})\s*(?P<inc_pre_unit>{_INCOME_UNIT})?[{_TE}]*"
+        rf"(?:\s*(?P<inc_pre_k>\d+)\s*(?:వేల|వెయ్యి)[{_TE}]*)?",
+        rf"(?P<inc_unit_n>{_NUM})\s*(?P<inc_unit>{_INCOME_UNIT})[{_TE}]*"
+        rf"(?:\s*(?P<inc_unit_k>\d+)\s*(?:వేల|వెయ్యి)[{_TE}]*)?",
+        # A bare "లక్ష రూపాయలు" only as a whole word, so names like "కళ్యాణ లక్ష్మి" never match.
+        rf"(?<![{_TE}A-Za-z])(?P<inc_lakh>లక్ష|lakh)(?:లు|ల|కు|కి)?(?![{_TE}A-Za-z])",
+        rf"(?P<age_post>\d{{1,3}})\s*(?:సంవత్సర|years|ఏళ్ళ|ఏళ్ల|ఏళ్లు)[{_TE}]*",
+        rf"(?P<inc_rs>\d+)\s*(?:రూపాయ|rupees)[{_TE}]*",
+        *[rf"(?P<{group}>{_state_pattern(entry)}){_NO_CLUSTER}[{_TE}]*" for group, entry in _STATE_GROUPS.items() if entry["aliases"]],
+        "|".join(rf"(?P<occ{i}>{re.escape(tok)}){_NO_CLUSTER}[{_TE}]*" for i, (tok, _) in enumerate(_OCCUPATIONS)),
+        rf"(?P<gender_f>స్త్రీ|ఆడ|మహిళ|female){_NO_CLUSTER}[{_TE}]*",
+        rf"(?P<gender_m>పురుషుడు|మగ|పురుష|male){_NO_CLUSTER}[{_TE}]*",
+    ]),
+    re.IGNORECASE,
+)
+
+_FILLER_RE = re.compile(
+    rf"(?<![{_TE}A-Za-z])(?:నా|నేను|నాకు|నేనొక|మా|మాది|మేము|నుండి|నుంచి|ని|ను|కి|గా|ఉంది|ఉన్నాను|ఉంటుంది"
+    rf"|సుమారు|దాదాపు|మాత్రమే|రాష్ట్రం|రాష్ట్రానికి|చెందిన|వాడిని|దానిని|వచ్చాను|అండి|గారు"
+    rf"|ఆదాయం|వయసు|వయస్సు|రూపాయ[{_TE}]*|సంవత్సర[{_TE}]*"
+    rf"|my|i|am|from|is|the|and|about|around|old|state|income|age|rupees|years)(?![{_TE}A-Za-z])",
+    re.IGNORECASE,
+)
+_RESIDUE_RE = re.compile(rf"[{_TE}A-Za-z]")
+
+_SANITIZE_PERCENT_RE = re.compile(r"\([^)]*\d{1,3}%[^)]*\)")
+_SANITIZE_SPACE_RE = re.compile(r"\s+")
+_FIRST_NUMBER_RE = re.compile(_NUM)
+
+
+def _fmt_number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else str(value)
+
+
+def normalize_number_words(text: str) -> str:
+    """Rewrite Telugu number words as digits ("అరవై ఐదు" -> "65", "రెండున్నర" -> "2.5")"""
+    def _repl(m: "re.Match") -> str:
+        if m.group("half"):
+            return _fmt_number(_HALVES[m.group("half")])
+        if m.group("tens"):
+            return _fmt_number(_TENS[m.group("tens")] + _UNITS.get(m.group("tens_unit") or "", 0))
+        if m.group("unit"):
+            return _fmt_number(_UNITS[m.group("unit")])
+        return "0.5"
+    return _NUMBER_WORD_RE.sub(_repl, text or "")
+
+
+def _amount(number: Optional[str], unit: Optional[str], extra_thousands: Optional[str] = None) -> int:
+    n = float(number) if number else 1.0
+    unit = (unit or "").lower()
+    if unit in ("లక్ష", "lakh"):
+        n *= 100000
+    elif unit:
+        n *= 1000
+    if extra_thousands:
+        n += int(extra_thousands) * 1000
+    return int(n)
+
+
+def parse_amount(text: str) -> Optional[int]:
+    """Parse an income/age value such as "2.5 lakh", "రెండున్నర లక్షలు" or "50 వేలు" into an int"""
+    t = normalize_number_words(str(text)).strip()
+    for m in _MASTER_RE.finditer(t):
+        if m.group("inc_unit"):
+            return _amount(m.group("inc_unit_n"), m.group("inc_unit"), m.group("inc_unit_k"))
+        if m.group("inc_lakh"):
+            return 100000
+    m = _FIRST_NUMBER_RE.search(t)
+    return int(float(m.group(0))) if m else None
+
+
+def _partial_word(text: str, m: "re.Match") -> bool:
+    """True when a state/occupation/gender match is only part of a word (a prefix, or a keyword with an unknown tail)"""
+    group = m.lastgroup
+    if not group or not (group in _STATE_GROUPS or group in _OCC_GROUPS or group in _WORD_GROUPS):
+        return False
+    if m.start() > 0 and _RESIDUE_RE.match(text[m.start() - 1]):
+        return True
+    return text[m.end(group) : m.end()] not in _WORD_TAILS
+
+
+# Lower rank wins when the same slot is matched more than once.
+_RANK = {"age_pre": 0, "age_post": 1, "inc_unit": 0, "inc_pre": 1, "inc_rs": 2}
+
+
+def extract_slots_with_coverage(user_text: str) -> Tuple[Dict[str, Any], bool]:
+    """
+    Single-pass deterministic slot extraction.
+
+    Returns (slots, covered) where covered is True when every word of the utterance
+    was either a whole slot word or a filler word, i.e. an LLM would find nothing more.
+    """
+    slots, leftover = _scan(user_text)
+    return slots, bool(slots) and not _RESIDUE_RE.search(leftover)
+
+
+def unmatched_text(user_text: str) -> str:
+    """The words of an utterance that are neither slot values nor filler ("వికలాంగులకు ఏ పథకాలు")"""
+    return " ".join(_scan(user_text)[1].split())
+
+
+def _scan(user_text: str) -> Tuple[Dict[str, Any], str]:
+    text = normalize_number_words(user_text or "")
+    slots: Dict[str, Any] = {}
+    ranks: Dict[str, Tuple[int, int]] = {}
+    residue: List[str] = []
+    last_end = 0
+
+    def _offer(slot: str, value: Any, rank: int, pos: int) -> None:
+        if slot not in ranks or (rank, pos) < ranks[slot]:
+            slots[slot] = value
+            ranks[slot] = (rank, pos)
+
+    for m in _MASTER_RE.finditer(text):
+        residue.append(text[last_end : m.start()])
+        last_end = m.end()
+        if _partial_word(text, m):
+            residue.append(text[m.start() : m.end()])
+        g = m.groupdict()
+        if g["age_pre"] or g["age_post"]:
+            age_val = int(g["age_pre"] or g["age_post"])
+            # Validate age range (5 years is clearly wrong for pension!)
+            if 10 <= age_val <= 120:
+                _offer("age", age_val, _RANK["age_pre" if g["age_pre"] else "age_post"], m.start())
+        elif g["inc_pre"]:
+            _offer("income", _amount(g["inc_pre"], g["inc_pre_unit"], g["inc_pre_k"]), _RANK["inc_pre"], m.start())
+        elif g["inc_unit"]:
+            _offer("income", _amount(g["inc_unit_n"], g["inc_unit"], g["inc_unit_k"]), _RANK["inc_unit"], m.start())
+        elif g["inc_lakh"]:
+            _offer("income", 100000, _RANK["inc_unit"], m.start())
+        elif g["inc_rs"]:
+            _offer("income", int(g["inc_rs"]), _RANK["inc_rs"], m.start())
+        elif m.lastgroup in _STATE_GROUPS:
+            entry = _STATE_GROUPS[m.lastgroup]
+            _offer("state", entry["code"], entry["mention_rank"], m.start())
+        elif g["gender_f"]:
+            _offer("gender", "female", 0, m.start())
+        elif g["gender_m"]:
+            _offer("gender", "male", 1, m.start())
+        elif m.lastgroup in _OCC_GROUPS:
+            _offer("occupation", _OCC_GROUPS[m.lastgroup], int(m.lastgroup[3:]), m.start())
+    residue.append(text[last_end:])
+
+    return slots, _FILLER_RE.sub(" ", " ".join(residue))
+
+
+def extract_slots(user_text: str) -> Dict[str, Any]:
+    return extract_slots_with_coverage(user_text)[0]
+
+
+def sanitize_text(text: str) -> str:
+    if not text:
+        return ""
+    t = str(text)
+    t = _SANITIZE_PERCENT_RE.sub(" ", t)
+    t = t.replace("🎤", " ").replace("🔊", " ").replace("⏹️", " ")
+    t = _SANITIZE_SPACE_RE.sub(" ", t).strip()
+    return t
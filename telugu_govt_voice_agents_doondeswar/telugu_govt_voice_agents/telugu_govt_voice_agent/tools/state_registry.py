@@ -0,0 +1,77 @@
+import json
+import os
+import threading
+from typing import Any, Dict, List, Optional
+
+# States (and other catalog regions) the agent knows about. Each entry:
+#   code          - slot value and shard key, e.g. "TS"
+#   name_te       - display name used in answers; name_<language> for other response languages
+#   aliases       - spoken/written forms mapped to the code (matched case-insensitively)
+#   mention_rank  - lower wins when one utterance names several states
+STATE_REGISTRY_PATH = os.getenv("STATE_REGISTRY_PATH", "data/states.json")
+
+_lock = threading.Lock()
+_registry: Optional[Dict[str, Dict[str, Any]]] = None
+_aliases: Dict[str, str] = {}
+
+
+def _load_registry() -> Dict[str, Dict[str, Any]]:
+    with open(STATE_REGISTRY_PATH, encoding="utf-8") as f:
+        entries = json.load(f).get("states", [])
+    registry: Dict[str, Dict[str, Any]] = {}
+    for i, entry in enumerate(entries):
+        code = (entry.get("code") or "").strip()
+        if not code:
+            raise ValueError(f"{STATE_REGISTRY_PATH}: states[{i}] has no code")
+        registry[code] = {
+            "code": code,
+            "name_te": entry.get("name_te") or code,
+            "names": {key[5:]: value for key, value in entry.items() if key.startswith("name_") and value},
+            "aliases": [a for a in entry.get("aliases", []) if a.strip()],
+            "mention_rank": int(entry.get("mention_rank", i)),
+        }
+    return registry
+
+
+def get_state_registry() -> Dict[str, Dict[str, Any]]:
+    """{code: entry} in registry order (loaded once per process)"""
+    global _registry
+    if _registry is None:
+        with _lock:
+            if _registry is None:
+                registry = _load_registry()
+                for code, entry in registry.items():
+                    _aliases[code.lower()] = code
+                    for alias in entry["aliases"]:
+                        _aliases.setdefault(alias.strip().lower(), code)
+                _registry = registry
+    return _registry
+
+
+def state_codes() -> List[str]:
+    return list(get_state_registry())
+
+
+def is_known_state(value: Any) -> bool:
+    return isinstance(value, str) and value in get_state_registry()
+
+
+def normalize_state(value: Any) -> Optional[str]:
+    """Registered state code for a code or alias ("telangana", "ఆంధ్ర", "ap"), else None"""
+    if not isinstance(value, str):
+        return None
+    get_state_registry()
+    return _aliases.get(value.strip().lower())
+
+
+def state_name_te(code: str) -> str:
+    entry = get_state_registry().get(code)
+    return entry["name_te"] if entry else code
+
+
+def state_name(code: str, language: str = "te") -> str:
+    """Display name in the response language (Telugu when the registry has none)"""
+    entry = get_state_registry().get(code)
+    if not entry:
+        return code
+    return entry["names"].get(language) or entry["name_te"]
@@ -0,0 +1,114 @@
+import hashlib
+import os
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import metrics
+
+# Idempotent /agent turns. Clients send a "turn_id" (a fresh id per user message,
+# reused when the same request is retried after a timeout or dropped connection).
+# The session keeps the responses of its last TURN_DEDUP_KEEP turns (session
+# "recent_turns"), so a retry of a finished turn gets the stored response back
+# without running the graph, calling the LLM or applying the slot updates again.
+# A retry that arrives while the original is still running waits for it (up to
+# TURN_DEDUP_WAIT_SECONDS) and returns the same response; if the original is still
+# running after that, the retry gets TurnStillRunning (503, retry later). Clients
+# should wait longer than TURN_DEDUP_WAIT_SECONDS before giving up on a request.
+TURN_DEDUP_KEEP = int(os.getenv("TURN_DEDUP_KEEP", "8"))
+TURN_DEDUP_WAIT_SECONDS = float(os.getenv("TURN_DEDUP_WAIT_SECONDS", "60"))
+# Longer ids are rejected (they are stored in the session file)
+MAX_TURN_ID_LENGTH = 64
+# Retry-After (seconds) suggested when the original turn is still running
+TURN_RETRY_AFTER_SECONDS = 2
+
+_lock = threading.Lock()
+# turn_id -> (text hash, future of the response) while the turn runs
+_inflight: Dict[str, Tuple[str, Future]] = {}
+# Bumped (under _lock) whenever a run finishes, after its session was saved
+_finished_runs = 0
+
+
+class TurnConflict(Exception):
+    """The turn id was already used for a different message"""
+
+
+class TurnStillRunning(Exception):
+    """The original turn with this id is still running; retry the same request later"""
+
+
+def _text_hash(text: str) -> str:
+    return hashlib.sha1((text or "").strip().encode("utf-8")).hexdigest()[:12]
+
+
+def valid_turn_id(turn_id: Any) -> bool:
+    return isinstance(turn_id, str) and 0 < len(turn_id) <= MAX_TURN_ID_LENGTH
+
+
+def find(state: Optional[Dict[str, Any]], turn_id: str) -> Optional[Dict[str, Any]]:
+    for turn in (state or {}).get("recent_turns") or []:
+        if turn.get("turn_id") == turn_id:
+            return turn
+    return None
+
+
+def record(recent: Optional[List[Dict[str, Any]]], turn_id: Optional[str], text: str,
+           response: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """The session's recent_turns with this turn's response added (unchanged without a turn id)"""
+    turns = list(recent or [])
+    if turn_id:
+        turns = [t for t in turns if t.get("turn_id") != turn_id]
+        turns.append({"turn_id": turn_id, "text_hash": _text_hash(text), "response": response})
+    return turns[-TURN_DEDUP_KEEP:]
+
+
+def run_once(turn_id: str, text: str, load_state: Callable[[], Optional[Dict[str, Any]]],
+             run: Callable[[], Dict[str, Any]]) -> Tuple[Dict[str, Any], bool]:
+    """
+    Response for turn `turn_id`: the stored one if the session already has it, the
+    original's once it finishes if it is running, else run() (which must save the
+    session with the turn recorded before returning). Returns (response, replayed).
+    """
+    global _finished_runs
+    text_hash = _text_hash(text)
+    while True:
+        finished = _finished_runs
+        # The session file is read outside the lock; a run that finished while it was
+        # being read may not be in it, so read again when _finished_runs moved
+        stored = find(load_state(), turn_id)
+        with _lock:
+            running = _inflight.get(turn_id)
+            if running is None and stored is None:
+                if _finished_runs != finished:
+                    continue
+                future: Future = Future()
+                _inflight[turn_id] = (text_hash, future)
+        break
+    if running is None and stored is not None:
+        if stored.get("text_hash") != text_hash:
+            raise TurnConflict(f"turn_id {turn_id} was already used for a different message")
+        metrics.incr("agent.turn_replayed")
+        print(f"[TURN] {turn_id} already answered; replaying the stored response")
+        return stored["response"], True
+
+    if running is not None:
+        if running[0] != text_hash:
+            raise TurnConflict(f"turn_id {turn_id} is in use for a different message")
+        metrics.incr("agent.turn_waited")
+        print(f"[TURN] {turn_id} is still running; waiting for it")
+        try:
+            return running[1].result(timeout=TURN_DEDUP_WAIT_SECONDS), True
+        except FutureTimeout:
+            raise TurnStillRunning(f"turn_id {turn_id} is still running")
+
+    try:
+        response = run()
+    except BaseException as e:
+        future.set_exception(e)
+        raise
+    else:
+        future.set_result(response)
+    finally:
+        with _lock:
+            _inflight.pop(turn_id, None)
+            _finished_runs += 1
+    return response, False